@@ -1,26 +1,69 @@
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from dotenv import load_dotenv
 import os
 
-db = SQLAlchemy()
+from app.basedatos import SesionEnrutada, preparar_fork
+
+db = SQLAlchemy(session_options={"class_": SesionEnrutada})
 login_manager = LoginManager()
 
-def create_app():
+def create_app(config=None):
+    """Construye la app. Importar el paquete no crea nada: ver wsgi.py y run.py.
+
+    `config` (dict) reemplaza valores de app.config.Config, p. ej. en las pruebas.
+    """
     load_dotenv()
     app = Flask(__name__)
     app.config.from_object("app.config.Config")
+    if config:
+        app.config.update(config)
+    if app.config.get("PROXY_SALTOS"):
+        # request.remote_addr pasa a ser la IP del cliente, no la del proxy
+        saltos = app.config["PROXY_SALTOS"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=saltos, x_proto=saltos)
 
     db.init_app(app)
     login_manager.init_app(app)
+    preparar_fork(app)
 
     # Importar y registrar blueprints
     from app.routes import routes
     from app.auth import auth
+    from app.api import api
     app.register_blueprint(routes)
     app.register_blueprint(auth)
+    app.register_blueprint(api)
 
-    return app
+    from app.commands import register_commands
+    register_commands(app)
+
+    from app.imagenes import register_template_helpers
+    register_template_helpers(app)
+
+    from app import assets
+    assets.init_app(app)
+
+    from app.cache import cache
+    cache.init_app(app)
 
-app = create_app()
\ No newline at end of file
+    from app.fragmentos import fragmentos
+    fragmentos.init_app(app)
+
+    from app.cercania import geocodificador, indice_cercania
+    geocodificador.init_app(app)
+    indice_cercania.init_app(app)
+
+    from app.identidad import identidad
+    identidad.init_app(app)
+
+    from app.seguridad import limitador_login, pool_hash
+    pool_hash.init_app(app)
+    limitador_login.init_app(app)
+
+    from app.instrumentacion import instrumentacion
+    instrumentacion.init_app(app)
+
+    return app
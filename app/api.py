@@ -0,0 +1,237 @@
+# app/api.py
+# API JSON de solo lectura (v1) para el cliente movil.
+#
+# Cada respuesta lleva un ETag fuerte calculado con las columnas version/actualizado
+# de las filas de la pagina. Antes de la consulta completa se hace una consulta
+# pequeña (solo ids y versiones, por indice): si el cliente ya tiene esa version se
+# responde 304 sin cargar ni serializar nada.
+#
+# Last-Modified (e If-Modified-Since) solo en los recursos individuales: en una
+# coleccion, una fila que sale de la pagina (deja de cumplir un filtro) no mueve la
+# fecha mas reciente de las que quedan, y el cliente recibiria un 304 con datos
+# viejos. El ETag si cambia, porque resume tambien los ids.
+from datetime import timezone
+from flask import Blueprint, abort, current_app, jsonify, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import case, func, select
+from app import db
+from app.basedatos import solo_lectura
+from app.consultas import (
+    ORDEN_DEFECTO, ORDENES, aplicar_pagina, entero_acotado, filtros_desde_args, paginar_arqueros,
+    query_arqueros,
+)
+from app.imagenes import foto_url
+from app.models import Arquero, Partido, Usuario
+import hashlib
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+POR_PAGINA = 20
+MAX_POR_PAGINA = 100
+
+CAMPOS_ARQUERO = {
+    "id": lambda a: a.id,
+    "nombre": lambda a: a.usuario.nombre,
+    "apellido": lambda a: a.usuario.apellido,
+    "direccion": lambda a: a.usuario.direccion,
+    "foto": lambda a: foto_url(a.usuario.foto, "card") or None,
+    "años_tapando": lambda a: a.años_tapando,
+    "precio_por_hora": lambda a: a.precio_por_hora,
+    "calificacion": lambda a: a.calificacion,
+    "num_calificaciones": lambda a: a.num_calificaciones,
+    "puntaje_ranking": lambda a: a.puntaje_ranking,
+    "version": lambda a: a.version,
+}
+
+CAMPOS_PARTIDO = {
+    "id": lambda p: p.id,
+    "id_arquero": lambda p: p.id_arquero,
+    "id_usuario": lambda p: p.id_usuario,
+    "fecha": lambda p: p.fecha.isoformat(),
+    "hora": lambda p: p.hora.strftime("%H:%M"),
+    "ubicacion": lambda p: p.ubicacion,
+    "pago": lambda p: p.pago,
+    "estado": lambda p: p.estado,
+    "calificado": lambda p: bool(p.calificado),
+    "version": lambda p: p.version,
+}
+
+
+# ---------- Utilidades ----------
+
+def _campos(disponibles):
+    """?campos=id,nombre -> solo esos serializadores (los desconocidos se ignoran)."""
+    pedidos = request.args.get("campos")
+    if not pedidos:
+        return disponibles
+    elegidos = {c: disponibles[c] for c in pedidos.split(",") if c in disponibles}
+    return elegidos or disponibles
+
+
+def _serializar(objeto, campos):
+    return {nombre: obtener(objeto) for nombre, obtener in campos.items()}
+
+
+def _por_pagina():
+    return max(1, min(request.args.get("por_pagina", POR_PAGINA, type=int), MAX_POR_PAGINA))
+
+
+def _validador(huella):
+    """ETag fuerte a partir de la huella de la pagina y los parametros de la peticion."""
+    contenido = f"{request.full_path}|{huella}".encode()
+    return hashlib.sha1(contenido).hexdigest()
+
+
+def _cliente_actualizado(etag, ultima_modificacion=None):
+    """True si el cliente ya tiene esta version (If-None-Match o If-Modified-Since).
+
+    Las colecciones no pasan ultima_modificacion: solo se revalidan con el ETag.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and ultima_modificacion:
+        return ultima_modificacion.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def _huella(versiones):
+    """ETag y Last-Modified de una pagina.
+
+    `versiones` es un Select con columnas id, version y actualizado, ya filtrado,
+    ordenado y limitado como la pagina real. Se resume en una sola fila.
+    """
+    sub = versiones.subquery()
+    total, suma_ids, suma_versiones, ultima = db.session.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(sub.c.id), 0),
+            func.coalesce(func.sum(sub.c.version), 0),
+            func.max(sub.c.actualizado),
+        )
+    ).one()
+    # Las versiones solo crecen: cualquier cambio, alta o baja en la pagina cambia la huella
+    etag = _validador(f"{total}:{suma_ids}:{suma_versiones}:{ultima}")
+    return etag, ultima.replace(tzinfo=timezone.utc) if ultima else None
+
+
+def _con_validadores(respuesta, etag, ultima_modificacion=None):
+    respuesta.set_etag(etag)
+    if ultima_modificacion:
+        respuesta.last_modified = ultima_modificacion
+    # El cliente puede guardar la respuesta pero debe revalidarla siempre
+    respuesta.cache_control.private = True
+    respuesta.cache_control.no_cache = True
+    return respuesta
+
+
+def _no_modificada(etag, ultima_modificacion=None):
+    respuesta = current_app.response_class(status=304)
+    return _con_validadores(respuesta, etag, ultima_modificacion)
+
+
+# ---------- Arqueros ----------
+
+def _versiones_arquero():
+    # Un arquero cambia si cambia su fila o la de su usuario (nombre, foto...)
+    return (
+        select(
+            Arquero.id.label("id"),
+            (Arquero.version + Usuario.version).label("version"),
+            case((Arquero.actualizado > Usuario.actualizado, Arquero.actualizado),
+                 else_=Usuario.actualizado).label("actualizado"),
+        )
+        .join(Usuario, Arquero.id_usuario == Usuario.id)
+    )
+
+
+@api.route("/arqueros")
+@solo_lectura
+def arqueros():
+    filtros = filtros_desde_args(request.args)
+    orden = request.args.get("orden", ORDEN_DEFECTO)
+    if orden not in ORDENES:
+        orden = ORDEN_DEFECTO
+    cursor = request.args.get("cursor")
+    por_pagina = _por_pagina()
+
+    etag, _ = _huella(aplicar_pagina(_versiones_arquero(), filtros, orden, cursor, por_pagina))
+    if _cliente_actualizado(etag):
+        return _no_modificada(etag)
+
+    lista, siguiente = paginar_arqueros(filtros, orden, cursor, por_pagina)
+    campos = _campos(CAMPOS_ARQUERO)
+    args = {k: v for k, v in request.args.items() if k != "cursor"}
+    respuesta = jsonify(
+        datos=[_serializar(a, campos) for a in lista],
+        siguiente=url_for("api.arqueros", cursor=siguiente, **args) if siguiente else None,
+    )
+    if siguiente:
+        respuesta.headers["Link"] = f'<{url_for("api.arqueros", cursor=siguiente, **args)}>; rel="next"'
+    return _con_validadores(respuesta, etag)
+
+
+@api.route("/arqueros/<int:arquero_id>")
+@solo_lectura
+def arquero(arquero_id):
+    etag, ultima = _huella(_versiones_arquero().where(Arquero.id == arquero_id))
+    if _cliente_actualizado(etag, ultima):
+        return _no_modificada(etag, ultima)
+
+    encontrado = query_arqueros().filter(Arquero.id == arquero_id).first()
+    if encontrado is None:
+        abort(404)
+    return _con_validadores(jsonify(_serializar(encontrado, _campos(CAMPOS_ARQUERO))), etag, ultima)
+
+
+# ---------- Partidos del usuario / del arquero ----------
+
+def _partidos(columna, valor, endpoint):
+    """Partidos de un dueño, del mas reciente al mas antiguo, paginados con ?antes=<id>."""
+    antes = request.args.get("antes", type=entero_acotado)
+    por_pagina = _por_pagina()
+
+    condiciones = [columna == valor]
+    if antes:
+        condiciones.append(Partido.id < antes)
+    versiones = (
+        select(Partido.id.label("id"), Partido.version.label("version"), Partido.actualizado.label("actualizado"))
+        .where(*condiciones)
+        .order_by(Partido.id.desc())
+        .limit(por_pagina + 1)
+    )
+    etag, _ = _huella(versiones)
+    if _cliente_actualizado(etag):
+        return _no_modificada(etag)
+
+    partidos = db.session.scalars(
+        select(Partido).where(*condiciones).order_by(Partido.id.desc()).limit(por_pagina + 1)
+    ).all()
+    siguiente = None
+    if len(partidos) > por_pagina:
+        partidos = partidos[:por_pagina]
+        args = {k: v for k, v in request.args.items() if k != "antes"}
+        siguiente = url_for(endpoint, antes=partidos[-1].id, **args)
+
+    campos = _campos(CAMPOS_PARTIDO)
+    respuesta = jsonify(datos=[_serializar(p, campos) for p in partidos], siguiente=siguiente)
+    if siguiente:
+        respuesta.headers["Link"] = f'<{siguiente}>; rel="next"'
+    return _con_validadores(respuesta, etag)
+
+
+@api.route("/mis_partidos")
+@solo_lectura
+@login_required
+def mis_partidos():
+    if current_user.rol != "normal":
+        return jsonify(error="Solo los usuarios normales tienen partidos agendados."), 403
+    return _partidos(Partido.id_usuario, current_user.id, "api.mis_partidos")
+
+
+@api.route("/partidos_asignados")
+@solo_lectura
+@login_required
+def partidos_asignados():
+    if current_user.rol != "arquero" or current_user.arquero is None:
+        return jsonify(error="Solo los arqueros tienen partidos asignados."), 403
+    return _partidos(Partido.id_arquero, current_user.arquero.id, "api.partidos_asignados")
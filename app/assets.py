@@ -0,0 +1,172 @@
+# app/assets.py
+# Pipeline de archivos estaticos.
+#
+# `flask construir-assets` copia app/static a app/static/dist con el hash del
+# contenido en el nombre (main.3f2a9c1b7d4e.css), genera copias .gz/.br de los
+# archivos de texto y versiones reducidas de los banners. Escribe un manifest.json
+# que asset_url() usa en las plantillas. Como el nombre cambia con el contenido,
+# /assets/ responde con Cache-Control immutable por un año.
+#
+# Si no se ha corrido el build, asset_url() cae en url_for("static", ...).
+from flask import Blueprint, abort, request, send_from_directory, url_for
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+DIST_FOLDER = os.path.join(STATIC_FOLDER, "dist")
+MANIFEST = os.path.join(DIST_FOLDER, "manifest.json")
+
+# Carpetas de static que no son parte del build
+EXCLUIR = {"dist", "uploads"}
+COMPRIMIBLES = {".css", ".js", ".svg", ".json", ".txt", ".html"}
+# Banners: anchos a generar (ademas de la imagen original)
+IMAGENES_RESPONSIVE = {"img/banner1.jpg", "img/banner2.jpg", "img/banner3.jpg"}
+ANCHOS = (640, 1280, 1920)
+CALIDAD = 80
+UN_AÑO = 31536000
+
+assets = Blueprint("assets", __name__)
+
+_manifest = None
+
+
+# ---------- Build ----------
+
+def _hash(contenido):
+    return hashlib.sha256(contenido).hexdigest()[:12]
+
+
+def _con_hash(ruta, huella):
+    base, extension = os.path.splitext(ruta)
+    return f"{base}.{huella}{extension}"
+
+
+def _escribir(ruta_relativa, contenido):
+    destino = os.path.join(DIST_FOLDER, ruta_relativa)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    with open(destino, "wb") as archivo:
+        archivo.write(contenido)
+
+    if os.path.splitext(ruta_relativa)[1] in COMPRIMIBLES:
+        with open(destino + ".gz", "wb") as archivo:
+            archivo.write(gzip.compress(contenido, compresslevel=9, mtime=0))
+        with open(destino + ".br", "wb") as archivo:
+            import brotli
+            archivo.write(brotli.compress(contenido, quality=11))
+
+
+def _variantes_imagen(ruta_relativa):
+    """Genera la imagen en cada ancho de ANCHOS, en WebP y JPEG."""
+    from PIL import Image
+
+    variantes = []
+    with Image.open(os.path.join(STATIC_FOLDER, ruta_relativa)) as original:
+        imagen = original.convert("RGB")
+    base = os.path.splitext(ruta_relativa)[0]
+    for ancho in ANCHOS:
+        if ancho >= imagen.width:
+            continue
+        alto = round(imagen.height * ancho / imagen.width)
+        reducida = imagen.resize((ancho, alto), Image.LANCZOS)
+        variante = {"ancho": ancho}
+        for formato, formato_pil in (("webp", "WEBP"), ("jpg", "JPEG")):
+            ruta_temporal = os.path.join(DIST_FOLDER, f"{base}-{ancho}.tmp.{formato}")
+            os.makedirs(os.path.dirname(ruta_temporal), exist_ok=True)
+            reducida.save(ruta_temporal, formato_pil, quality=CALIDAD, optimize=True)
+            with open(ruta_temporal, "rb") as archivo:
+                contenido = archivo.read()
+            os.remove(ruta_temporal)
+            nombre = _con_hash(f"{base}-{ancho}.{formato}", _hash(contenido))
+            _escribir(nombre, contenido)
+            variante[formato] = nombre
+        variantes.append(variante)
+    return variantes
+
+
+def construir():
+    """Genera app/static/dist y su manifest.json. Devuelve el manifest."""
+    if os.path.isdir(DIST_FOLDER):
+        shutil.rmtree(DIST_FOLDER)
+    os.makedirs(DIST_FOLDER)
+
+    manifest = {"archivos": {}, "imagenes": {}}
+    for raiz, carpetas, archivos in os.walk(STATIC_FOLDER):
+        if raiz == STATIC_FOLDER:
+            carpetas[:] = [c for c in carpetas if c not in EXCLUIR]
+        for nombre in archivos:
+            ruta = os.path.join(raiz, nombre)
+            ruta_relativa = os.path.relpath(ruta, STATIC_FOLDER).replace(os.sep, "/")
+            with open(ruta, "rb") as archivo:
+                contenido = archivo.read()
+            destino = _con_hash(ruta_relativa, _hash(contenido))
+            _escribir(destino, contenido)
+            manifest["archivos"][ruta_relativa] = destino
+            if ruta_relativa in IMAGENES_RESPONSIVE:
+                manifest["imagenes"][ruta_relativa] = _variantes_imagen(ruta_relativa)
+
+    with open(MANIFEST, "w") as archivo:
+        json.dump(manifest, archivo, indent=2, sort_keys=True)
+    return manifest
+
+
+# ---------- Runtime ----------
+
+def _get_manifest():
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(MANIFEST) as archivo:
+                _manifest = json.load(archivo)
+        except (OSError, ValueError):
+            _manifest = {"archivos": {}, "imagenes": {}}
+    return _manifest
+
+
+def asset_url(filename):
+    """Como url_for("static", filename=...) pero con la version con hash si existe."""
+    destino = _get_manifest()["archivos"].get(filename)
+    if destino is None:
+        return url_for("static", filename=filename)
+    return url_for("assets.servir", filename=destino)
+
+
+def asset_srcset(filename, formato="webp"):
+    """srcset con los anchos generados ("url 640w, url 1280w, ..."), vacio si no hay build."""
+    return ", ".join(
+        f"{url_for('assets.servir', filename=v[formato])} {v['ancho']}w"
+        for v in _get_manifest()["imagenes"].get(filename, [])
+    )
+
+
+@assets.route("/assets/<path:filename>")
+def servir(filename):
+    ruta = os.path.join(DIST_FOLDER, filename)
+    if not os.path.isfile(ruta):
+        abort(404)
+
+    # Elegir la copia precomprimida que acepte el cliente
+    aceptadas = request.headers.get("Accept-Encoding", "")
+    codificacion = None
+    for cod, extension in (("br", ".br"), ("gzip", ".gz")):
+        if cod in aceptadas and os.path.isfile(ruta + extension):
+            codificacion, filename = cod, filename + extension
+            break
+
+    tipo = mimetypes.guess_type(ruta)[0] or "application/octet-stream"
+    respuesta = send_from_directory(DIST_FOLDER, filename, mimetype=tipo, max_age=UN_AÑO, etag=True)
+    respuesta.cache_control.public = True
+    respuesta.cache_control.immutable = True
+    respuesta.vary.add("Accept-Encoding")
+    if codificacion:
+        respuesta.headers["Content-Encoding"] = codificacion
+    return respuesta
+
+
+def init_app(app):
+    app.register_blueprint(assets)
+    app.add_template_global(asset_url)
+    app.add_template_global(asset_srcset)
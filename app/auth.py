@@ -1,25 +1,22 @@
 # app/auth.py
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, login_required
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
 from app import db, login_manager
 from app.models import Usuario, Arquero
 from app.forms import LoginForm, RegisterForm
-import os
+from app.imagenes import guardar_foto
+from app.ranking import puntaje
+from app.cercania import geocodificador, indice_cercania
+from app.cache import cache
+from app.identidad import identidad
+from app.seguridad import ServicioSaturado, limitador_login, pool_hash
 
 auth = Blueprint("auth", __name__)
 
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "uploads")
-ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "webp"}
-
-def allowed_file(filename):
-    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
-
 # Cargar usuario para Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
-    return Usuario.query.get(int(user_id))
+    return identidad.cargar(int(user_id))
 
 
 # Ruta: Login
@@ -27,8 +24,24 @@ def load_user(user_id):
 def login():
     form = LoginForm()
     if form.validate_on_submit():
+        # Limitar intentos antes de calcular el hash (lo mas costoso del login)
+        if not limitador_login.permitir(request.remote_addr, form.correo.data):
+            flash("Demasiados intentos. Espera un momento e inténtalo de nuevo.", "danger")
+            return render_template("login.html", form=form), 429
+
         usuario = Usuario.query.filter_by(correo=form.correo.data).first()
-        if usuario and check_password_hash(usuario.contraseña, form.contraseña.data):
+        try:
+            valida = usuario is not None and pool_hash.verificar(usuario.contraseña, form.contraseña.data)
+            # Si cambió el método o el factor de trabajo, guardar el hash nuevo
+            if valida and pool_hash.necesita_rehash(usuario.contraseña):
+                usuario.contraseña = pool_hash.hashear(form.contraseña.data)
+                db.session.commit()
+                identidad.invalidar(usuario.id)
+        except ServicioSaturado:
+            flash("El servicio está ocupado. Inténtalo de nuevo en unos segundos.", "warning")
+            return render_template("login.html", form=form), 503
+
+        if valida:
             login_user(usuario)
             flash("Has iniciado sesión correctamente", "success")
             return redirect(url_for("routes.panel"))
@@ -48,31 +61,27 @@ def register():
             flash("El correo ya está registrado", "warning")
             return redirect(url_for("auth.register"))
 
-        # Manejar la foto de perfil
-        foto_filename = None
-        if form.foto.data:
-            if not os.path.exists(UPLOAD_FOLDER):
-                os.makedirs(UPLOAD_FOLDER)
-            
-            file = form.foto.data
-            if allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                # Generar nombre único con timestamp
-                from datetime import datetime
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                filename = f"{timestamp}_{filename}"
-                file.save(os.path.join(UPLOAD_FOLDER, filename))
-                foto_filename = filename
+        # Manejar la foto de perfil (las variantes se generan en segundo plano)
+        foto_filename = guardar_foto(form.foto.data) if form.foto.data else None
+
+        try:
+            contraseña = pool_hash.hashear(form.contraseña.data)
+        except ServicioSaturado:
+            flash("El servicio está ocupado. Inténtalo de nuevo en unos segundos.", "warning")
+            return render_template("register.html", form=form), 503
 
         # Crear usuario
+        latitud, longitud = geocodificador.coordenadas(form.direccion.data)
         nuevo_usuario = Usuario(
             nombre=form.nombre.data,
             apellido=form.apellido.data,
             correo=form.correo.data,
             telefono=form.telefono.data,
-            contraseña=generate_password_hash(form.contraseña.data),
+            contraseña=contraseña,
             fecha_nacimiento=form.fecha_nacimiento.data,
             direccion=form.direccion.data,
+            latitud=latitud,
+            longitud=longitud,
             rol=form.rol.data,
             foto=foto_filename
         )
@@ -84,10 +93,14 @@ def register():
             nuevo_arquero = Arquero(
                 id_usuario=nuevo_usuario.id,
                 años_tapando=form.años_tapando.data,
-                precio_por_hora=form.precio_por_hora.data
+                precio_por_hora=form.precio_por_hora.data,
+                # Sin calificaciones ni partidos: arranca con el promedio previo
+                puntaje_ranking=puntaje(0, 0, 0),
             )
             db.session.add(nuevo_arquero)
             db.session.commit()
+            cache.invalidar("arqueros")
+            indice_cercania.invalidar()
 
         flash("Registro exitoso. Ahora puedes iniciar sesión.", "success")
         return redirect(url_for("auth.login"))
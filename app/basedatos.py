@@ -0,0 +1,68 @@
+# app/basedatos.py
+# Enrutamiento de lecturas a replicas.
+#
+# Las vistas marcadas con @solo_lectura hacen sus SELECT contra los binds
+# "replica_*" (SQLALCHEMY_BINDS, ver config.py), repartidos por turnos.
+# Los flush, INSERT/UPDATE/DELETE y cualquier vista sin el decorador van a la principal.
+# Si no hay replicas configuradas todo va a la principal.
+#
+# Con gunicorn --preload la app se construye en el proceso maestro y los workers
+# se crean con fork: cada worker descarta el pool heredado (preparar_fork).
+from functools import wraps
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+import itertools
+import os
+import weakref
+
+_turno = itertools.count()
+_apps = weakref.WeakSet()
+
+
+def _tras_fork():
+    from app import db
+
+    for app in list(_apps):
+        with app.app_context():
+            for engine in db.engines.values():
+                # close=False: los sockets heredados siguen siendo del padre, no se cierran
+                engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_tras_fork)
+
+
+def preparar_fork(app):
+    """Despues de un fork, el hijo abre sus propias conexiones (principal y replicas)."""
+    _apps.add(app)
+
+
+def solo_lectura(vista):
+    """Marca la vista para que sus consultas se hagan en una replica."""
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        g.solo_lectura = True
+        return vista(*args, **kwargs)
+    return envoltura
+
+
+class SesionEnrutada(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not getattr(clause, "is_dml", False)
+            and has_request_context()
+            and g.get("solo_lectura")
+        ):
+            replica = self._elegir_replica()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+    def _elegir_replica(self):
+        replicas = [motor for clave, motor in sorted(self._db.engines.items(), key=lambda x: x[0] or "")
+                    if clave and clave.startswith("replica_")]
+        if not replicas:
+            return None
+        return replicas[next(_turno) % len(replicas)]
@@ -0,0 +1,286 @@
+# app/cache.py
+# Cache de respuestas HTML para visitantes anonimos (home, arqueros, arquero_detail).
+#
+# La clave incluye la ruta, el query string y la "version" del grupo de datos.
+# Cuando cambian los datos de los arqueros se llama invalidar("arqueros"), que sube
+# la version: las entradas viejas ya no se encuentran y expiran solas por TTL/LRU.
+#
+# Backends:
+#   "memoria": LRU en el proceso (cada worker tiene el suyo)
+#   "archivo": directorio local compartido por todos los workers de la maquina.
+#              Es privado del usuario del proceso (0700) y los archivos no usan
+#              pickle: un archivo ajeno no puede ejecutar codigo al leerse.
+from collections import OrderedDict
+from functools import wraps
+from flask import Blueprint, Response, current_app, jsonify, request, session
+from flask_login import current_user
+import fcntl
+import hashlib
+import json
+import os
+import re
+import stat
+import tempfile
+import threading
+import time
+
+_PATRON_ENTRADA = re.compile(r"^[0-9a-f]{40}$")
+_PREFIJO_TEMPORAL = ".tmp"
+
+
+class MemoriaLRU:
+    def __init__(self, max_entradas=512):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            valor, expira = entrada
+            if expira and expira < time.time():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor, ttl=None):
+        with self._lock:
+            self._datos[clave] = (valor, time.time() + ttl if ttl else None)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def delete(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def incr(self, clave):
+        with self._lock:
+            valor = (self._datos.get(clave, (0, None))[0] or 0) + 1
+            self._datos[clave] = (valor, None)
+            return valor
+
+
+def directorio_privado(directorio):
+    """Crea el directorio (0700) o verifica que uno existente sea del usuario del proceso."""
+    os.makedirs(directorio, mode=0o700, exist_ok=True)
+    info = os.lstat(directorio)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise RuntimeError(f"{directorio} no es un directorio propio: usa otro en CACHE_DIR")
+    if info.st_mode & 0o077:
+        os.chmod(directorio, 0o700)
+    return directorio
+
+
+def _serializar(valor, expira):
+    # Una linea JSON de cabecera; las respuestas (cuerpo, mimetype) llevan el cuerpo crudo detras
+    if isinstance(valor, tuple):
+        cuerpo, mimetype = valor
+        return json.dumps({"expira": expira, "mimetype": mimetype}).encode() + b"\n" + cuerpo
+    return json.dumps({"expira": expira, "valor": valor}).encode() + b"\n"
+
+
+def _deserializar(datos):
+    cabecera, _, cuerpo = datos.partition(b"\n")
+    meta = json.loads(cabecera)
+    valor = (cuerpo, meta["mimetype"]) if "mimetype" in meta else meta["valor"]
+    return valor, meta["expira"]
+
+
+class ArchivoLocal:
+    """Un archivo por clave; los contadores se protegen con flock.
+
+    Guarda valores JSON o respuestas (cuerpo en bytes, mimetype). Cada tantas
+    escrituras borra las entradas vencidas y, si quedan mas de max_entradas, las
+    escritas hace mas tiempo. Las entradas sin TTL (versiones de grupo) no se borran.
+    """
+
+    def __init__(self, directorio, max_entradas=512):
+        self.directorio = directorio_privado(directorio)
+        self.max_entradas = max_entradas
+        # Entre dos podas cada worker puede escribir hasta `intervalo` entradas de mas
+        self.intervalo = max(1, max_entradas // 8)
+        self._escrituras = 0
+        self._lock = threading.Lock()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, hashlib.sha1(clave.encode()).hexdigest())
+
+    def _leer(self, ruta):
+        try:
+            with open(ruta, "rb") as archivo:
+                return _deserializar(archivo.read())
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def get(self, clave):
+        ruta = self._ruta(clave)
+        leido = self._leer(ruta)
+        if leido is None:
+            return None
+        valor, expira = leido
+        if expira and expira < time.time():
+            _borrar(ruta)
+            return None
+        return valor
+
+    def set(self, clave, valor, ttl=None):
+        # Escribir a un temporal y renombrar para que otro worker no lea un archivo a medias
+        descriptor, temporal = tempfile.mkstemp(dir=self.directorio, prefix=_PREFIJO_TEMPORAL)
+        with os.fdopen(descriptor, "wb") as archivo:
+            archivo.write(_serializar(valor, time.time() + ttl if ttl else None))
+        os.replace(temporal, self._ruta(clave))
+        if ttl:
+            with self._lock:
+                self._escrituras += 1
+                podar = self._escrituras % self.intervalo == 0
+            if podar:
+                self.podar()
+
+    def delete(self, clave):
+        _borrar(self._ruta(clave))
+
+    def _expira(self, ruta):
+        try:
+            with open(ruta, "rb") as archivo:
+                return json.loads(archivo.readline())["expira"]
+        except (OSError, ValueError, KeyError):
+            return 0  # ilegible: se trata como vencida
+
+    def podar(self):
+        """Borra las entradas vencidas y las mas viejas por encima de max_entradas."""
+        ahora = time.time()
+        vigentes = []
+        for entrada in os.scandir(self.directorio):
+            if entrada.name.startswith(_PREFIJO_TEMPORAL):
+                # Temporales de un worker que murio a mitad de set()
+                if _edad(entrada, ahora) > 60:
+                    _borrar(entrada.path)
+                continue
+            if not _PATRON_ENTRADA.match(entrada.name):
+                continue  # candados de incr()
+            expira = self._expira(entrada.path)
+            if expira is None:
+                continue
+            if expira < ahora:
+                _borrar(entrada.path)
+            else:
+                vigentes.append((_edad(entrada, ahora), entrada.path))
+        vigentes.sort(reverse=True)
+        for _, ruta in vigentes[:max(0, len(vigentes) - self.max_entradas)]:
+            _borrar(ruta)
+
+    def incr(self, clave):
+        with open(self._ruta(clave) + ".lock", "a") as candado:
+            fcntl.flock(candado, fcntl.LOCK_EX)
+            valor = (self.get(clave) or 0) + 1
+            self.set(clave, valor)
+            return valor
+
+
+def _edad(entrada, ahora):
+    try:
+        return ahora - entrada.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def _borrar(ruta):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
+
+
+class CacheRespuestas:
+    def __init__(self):
+        self.backend = None
+        self.ttl = 300
+        self.estadisticas = {"hits": 0, "misses": 0, "omitidas": 0, "invalidaciones": 0}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        tipo = app.config.get("CACHE_RESPUESTAS", "memoria")
+        if tipo == "archivo":
+            # Por defecto uno por usuario del sistema; directorio_privado() rechaza uno ajeno
+            directorio = app.config.get("CACHE_DIR") or os.path.join(
+                tempfile.gettempdir(), f"arma_tu_equipo_cache_{os.getuid()}")
+            self.backend = ArchivoLocal(directorio, app.config.get("CACHE_MAX_ENTRADAS", 512))
+        elif tipo == "memoria":
+            self.backend = MemoriaLRU(app.config.get("CACHE_MAX_ENTRADAS", 512))
+        else:
+            self.backend = None  # cache desactivado
+        self.ttl = app.config.get("CACHE_TTL", 300)
+        app.register_blueprint(cache_bp)
+
+    def _contar(self, nombre):
+        with self._lock:
+            self.estadisticas[nombre] += 1
+
+    def version(self, grupo):
+        return self.backend.get(f"version:{grupo}") or 0
+
+    def invalidar(self, grupo):
+        """Sube la version del grupo; las respuestas cacheadas anteriores dejan de usarse."""
+        if self.backend is None:
+            return
+        self.backend.incr(f"version:{grupo}")
+        self._contar("invalidaciones")
+
+    def clave(self, grupo):
+        consulta = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+        return f"resp:{grupo}:v{self.version(grupo)}:{request.path}?{consulta}:anonimo"
+
+    def cachear(self, grupo):
+        """Decorador: cachea la respuesta de la vista para visitantes anonimos."""
+        def decorador(vista):
+            @wraps(vista)
+            def envoltura(*args, **kwargs):
+                # Usuarios con sesion y mensajes flash pendientes ven HTML propio
+                if (self.backend is None or request.method != "GET"
+                        or current_user.is_authenticated or session.get("_flashes")):
+                    self._contar("omitidas")
+                    return vista(*args, **kwargs)
+
+                clave = self.clave(grupo)
+                guardada = self.backend.get(clave)
+                if guardada is not None:
+                    self._contar("hits")
+                    cuerpo, mimetype = guardada
+                    respuesta = Response(cuerpo, mimetype=mimetype)
+                    respuesta.headers["X-Cache"] = "HIT"
+                    return respuesta
+
+                self._contar("misses")
+                respuesta = current_app.make_response(vista(*args, **kwargs))
+                if respuesta.status_code == 200 and not respuesta.direct_passthrough:
+                    self.backend.set(clave, (respuesta.get_data(), respuesta.mimetype), self.ttl)
+                respuesta.headers["X-Cache"] = "MISS"
+                return respuesta
+            return envoltura
+        return decorador
+
+
+cache = CacheRespuestas()
+
+cache_bp = Blueprint("cache", __name__)
+
+
+@cache_bp.route("/cache/estadisticas")
+def estadisticas():
+    from app.fragmentos import fragmentos
+    from app.identidad import identidad
+
+    total = cache.estadisticas["hits"] + cache.estadisticas["misses"]
+    return jsonify(
+        respuestas={
+            **cache.estadisticas,
+            "tasa_aciertos": cache.estadisticas["hits"] / total if total else 0.0,
+            "backend": type(cache.backend).__name__ if cache.backend else None,
+        },
+        identidad=identidad.resumen(),
+        fragmentos=fragmentos.resumen(),
+    )
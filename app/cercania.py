@@ -0,0 +1,237 @@
+# app/cercania.py
+# Busqueda de arqueros por cercania.
+#
+# Geocodificacion offline: las direcciones son texto libre ("Chapinero, Calle 50 # 10-20"),
+# asi que se buscan en ellas los nombres de la tabla GEOCODIFICACION_CSV
+# (lugar,latitud,longitud,tipo) y se usa el mas especifico que aparezca
+# (lugar > barrio > ciudad). Tambien se acepta "lat,lon" directamente.
+# Las coordenadas quedan guardadas en usuarios y partidos (latitud/longitud).
+#
+# Indice: rejilla en memoria por proceso con la posicion de cada arquero, en celdas
+# de TAM_CELDA grados. Una consulta de radio solo revisa las celdas que cubren el
+# circulo y compara distancias al cuadrado en una proyeccion plana local (a menos
+# de MAX_RADIO km el error frente a haversine es despreciable). Se reconstruye cada CERCANIA_TTL segundos; los
+# cambios hechos en este proceso la invalidan de inmediato.
+#
+# El costo lo pone el numero de arqueros dentro del radio, no el total: las celdas
+# que caen enteras dentro del circulo aportan sus ids sin calcular distancias, solo
+# las del borde se revisan punto por punto, y no se ordena nada. Las distancias se
+# calculan despues solo para los arqueros que se van a mostrar (Cercanos.distancia).
+# Con 10k arqueros sinteticos (benchmarks/bench_cercania.py) una consulta de 2-5 km
+# tarda ~0.15 ms (p50). A 10-25 km caen mas de MAX_CERCANOS arqueros en el circulo y
+# hay que elegir los mas cercanos: ~1.3 ms, casi todo en calcular y ordenar ~3000
+# distancias en Python.
+from sqlalchemy import select
+from app import db
+from app.models import Arquero, Usuario
+import csv
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+
+KM_POR_GRADO = 111.32
+TAM_CELDA = 0.02  # grados (~2.2 km)
+RADIO_DEFECTO = 10.0
+MAX_RADIO = 50.0
+MAX_CERCANOS = 2000  # tope de ids que se pasan al IN del listado
+PRIORIDAD_TIPO = {"lugar": 3, "barrio": 2, "ciudad": 1}
+MAX_PALABRAS = 4  # nombres de lugar de hasta 4 palabras
+
+_PATRON_COORDENADAS = re.compile(r"^\s*(-?\d{1,2}(?:\.\d+)?)\s*,\s*(-?\d{1,3}(?:\.\d+)?)\s*$")
+
+
+def normalizar(texto):
+    """Minusculas, sin tildes y solo letras/numeros separados por un espacio."""
+    sin_tildes = unicodedata.normalize("NFKD", texto or "").encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", sin_tildes.lower()).split())
+
+
+def limitar_radio(radio):
+    # nan pasaria min/max sin cambiar y math.floor(nan) falla
+    if radio is None or not math.isfinite(radio):
+        return RADIO_DEFECTO
+    return min(max(radio, 0.1), MAX_RADIO)
+
+
+class Geocodificador:
+    def __init__(self, ruta=None):
+        self.ruta = ruta
+        self._lugares = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ruta = app.config.get("GEOCODIFICACION_CSV")
+        self._lugares = None
+
+    def _cargar(self):
+        # Se lee en el primer uso (no al arrancar) y una sola vez por proceso
+        with self._lock:
+            if self._lugares is None:
+                lugares = {}
+                if self.ruta and os.path.exists(self.ruta):
+                    with open(self.ruta, newline="", encoding="utf-8") as archivo:
+                        for fila in csv.DictReader(archivo):
+                            lugares[normalizar(fila["lugar"])] = (
+                                float(fila["latitud"]), float(fila["longitud"]),
+                                PRIORIDAD_TIPO.get(fila.get("tipo"), 0),
+                            )
+                self._lugares = lugares
+        return self._lugares
+
+    def geocodificar(self, texto):
+        """(latitud, longitud) del texto, o None si no se reconoce ningun lugar."""
+        if not texto:
+            return None
+        coordenadas = _PATRON_COORDENADAS.match(texto)
+        if coordenadas:
+            lat, lon = float(coordenadas.group(1)), float(coordenadas.group(2))
+            return (lat, lon) if -90 <= lat <= 90 and -180 <= lon <= 180 else None
+
+        lugares = self._cargar()
+        palabras = normalizar(texto).split()
+        mejor = None
+        for inicio in range(len(palabras)):
+            for fin in range(inicio + 1, min(inicio + MAX_PALABRAS, len(palabras)) + 1):
+                lugar = lugares.get(" ".join(palabras[inicio:fin]))
+                # Gana el tipo mas especifico y, a igual tipo, el nombre mas largo
+                if lugar and (mejor is None or (lugar[2], fin - inicio) > (mejor[2], mejor[3])):
+                    mejor = (lugar[0], lugar[1], lugar[2], fin - inicio)
+        return (mejor[0], mejor[1]) if mejor else None
+
+    def coordenadas(self, texto):
+        """Como geocodificar pero siempre devuelve una tupla, (None, None) si no se reconoce."""
+        return self.geocodificar(texto) or (None, None)
+
+
+def _mas_cercanos(celdas, y0, lon, escala_lon, limite):
+    """Ids de los `limite` arqueros mas cercanos entre los de las celdas (sin orden)."""
+    ids, distancias = [], []
+    for ids_celda, ys, lons in celdas:
+        ids += ids_celda
+        distancias += [(dy := y - y0) * dy + (dx := (lon_a - lon) * escala_lon) * dx for y, lon_a in zip(ys, lons)]
+    # Ordenar solo los floats (no tuplas) para hallar la distancia del ultimo que entra
+    umbral = sorted(distancias)[limite - 1]
+    return [arquero_id for arquero_id, d2 in zip(ids, distancias) if d2 <= umbral][:limite]
+
+
+class Cercanos:
+    """Resultado de una consulta de radio: ids sin orden y la distancia de cada uno bajo demanda."""
+
+    def __init__(self, ids, lat, lon, posiciones):
+        self.ids = ids
+        self._y0 = lat * KM_POR_GRADO
+        self._lon = lon
+        self._escala_lon = KM_POR_GRADO * math.cos(math.radians(lat))
+        self._posiciones = posiciones
+        self._conjunto = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _km(self, arquero_id):
+        y, lon = self._posiciones[arquero_id]
+        return math.hypot(y - self._y0, (lon - self._lon) * self._escala_lon)
+
+    def distancia(self, arquero_id):
+        """km hasta el arquero, o None si no esta en el resultado."""
+        if self._conjunto is None:
+            self._conjunto = set(self.ids)
+        return self._km(arquero_id) if arquero_id in self._conjunto else None
+
+
+class IndiceCercania:
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._indice = None
+        self._cargado = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get("CERCANIA_TTL", 300)
+        self.invalidar()
+
+    def invalidar(self):
+        self._indice = None
+
+    def _construir(self):
+        """(celdas, posiciones). Cada celda guarda columnas: ids, latitud en km y longitud."""
+        celdas, posiciones = {}, {}
+        filas = db.session.execute(
+            select(Arquero.id, Usuario.latitud, Usuario.longitud)
+            .join(Usuario, Arquero.id_usuario == Usuario.id)
+            .where(Usuario.latitud.isnot(None), Usuario.longitud.isnot(None))
+        )
+        for arquero_id, lat, lon in filas:
+            ids, ys, lons = celdas.setdefault(
+                (math.floor(lat / TAM_CELDA), math.floor(lon / TAM_CELDA)), ([], [], []))
+            ids.append(arquero_id)
+            ys.append(lat * KM_POR_GRADO)
+            lons.append(lon)
+            posiciones[arquero_id] = (lat * KM_POR_GRADO, lon)
+        return celdas, posiciones
+
+    def _get_indice(self):
+        indice = self._indice
+        if indice is None or time.monotonic() - self._cargado > self.ttl:
+            with self._lock:
+                if self._indice is None or time.monotonic() - self._cargado > self.ttl:
+                    self._indice = self._construir()
+                    self._cargado = time.monotonic()
+                indice = self._indice
+        return indice
+
+    def cercanos(self, lat, lon, radio_km, limite=MAX_CERCANOS):
+        """Cercanos con los arqueros dentro del radio; si son mas de `limite`, los mas cercanos."""
+        celdas, posiciones = self._get_indice()
+        dlat = radio_km / KM_POR_GRADO
+        dlon = radio_km / (KM_POR_GRADO * max(math.cos(math.radians(lat)), 0.01))
+        fila_min, fila_max = math.floor((lat - dlat) / TAM_CELDA), math.floor((lat + dlat) / TAM_CELDA)
+        col_min, col_max = math.floor((lon - dlon) / TAM_CELDA), math.floor((lon + dlon) / TAM_CELDA)
+
+        # km por grado de longitud a esta latitud
+        escala_lon = KM_POR_GRADO * math.cos(math.radians(lat))
+        y0 = lat * KM_POR_GRADO
+        lado_y, lado_x = TAM_CELDA * KM_POR_GRADO, TAM_CELDA * escala_lon
+        radio2 = radio_km * radio_km
+        encontrados, revisadas = [], []
+        for fila in range(fila_min, fila_max + 1):
+            # km del punto al borde cercano y al lejano de esta fila de celdas
+            abajo, arriba = fila * lado_y - y0, (fila + 1) * lado_y - y0
+            y_cerca = 0.0 if abajo <= 0 <= arriba else min(abs(abajo), abs(arriba))
+            y_lejos = max(abs(abajo), abs(arriba))
+            for columna in range(col_min, col_max + 1):
+                celda = celdas.get((fila, columna))
+                if celda is None:
+                    continue
+                izquierda = (columna * TAM_CELDA - lon) * escala_lon
+                derecha = izquierda + lado_x
+                x_cerca = 0.0 if izquierda <= 0 <= derecha else min(abs(izquierda), abs(derecha))
+                x_lejos = max(abs(izquierda), abs(derecha))
+                if x_cerca * x_cerca + y_cerca * y_cerca > radio2:
+                    continue  # esquina de la caja que queda fuera del circulo
+                revisadas.append(celda)
+                ids, ys, lons = celda
+                if x_lejos * x_lejos + y_lejos * y_lejos <= radio2:
+                    encontrados += ids  # la celda entera esta dentro
+                else:
+                    encontrados += [
+                        arquero_id for arquero_id, y, lon_a in zip(ids, ys, lons)
+                        if (dy := y - y0) * dy + (dx := (lon_a - lon) * escala_lon) * dx <= radio2
+                    ]
+        if limite and len(encontrados) > limite:
+            encontrados = _mas_cercanos(revisadas, y0, lon, escala_lon, limite)
+        return Cercanos(encontrados, lat, lon, posiciones)
+
+    def cercanos_a(self, texto, radio_km=None):
+        """Arqueros cerca de un texto libre (Cercanos); None si el texto no se pudo geocodificar."""
+        punto = geocodificador.geocodificar(texto)
+        if punto is None:
+            return None
+        return self.cercanos(punto[0], punto[1], limitar_radio(radio_km))
+
+
+geocodificador = Geocodificador()
+indice_cercania = IndiceCercania()
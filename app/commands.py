@@ -0,0 +1,161 @@
+# app/commands.py
+# Comandos de mantenimiento: flask --app run <comando>
+import click
+from sqlalchemy import case, func, select, update
+from app import assets, db, esquema
+from app.models import Arquero, Partido, Usuario
+from app.imagenes import convertir_foto_existente, tiene_nombre_hash
+from app.estadisticas import reconstruir_resumen
+from app import ranking
+from app.cercania import geocodificador
+
+
+@click.command("actualizar-esquema")
+@click.option("--replicas", is_flag=True, help="Tambien las replicas locales (en produccion las copia la principal)")
+def actualizar_esquema(replicas):
+    """Agrega a una base existente las tablas, columnas e indices nuevos (create_all no altera tablas)."""
+    engines = [(None, db.engine)]
+    if replicas:
+        engines += [(clave, engine) for clave, engine in db.engines.items() if clave and clave.startswith("replica_")]
+    for clave, engine in engines:
+        pasos = esquema.actualizar(engine)
+        for paso in pasos:
+            click.echo(f"  + {paso}")
+        click.echo(f"✅ {clave or 'principal'}: {len(pasos)} cambios.")
+
+
+@click.command("backfill-calificaciones")
+def backfill_calificaciones():
+    """Llena suma_calificaciones y num_calificaciones desde los partidos calificados."""
+    resumen = db.session.execute(
+        select(
+            Partido.id_arquero,
+            func.count(Partido.id),
+            func.coalesce(func.sum(Partido.calificacion), 0),
+            func.count(Partido.calificacion),
+        )
+        .where(Partido.calificado.is_(True))
+        .group_by(Partido.id_arquero)
+    ).all()
+    por_arquero = {fila[0]: fila[1:] for fila in resumen}
+
+    filas = []
+    for arquero_id, calificacion_actual in db.session.execute(select(Arquero.id, Arquero.calificacion)):
+        total, suma, con_puntaje = por_arquero.get(arquero_id, (0, 0, 0))
+        # Los partidos calificados antes de guardar el puntaje se aproximan con el promedio actual
+        suma += round((calificacion_actual or 0) * (total - con_puntaje))
+        fila = {"id": arquero_id, "suma_calificaciones": suma, "num_calificaciones": total}
+        if total:
+            fila["calificacion"] = suma / total
+        filas.append(fila)
+
+    if filas:
+        db.session.execute(update(Arquero), filas)
+    db.session.commit()
+    click.echo(f"✅ Calificaciones actualizadas para {len(filas)} arqueros. Corre recalcular-ranking.")
+
+
+@click.command("reconstruir-estadisticas")
+@click.option("--arquero", "id_arquero", type=int, default=None, help="Solo este arquero")
+def reconstruir_estadisticas(id_arquero):
+    """Recalcula la tabla resumen_mensual_arquero desde los partidos."""
+    filas = reconstruir_resumen(id_arquero)
+    click.echo(f"✅ Resumen mensual reconstruido ({filas} filas).")
+
+
+@click.command("convertir-fotos")
+def convertir_fotos():
+    """Renombra las fotos viejas por hash de contenido y genera sus variantes."""
+    convertidas = 0
+    for usuario in Usuario.query.filter(Usuario.foto.isnot(None)):
+        if tiene_nombre_hash(usuario.foto):
+            continue
+        nombre = convertir_foto_existente(usuario.foto)
+        if nombre:
+            usuario.foto = nombre
+            convertidas += 1
+        else:
+            click.echo(f"⚠️  No se encontró {usuario.foto} (usuario {usuario.id})")
+    db.session.commit()
+    click.echo(f"✅ {convertidas} fotos convertidas.")
+
+
+@click.command("construir-assets")
+def construir_assets():
+    """Genera app/static/dist con nombres por hash, copias .gz/.br y banners reducidos."""
+    manifest = assets.construir()
+    click.echo(f"✅ {len(manifest['archivos'])} archivos en app/static/dist.")
+
+
+@click.command("backfill-turnos")
+def backfill_turnos():
+    """Llena partidos.ocupa_turno: NULL para cancelados, True para el resto."""
+    # Con dos partidos activos en el mismo turno el UPDATE violaria uq_partidos_turno_arquero
+    repetidos = db.session.execute(
+        select(Partido.id_arquero, Partido.fecha, Partido.hora, func.count(Partido.id))
+        .where(Partido.estado.is_distinct_from("cancelado"))
+        .group_by(Partido.id_arquero, Partido.fecha, Partido.hora)
+        .having(func.count(Partido.id) > 1)
+    ).all()
+    if repetidos:
+        for id_arquero, fecha, hora, total in repetidos:
+            click.echo(f"⚠️  Arquero {id_arquero}: {total} partidos activos el {fecha} a las {hora:%H:%M}")
+        raise click.ClickException("Cancela los partidos repetidos y vuelve a correr backfill-turnos.")
+    db.session.execute(
+        update(Partido).values(ocupa_turno=case((Partido.estado == "cancelado", None), else_=True))
+    )
+    db.session.commit()
+    click.echo("✅ Turnos actualizados.")
+
+
+@click.command("recalcular-ranking")
+def recalcular_ranking():
+    """Recalcula partidos_confirmados y puntaje_ranking de todos los arqueros."""
+    total = ranking.recalcular()
+    click.echo(f"✅ Ranking recalculado para {total} arqueros.")
+
+
+def _geocodificar_tabla(columna_texto, todos, lote=5000):
+    modelo = columna_texto.class_
+    consulta = select(modelo.id, columna_texto)
+    if not todos:
+        consulta = consulta.where(modelo.latitud.is_(None))
+    resueltos = {}  # muchos textos se repiten (mismo barrio o cancha)
+    filas, ubicadas = [], 0
+    # Se leen todas las filas antes de escribir: no se actualiza mientras se recorre el cursor
+    for fila_id, texto in db.session.execute(consulta).all():
+        if texto not in resueltos:
+            resueltos[texto] = geocodificador.geocodificar(texto)
+        punto = resueltos[texto]
+        if punto is None:
+            continue
+        filas.append({"id": fila_id, "latitud": punto[0], "longitud": punto[1]})
+        if len(filas) >= lote:
+            db.session.execute(update(modelo), filas)
+            ubicadas += len(filas)
+            filas = []
+    if filas:
+        db.session.execute(update(modelo), filas)
+        ubicadas += len(filas)
+    db.session.commit()
+    return ubicadas
+
+
+@click.command("geocodificar")
+@click.option("--todos", is_flag=True, help="Recalcular tambien las filas que ya tienen coordenadas")
+def geocodificar(todos):
+    """Llena latitud/longitud de usuarios y partidos con la tabla GEOCODIFICACION_CSV."""
+    usuarios = _geocodificar_tabla(Usuario.direccion, todos)
+    partidos = _geocodificar_tabla(Partido.ubicacion, todos)
+    click.echo(f"✅ Coordenadas para {usuarios} usuarios y {partidos} partidos.")
+
+
+def register_commands(app):
+    app.cli.add_command(actualizar_esquema)
+    app.cli.add_command(backfill_calificaciones)
+    app.cli.add_command(reconstruir_estadisticas)
+    app.cli.add_command(convertir_fotos)
+    app.cli.add_command(construir_assets)
+    app.cli.add_command(backfill_turnos)
+    app.cli.add_command(recalcular_ranking)
+    app.cli.add_command(geocodificar)
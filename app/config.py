@@ -1,9 +1,109 @@
 import os
 
+
+def _uri_base_datos():
+    """URI de la base principal.
+
+    DATABASE_URL tiene prioridad. Si no existe se arma con DB_ENGINE
+    ("mysql", "postgresql" o "sqlite") y DB_USER/DB_PASSWORD/DB_HOST/DB_NAME.
+    Para sqlite, DB_NAME es la ruta del archivo.
+    """
+    if os.getenv("DATABASE_URL"):
+        return os.getenv("DATABASE_URL")
+
+    motor = os.getenv("DB_ENGINE", "mysql")
+    if motor == "sqlite":
+        return f"sqlite:///{os.getenv('DB_NAME', 'arma_tu_equipo.db')}"
+    drivers = {
+        "mysql": "mysql+mysqlconnector",  # mysql+mysqlconnector://DB_user:BD_pass@BD_host/BD_name
+        "postgresql": "postgresql+psycopg2",
+    }
+    return f"{drivers[motor]}://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}/{os.getenv('DB_NAME')}"
+
+
+def _opciones_engine(uri):
+    """Opciones del pool de conexiones (se aplican a la principal y a las replicas)."""
+    opciones = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+    }
+    # SQLite en memoria usa un pool de una sola conexion que no acepta estos parametros
+    if uri not in ("sqlite://", "sqlite:///:memory:"):
+        opciones.update(
+            pool_size=int(os.getenv("DB_POOL_SIZE", 10)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 20)),
+            pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", 30)),
+        )
+    return opciones
+
+
+def _binds_replicas():
+    """DATABASE_REPLICA_URLS: URIs separadas por coma -> binds replica_0, replica_1, ...
+
+    Para probar en local: DATABASE_URL=sqlite:///primaria.db
+    DATABASE_REPLICA_URLS=sqlite:///replica.db
+    """
+    uris = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+    return {f"replica_{i}": {"url": uri, **_opciones_engine(uri)} for i, uri in enumerate(uris)}
+
+
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY")
-    # mysql+mysqlconnector://DB_user:BD_pass@BD_host/BD_name
-    SQLALCHEMY_DATABASE_URI = (
-        f"mysql+mysqlconnector://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}/{os.getenv('DB_NAME')}"
+    SQLALCHEMY_DATABASE_URI = _uri_base_datos()
+    SQLALCHEMY_ENGINE_OPTIONS = _opciones_engine(SQLALCHEMY_DATABASE_URI)
+    # Las vistas de solo lectura (@solo_lectura) consultan estas replicas
+    SQLALCHEMY_BINDS = _binds_replicas()
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Cache de respuestas para anonimos: "memoria", "archivo" o "" (desactivado)
+    CACHE_RESPUESTAS = os.getenv("CACHE_RESPUESTAS", "memoria")
+    CACHE_DIR = os.getenv("CACHE_DIR")  # solo para "archivo"; debe ser del usuario del proceso
+    CACHE_TTL = int(os.getenv("CACHE_TTL", 300))
+    CACHE_MAX_ENTRADAS = int(os.getenv("CACHE_MAX_ENTRADAS", 512))  # tambien acota "archivo"
+
+    # Tarjetas de arquero renderizadas (0 = desactivado) y bytecode de Jinja ("" = desactivado,
+    # sin definir = directorio privado por usuario que elige Jinja)
+    FRAGMENTOS_MAX_ENTRADAS = int(os.getenv("FRAGMENTOS_MAX_ENTRADAS", 5000))
+    JINJA_CACHE_DIR = os.getenv("JINJA_CACHE_DIR")
+
+    # Busqueda por cercania (app/cercania.py): tabla de lugares y vida del indice en memoria
+    GEOCODIFICACION_CSV = os.getenv(
+        "GEOCODIFICACION_CSV", os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos", "lugares.csv")
     )
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    CERCANIA_TTL = int(os.getenv("CERCANIA_TTL", 300))
+
+    # Cache del usuario autenticado (app/identidad.py)
+    IDENTIDAD_TTL = int(os.getenv("IDENTIDAD_TTL", 60))
+    IDENTIDAD_MAX_ENTRADAS = int(os.getenv("IDENTIDAD_MAX_ENTRADAS", 10000))
+
+    # Hash de contraseñas (app/seguridad.py). El metodo va completo, como queda en el hash;
+    # al cambiarlo, las contraseñas se vuelven a hashear en el siguiente login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", 0)) or None  # None = numero de CPUs
+    HASH_COLA_MAX = int(os.getenv("HASH_COLA_MAX", 16))
+    HASH_TIMEOUT = int(os.getenv("HASH_TIMEOUT", 10))
+
+    # Proxies delante de la app (nginx -> gunicorn en 127.0.0.1): cuantos saltos de
+    # X-Forwarded-For/-Proto se creen. 0 = sin proxy; con 0 detras de un proxy todos los
+    # clientes comparten la IP del proxy (y la cubeta de login por IP)
+    PROXY_SALTOS = int(os.getenv("PROXY_SALTOS", 0))
+
+    # Limite de intentos de login: rafaga permitida y segundos por cada intento nuevo
+    LOGIN_IP_RAFAGA = int(os.getenv("LOGIN_IP_RAFAGA", 20))
+    LOGIN_IP_INTERVALO = float(os.getenv("LOGIN_IP_INTERVALO", 3))
+    LOGIN_CUENTA_RAFAGA = int(os.getenv("LOGIN_CUENTA_RAFAGA", 5))
+    LOGIN_CUENTA_INTERVALO = float(os.getenv("LOGIN_CUENTA_INTERVALO", 60))
+
+    # Ranking bayesiano (app/ranking.py): calificaciones previas (peso y promedio)
+    # y bono por partidos confirmados (maximo y confirmados para la mitad del bono)
+    RANKING_PESO_PREVIO = float(os.getenv("RANKING_PESO_PREVIO", 5))
+    RANKING_PROMEDIO_PREVIO = float(os.getenv("RANKING_PROMEDIO_PREVIO", 3.5))
+    RANKING_BONO_PARTIDOS = float(os.getenv("RANKING_BONO_PARTIDOS", 0.5))
+    RANKING_PARTIDOS_MEDIO = float(os.getenv("RANKING_PARTIDOS_MEDIO", 20))
+
+    # Metricas por peticion y deteccion de N+1 (app/instrumentacion.py)
+    INSTRUMENTACION = os.getenv("INSTRUMENTACION", "0") == "1"
+    PRESUPUESTO_CONSULTAS = int(os.getenv("PRESUPUESTO_CONSULTAS", 30))
+    REPETICIONES_N1 = int(os.getenv("REPETICIONES_N1", 5))
+    # Exceder el presupuesto lanza PresupuestoConsultasExcedido. Sin definir: solo con TESTING
+    INSTRUMENTACION_ESTRICTA = {"1": True, "0": False}.get(os.getenv("INSTRUMENTACION_ESTRICTA"))
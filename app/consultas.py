@@ -0,0 +1,249 @@
+# app/consultas.py
+# Capa de consultas para los listados de arqueros.
+# Carga el usuario en el mismo SELECT (JOIN) y obtiene el numero de partidos
+# con una subconsulta agregada, asi las vistas hacen un numero fijo de consultas
+# sin importar cuantos arqueros haya.
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import joinedload, with_expression
+from app import db
+from app.cercania import indice_cercania
+from app.models import Arquero, Partido, Usuario
+import base64
+import json
+import math
+import time
+
+POR_PAGINA = 12
+CONTEO_TTL = 60  # segundos
+
+# Ordenes disponibles en /arqueros: columna y direccion.
+# Cada una tiene su indice compuesto (columna, id) en models.py
+ORDENES = {
+    "ranking": (Arquero.puntaje_ranking, "desc"),
+    "calificacion": (Arquero.calificacion, "desc"),
+    "precio": (Arquero.precio_por_hora, "asc"),
+    "experiencia": (Arquero.años_tapando, "desc"),
+}
+ORDEN_DEFECTO = "ranking"
+
+_cache_conteo = {}
+
+
+def _conteo_partidos():
+    return (
+        select(func.count(Partido.id))
+        .where(Partido.id_arquero == Arquero.id)
+        .correlate(Arquero)
+        .scalar_subquery()
+    )
+
+
+def query_arqueros():
+    """Query base de arqueros con usuario precargado y total_partidos.
+
+    populate_existing: el usuario autenticado (y su arquero) entra a la sesion desde
+    el cache de identidad (app/identidad.py) y puede estar viejo; sin esto la fila
+    leida se descartaria y las paginas publicas mostrarian esa copia.
+    """
+    return Arquero.query.options(
+        joinedload(Arquero.usuario),
+        with_expression(Arquero.total_partidos, _conteo_partidos()),
+    ).execution_options(populate_existing=True)
+
+
+def mejores_arqueros(limite):
+    """Top por puntaje_ranking: recorre el indice (puntaje_ranking, id) y corta en `limite`."""
+    return (
+        query_arqueros()
+        .order_by(Arquero.puntaje_ranking.desc(), Arquero.id.desc())
+        .limit(limite)
+        .all()
+    )
+
+
+def obtener_arquero_or_404(arquero_id):
+    return query_arqueros().filter(Arquero.id == arquero_id).first_or_404()
+
+
+# ---------- Listado paginado (keyset) ----------
+
+MAX_ENTERO = 2 ** 63 - 1  # BIGINT: un entero mayor desborda el parametro (OverflowError en SQLite)
+
+
+def entero_acotado(texto):
+    """int para request.args.get(type=...): fuera del rango de 64 bits cuenta como invalido."""
+    numero = int(texto)
+    if not -MAX_ENTERO - 1 <= numero <= MAX_ENTERO:
+        raise ValueError(texto)
+    return numero
+
+
+def numero_finito(texto):
+    """float para request.args.get(type=...): "nan" e "inf" cuentan como invalidos."""
+    numero = float(texto)
+    if not math.isfinite(numero):
+        raise ValueError(texto)
+    return numero
+
+
+def filtros_desde_args(args):
+    """Lee los filtros de /arqueros desde request.args, ignorando valores invalidos."""
+    return {
+        "precio_min": args.get("precio_min", type=numero_finito),
+        "precio_max": args.get("precio_max", type=numero_finito),
+        "calificacion_min": args.get("calificacion_min", type=numero_finito),
+        "años_min": args.get("años_min", type=entero_acotado),
+        "cerca": (args.get("cerca") or "").strip() or None,
+        "radio": args.get("radio", type=numero_finito),
+    }
+
+
+def _condiciones(filtros):
+    condiciones = []
+    if filtros.get("precio_min") is not None:
+        condiciones.append(Arquero.precio_por_hora >= filtros["precio_min"])
+    if filtros.get("precio_max") is not None:
+        condiciones.append(Arquero.precio_por_hora <= filtros["precio_max"])
+    if filtros.get("calificacion_min") is not None:
+        condiciones.append(Arquero.calificacion >= filtros["calificacion_min"])
+    if filtros.get("años_min") is not None:
+        condiciones.append(Arquero.años_tapando >= filtros["años_min"])
+    if filtros.get("cerca"):
+        # Los ids salen del indice en memoria; si el lugar no se reconoce no hay resultados
+        cercanos = indice_cercania.cercanos_a(filtros["cerca"], filtros.get("radio"))
+        condiciones.append(Arquero.id.in_(cercanos.ids if cercanos else []))
+    return condiciones
+
+
+def codificar_cursor(valor, arquero_id):
+    crudo = json.dumps([valor, arquero_id]).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor):
+    """Devuelve (valor, id) o None si el cursor no es valido."""
+    if not cursor:
+        return None
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valor, arquero_id = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError):
+        return None
+    # Todas las columnas de ORDENES son numericas: un texto llegaria a la base como
+    # comparacion de tipos distintos (error en PostgreSQL)
+    numero = isinstance(valor, (int, float)) and not isinstance(valor, bool) and math.isfinite(valor)
+    entero = isinstance(arquero_id, int) and not isinstance(arquero_id, bool)
+    # Los enteros de JSON no tienen limite: fuera de 64 bits desbordan el parametro
+    if not (numero and entero) or max(abs(arquero_id), abs(valor)) > MAX_ENTERO:
+        return None
+    return valor, arquero_id
+
+
+def aplicar_pagina(query, filtros, orden=ORDEN_DEFECTO, cursor=None, por_pagina=POR_PAGINA):
+    """Aplica filtros, posicion del cursor, orden y limite (por_pagina + 1) a un Query o Select."""
+    columna, direccion = ORDENES.get(orden, ORDENES[ORDEN_DEFECTO])
+    query = query.filter(*_condiciones(filtros))
+
+    posicion = decodificar_cursor(cursor)
+    if posicion:
+        valor, ultimo_id = posicion
+        if direccion == "desc":
+            query = query.filter(or_(columna < valor, and_(columna == valor, Arquero.id < ultimo_id)))
+        else:
+            query = query.filter(or_(columna > valor, and_(columna == valor, Arquero.id > ultimo_id)))
+
+    if direccion == "desc":
+        query = query.order_by(columna.desc(), Arquero.id.desc())
+    else:
+        query = query.order_by(columna.asc(), Arquero.id.asc())
+
+    # Se pide uno de mas para saber si hay otra pagina
+    return query.limit(por_pagina + 1)
+
+
+def paginar_arqueros(filtros, orden=ORDEN_DEFECTO, cursor=None, por_pagina=POR_PAGINA):
+    """Pagina por cursor: (columna, id) del ultimo arquero de la pagina anterior.
+
+    Devuelve (arqueros, siguiente_cursor). siguiente_cursor es None en la ultima pagina.
+    """
+    columna, _ = ORDENES.get(orden, ORDENES[ORDEN_DEFECTO])
+    arqueros = aplicar_pagina(query_arqueros(), filtros, orden, cursor, por_pagina).all()
+    siguiente = None
+    if len(arqueros) > por_pagina:
+        arqueros = arqueros[:por_pagina]
+        ultimo = arqueros[-1]
+        siguiente = codificar_cursor(getattr(ultimo, columna.key), ultimo.id)
+    return arqueros, siguiente
+
+
+def contar_arqueros(filtros):
+    """COUNT(*) con los filtros dados, cacheado en memoria por CONTEO_TTL segundos."""
+    clave = tuple(sorted(filtros.items()))
+    ahora = time.monotonic()
+    guardado = _cache_conteo.get(clave)
+    if guardado and ahora - guardado[1] < CONTEO_TTL:
+        return guardado[0]
+
+    if {k for k, v in filtros.items() if v is not None} <= {"cerca", "radio"} and filtros.get("cerca"):
+        # Solo cercania: el indice ya tiene el conteo, sin mandar otra vez los ids al IN
+        cercanos = indice_cercania.cercanos_a(filtros["cerca"], filtros.get("radio"))
+        total = len(cercanos) if cercanos else 0
+    else:
+        total = db.session.scalar(
+            select(func.count(Arquero.id)).where(*_condiciones(filtros))
+        )
+    if len(_cache_conteo) > 256:
+        _cache_conteo.clear()
+    _cache_conteo[clave] = (total, ahora)
+    return total
+
+
+# ---------- Buscador de arqueros (agendar) ----------
+
+LIMITE_BUSQUEDA = 10
+
+
+def etiqueta_arquero(nombre, calificacion, distancia_km=None):
+    if calificacion and calificacion > 0:
+        etiqueta = f"{nombre} (★ {calificacion:.1f})"
+    else:
+        etiqueta = f"{nombre} (Sin Calificacion)"
+    if distancia_km is not None:
+        etiqueta += f" - a {distancia_km:.1f} km"
+    return etiqueta
+
+
+def buscar_arqueros(texto, limite=LIMITE_BUSQUEDA, cercanos=None):
+    """Arqueros cuyo nombre o apellido empieza por `texto`.
+
+    Con dos palabras ("ana gom") se busca nombre y apellido por prefijo.
+    Solo usa LIKE 'prefijo%' para aprovechar los indices de usuarios.
+    Si se pasa `cercanos` (Cercanos, ver cercania.py) solo se buscan esos arqueros
+    y el resultado queda ordenado por distancia: el limite se aplica despues de
+    ordenar, asi no se pierden los mas cercanos con peor calificacion.
+    """
+    palabras = (texto or "").split()
+    if not palabras:
+        return []
+    if len(palabras) >= 2:
+        condicion = and_(
+            Usuario.nombre.startswith(palabras[0], autoescape=True),
+            Usuario.apellido.startswith(" ".join(palabras[1:]), autoescape=True),
+        )
+    else:
+        condicion = or_(
+            Usuario.nombre.startswith(palabras[0], autoescape=True),
+            Usuario.apellido.startswith(palabras[0], autoescape=True),
+        )
+    consulta = (
+        select(Arquero.id, Usuario.nombre, Usuario.apellido, Arquero.calificacion, Arquero.precio_por_hora)
+        .join(Usuario, Arquero.id_usuario == Usuario.id)
+        .where(condicion)
+    )
+    if cercanos is None:
+        return db.session.execute(
+            consulta.order_by(Arquero.calificacion.desc(), Arquero.id).limit(limite)
+        ).all()
+
+    filas = db.session.execute(consulta.where(Arquero.id.in_(cercanos.ids))).all()
+    return sorted(filas, key=lambda fila: (cercanos.distancia(fila.id), fila.id))[:limite]
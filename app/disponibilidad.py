@@ -0,0 +1,60 @@
+# app/disponibilidad.py
+# Turnos ocupados y libres de un arquero.
+# Los turnos son de una hora entre HORA_INICIO y HORA_FIN. La consulta recorre el
+# indice (id_arquero, fecha, hora, estado) solo en el rango pedido, asi el costo
+# por dia no depende de cuantos partidos haya jugado el arquero en total.
+from datetime import time, timedelta
+from sqlalchemy import select
+from app import db
+from app.models import Partido
+
+HORA_INICIO = 6
+HORA_FIN = 22  # ultimo turno empieza a las 21:00
+MAX_DIAS = 31
+MAX_ADELANTO = 365  # desde puede ir de hoy a hoy + MAX_ADELANTO dias
+
+TURNOS = [time(h) for h in range(HORA_INICIO, HORA_FIN)]
+
+
+def turno_de(hora):
+    """Turno (hora en punto) al que pertenece una hora de partido."""
+    return time(hora.hour)
+
+
+def fuera_de_ventana(desde, hoy):
+    """True si `desde` no esta entre hoy y hoy + MAX_ADELANTO dias."""
+    return not hoy <= desde <= hoy + timedelta(days=MAX_ADELANTO)
+
+
+def disponibilidad(arquero_id, desde, hasta):
+    """Lista por dia con los turnos ocupados y libres entre desde y hasta (inclusive).
+
+    `desde` debe estar en la ventana (ver fuera_de_ventana): el rango se calcula
+    sumando dias y una fecha cerca de date.max desborda.
+    """
+    hasta = min(hasta, desde + timedelta(days=MAX_DIAS - 1))
+    ocupados = {}
+    filas = db.session.execute(
+        select(Partido.fecha, Partido.hora, Partido.estado)
+        .where(
+            Partido.id_arquero == arquero_id,
+            Partido.fecha >= desde,
+            Partido.fecha <= hasta,
+            Partido.ocupa_turno == True,  # noqa: E712 (igualdad para usar el indice)
+        )
+        .order_by(Partido.fecha, Partido.hora)
+    )
+    for fila in filas:
+        ocupados.setdefault(fila.fecha, {})[turno_de(fila.hora)] = fila.estado
+
+    dias = []
+    dia = desde
+    while dia <= hasta:
+        del_dia = ocupados.get(dia, {})
+        dias.append({
+            "fecha": dia.isoformat(),
+            "ocupados": [{"hora": t.strftime("%H:%M"), "estado": e} for t, e in sorted(del_dia.items())],
+            "libres": [t.strftime("%H:%M") for t in TURNOS if t not in del_dia],
+        })
+        dia += timedelta(days=1)
+    return dias
@@ -0,0 +1,111 @@
+# app/esquema.py
+# Actualizacion de una base creada con una version anterior de los modelos.
+#
+# db.create_all() crea las tablas que faltan pero no altera las que ya existen.
+# actualizar() compara cada tabla de los modelos con la base (Inspector) y agrega
+# lo que falta: tablas, columnas, indices y restricciones UNIQUE. Se puede correr
+# varias veces: solo hace lo que aun no esta.
+#
+# - Las columnas NOT NULL se agregan con su default como DEFAULT de la base, asi
+#   las filas existentes quedan con un valor valido.
+# - Las UNIQUE se crean como indice UNIQUE con el mismo nombre (SQLite no acepta
+#   ADD CONSTRAINT y el efecto es el mismo).
+# - Una columna que paso a NOT NULL se llena con su default donde era NULL; en
+#   SQLite la restriccion no se puede agregar a una tabla existente y queda igual.
+#
+# Los valores de las columnas nuevas se calculan despues con los comandos de
+# backfill (ver README).
+from sqlalchemy import UniqueConstraint, inspect, literal, text
+from sqlalchemy.schema import CreateColumn
+from app import db
+
+
+def _valor_defecto(columna, dialecto):
+    """SQL literal del default de la columna, o None si no tiene uno fijo."""
+    default = columna.default
+    if default is None or not (default.is_scalar or default.is_callable):
+        return None
+    valor = default.arg(None) if default.is_callable else default.arg
+    if valor is None:
+        return None
+    return str(literal(valor, columna.type).compile(dialect=dialecto, compile_kwargs={"literal_binds": True}))
+
+
+def _agregar_columna(conexion, tabla, columna):
+    dialecto = conexion.dialect
+    ddl = str(CreateColumn(columna).compile(dialect=dialecto))
+    if not columna.nullable:
+        # Las nullable quedan en NULL hasta el backfill; las NOT NULL necesitan un valor
+        defecto = _valor_defecto(columna, dialecto)
+        if defecto is None:
+            ddl = ddl.replace(" NOT NULL", "")
+        else:
+            ddl += f" DEFAULT {defecto}"
+    nombre_tabla = dialecto.identifier_preparer.format_table(tabla)
+    conexion.execute(text(f"ALTER TABLE {nombre_tabla} ADD COLUMN {ddl}"))
+
+
+def _exigir_no_nulo(conexion, tabla, columna):
+    dialecto = conexion.dialect
+    preparador = dialecto.identifier_preparer
+    nombre_tabla, nombre_columna = preparador.format_table(tabla), preparador.format_column(columna)
+    defecto = _valor_defecto(columna, dialecto)
+    if defecto is None:
+        return False
+    llenadas = conexion.execute(
+        text(f"UPDATE {nombre_tabla} SET {nombre_columna} = {defecto} WHERE {nombre_columna} IS NULL")
+    ).rowcount
+    if dialecto.name == "postgresql":
+        conexion.execute(text(f"ALTER TABLE {nombre_tabla} ALTER COLUMN {nombre_columna} SET NOT NULL"))
+    elif dialecto.name == "mysql":
+        ddl = str(CreateColumn(columna).compile(dialect=dialecto))
+        conexion.execute(text(f"ALTER TABLE {nombre_tabla} MODIFY {ddl}"))
+    else:
+        return llenadas > 0  # SQLite: la columna sigue aceptando NULL
+    return True
+
+
+def _crear_unique(conexion, tabla, restriccion):
+    preparador = conexion.dialect.identifier_preparer
+    columnas = ", ".join(preparador.format_column(c) for c in restriccion.columns)
+    conexion.execute(text(
+        f"CREATE UNIQUE INDEX {preparador.quote(restriccion.name)} "
+        f"ON {preparador.format_table(tabla)} ({columnas})"
+    ))
+
+
+def actualizar(engine):
+    """Agrega a la base lo que le falta respecto de los modelos. Devuelve los pasos hechos."""
+    pasos = []
+    with engine.begin() as conexion:
+        inspector = inspect(conexion)
+        existentes = set(inspector.get_table_names())
+        nuevas = [t for t in db.metadata.sorted_tables if t.name not in existentes]
+        if nuevas:
+            db.metadata.create_all(conexion, tables=nuevas)
+            pasos += [f"tabla {t.name}" for t in nuevas]
+
+        for tabla in db.metadata.sorted_tables:
+            if tabla.name not in existentes:
+                continue
+            columnas = {c["name"]: c for c in inspector.get_columns(tabla.name)}
+            for columna in tabla.columns:
+                if columna.name not in columnas:
+                    _agregar_columna(conexion, tabla, columna)
+                    pasos.append(f"columna {tabla.name}.{columna.name}")
+                elif not columna.nullable and columnas[columna.name]["nullable"]:
+                    if _exigir_no_nulo(conexion, tabla, columna):
+                        pasos.append(f"NOT NULL {tabla.name}.{columna.name}")
+
+            nombres = {i["name"] for i in inspector.get_indexes(tabla.name)}
+            nombres |= {u["name"] for u in inspector.get_unique_constraints(tabla.name)}
+            for indice in tabla.indexes:
+                if indice.name not in nombres:
+                    indice.create(conexion)
+                    pasos.append(f"indice {indice.name}")
+            for restriccion in tabla.constraints:
+                if (isinstance(restriccion, UniqueConstraint) and restriccion.name
+                        and restriccion.name not in nombres):
+                    _crear_unique(conexion, tabla, restriccion)
+                    pasos.append(f"unique {restriccion.name}")
+    return pasos
@@ -0,0 +1,124 @@
+# app/estadisticas.py
+# Mantiene la tabla resumen_mensual_arquero: por cada arquero y mes guarda
+# cuantos partidos hay en cada estado y los ingresos confirmados.
+# Se actualiza de forma incremental al agendar o cambiar el estado de un partido,
+# asi /estadisticas_arquero solo lee unas pocas filas.
+from sqlalchemy import case, delete, extract, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import Partido, ResumenMensual
+
+# estado del partido -> columna del resumen
+COLUMNAS_ESTADO = {
+    "pendiente": "pendientes",
+    "confirmado": "confirmados",
+    "cancelado": "cancelados",
+}
+
+
+def _ajustar(id_arquero, fecha, deltas):
+    """Suma deltas ({columna: valor}) a la fila del mes, creandola si no existe."""
+    if not deltas:
+        return
+    condicion = (
+        ResumenMensual.id_arquero == id_arquero,
+        ResumenMensual.anio == fecha.year,
+        ResumenMensual.mes == fecha.month,
+    )
+    valores = {col: getattr(ResumenMensual, col) + delta for col, delta in deltas.items()}
+    sentencia = update(ResumenMensual).where(*condicion).values(valores).execution_options(synchronize_session=False)
+
+    if db.session.execute(sentencia).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            ceros = {"confirmados": 0, "cancelados": 0, "pendientes": 0, "ingresos": 0.0}
+            db.session.execute(insert(ResumenMensual).values(
+                id_arquero=id_arquero, anio=fecha.year, mes=fecha.month, **{**ceros, **deltas},
+            ))
+    except IntegrityError:
+        # Otra peticion creo la fila al mismo tiempo
+        db.session.execute(sentencia)
+
+
+def _deltas(estado, pago, signo):
+    columna = COLUMNAS_ESTADO.get(estado or "pendiente")
+    if columna is None:
+        return {}
+    deltas = {columna: signo}
+    if columna == "confirmados":
+        deltas["ingresos"] = signo * (pago or 0)
+    return deltas
+
+
+def registrar_partido_nuevo(partido):
+    """Llamar despues de agregar un partido a la sesion, antes del commit."""
+    _ajustar(partido.id_arquero, partido.fecha, _deltas(partido.estado, partido.pago, 1))
+
+
+def registrar_cambio_estado(partido, estado_anterior, estado_nuevo):
+    """Mueve el partido de la columna del estado anterior a la del nuevo."""
+    if estado_anterior == estado_nuevo:
+        return
+    deltas = _deltas(estado_anterior, partido.pago, -1)
+    for col, delta in _deltas(estado_nuevo, partido.pago, 1).items():
+        deltas[col] = deltas.get(col, 0) + delta
+    _ajustar(partido.id_arquero, partido.fecha, deltas)
+
+
+def registrar_cambios_estado(id_arquero, cambios):
+    """Version por lotes: cambios es una lista de (fecha, pago, estado_anterior, estado_nuevo).
+
+    Acumula los deltas por mes y hace un solo UPDATE (o INSERT) por mes afectado.
+    """
+    por_mes = {}
+    for fecha, pago, anterior, nuevo in cambios:
+        if anterior == nuevo:
+            continue
+        clave = (fecha.year, fecha.month)
+        deltas = por_mes.setdefault(clave, {"fecha": fecha, "deltas": {}})["deltas"]
+        for signo, estado in ((-1, anterior), (1, nuevo)):
+            for col, delta in _deltas(estado, pago, signo).items():
+                deltas[col] = deltas.get(col, 0) + delta
+    for mes in por_mes.values():
+        _ajustar(id_arquero, mes["fecha"], {c: d for c, d in mes["deltas"].items() if d})
+
+
+def reconstruir_resumen(id_arquero=None):
+    """Recalcula el resumen desde la tabla de partidos (todos o de un arquero)."""
+    anio = extract("year", Partido.fecha)
+    mes = extract("month", Partido.fecha)
+    estado = func.coalesce(Partido.estado, "pendiente")
+
+    consulta = (
+        select(
+            Partido.id_arquero,
+            anio,
+            mes,
+            func.sum(case((estado == "confirmado", 1), else_=0)),
+            func.sum(case((estado == "cancelado", 1), else_=0)),
+            func.sum(case((estado == "pendiente", 1), else_=0)),
+            func.sum(case((estado == "confirmado", Partido.pago), else_=0)),
+        )
+        .where(Partido.id_arquero.isnot(None))
+        .group_by(Partido.id_arquero, anio, mes)
+    )
+    borrar = delete(ResumenMensual)
+    if id_arquero is not None:
+        consulta = consulta.where(Partido.id_arquero == id_arquero)
+        borrar = borrar.where(ResumenMensual.id_arquero == id_arquero)
+
+    filas = [
+        {
+            "id_arquero": fila[0], "anio": int(fila[1]), "mes": int(fila[2]),
+            "confirmados": fila[3] or 0, "cancelados": fila[4] or 0,
+            "pendientes": fila[5] or 0, "ingresos": float(fila[6] or 0),
+        }
+        for fila in db.session.execute(consulta)
+    ]
+
+    db.session.execute(borrar)
+    if filas:
+        db.session.execute(insert(ResumenMensual), filas)
+    db.session.commit()
+    return len(filas)
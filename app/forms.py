@@ -1,9 +1,21 @@
 # app/forms.py
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileAllowed
-from wtforms import StringField, PasswordField, SubmitField, IntegerField, FloatField, DateField, SelectField
+from wtforms import StringField, PasswordField, SubmitField, IntegerField, FloatField, DateField, SelectField, HiddenField, TimeField
 from wtforms.validators import DataRequired, Email, EqualTo, ValidationError, Length
-from app.models import Usuario
+from app import db
+from app.models import Usuario, Arquero
+from app.disponibilidad import TURNOS
+from app.imagenes import FotoInvalida, validar_foto
+
+
+def _validar_foto(foto):
+    # Solo la cabecera: la imagen se decodifica en segundo plano (ver app/imagenes.py)
+    if foto.data:
+        try:
+            validar_foto(foto.data)
+        except FotoInvalida as error:
+            raise ValidationError(str(error))
 
 
 class LoginForm(FlaskForm):
@@ -37,14 +49,36 @@ class RegisterForm(FlaskForm):
         usuario = Usuario.query.filter_by(correo=correo.data).first()
         if usuario:
             raise ValidationError("El correo ya está registrado")
+
+    def validate_foto(self, foto):
+        _validar_foto(foto)
         
 class PartidoForm(FlaskForm):
     fecha = DateField("Fecha", validators=[DataRequired()])
-    hora = StringField("Hora", validators=[DataRequired()])
+    hora = TimeField("Hora", validators=[DataRequired()])
     ubicacion = StringField("Ubicación", validators=[DataRequired()])
-    id_arquero = SelectField("Arquero", coerce=int, validators=[DataRequired()])
+    # El arquero se elige con el buscador (/api/arqueros/buscar); aqui solo llega el id
+    buscar_arquero = StringField("Arquero")
+    id_arquero = HiddenField("Arquero", validators=[DataRequired(message="Selecciona un arquero")])
     submit = SubmitField("Agendar partido")
 
+    def validate_hora(self, hora):
+        # Los turnos son de una hora en punto: la restriccion UNIQUE compara la hora
+        # exacta, asi que 10:00 y 10:30 serian dos reservas del mismo turno
+        if hora.data not in TURNOS:
+            raise ValidationError(
+                f"Elige una hora en punto entre {TURNOS[0]:%H:%M} y {TURNOS[-1]:%H:%M}")
+
+    def validate_id_arquero(self, id_arquero):
+        try:
+            arquero_id = int(id_arquero.data)
+        except (TypeError, ValueError):
+            raise ValidationError("Selecciona un arquero de la lista")
+        # Una sola consulta por llave primaria; la vista reutiliza self.arquero
+        self.arquero = db.session.get(Arquero, arquero_id)
+        if self.arquero is None:
+            raise ValidationError("El arquero seleccionado no existe")
+
 
 class EditProfileForm(FlaskForm):
     nombre = StringField("Nombre", validators=[DataRequired(), Length(min=2, max=50)])
@@ -56,3 +90,6 @@ class EditProfileForm(FlaskForm):
     años_tapando = IntegerField("Años tapando")
     precio_por_hora = FloatField("Precio por hora")
     submit = SubmitField("Actualizar perfil")
+
+    def validate_foto(self, foto):
+        _validar_foto(foto)
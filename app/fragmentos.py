@@ -0,0 +1,77 @@
+# app/fragmentos.py
+# Cache de plantillas.
+#
+# Fragmentos: el HTML de la tarjeta de un arquero se guarda en un LRU por proceso
+# con clave (plantilla, id, version del arquero, version de su usuario, total de
+# partidos y parametros de la tarjeta). Cualquier UPDATE sube la version (ver
+# Versionado en models.py), asi una tarjeta solo se vuelve a renderizar cuando
+# cambian los datos de ese arquero; las entradas viejas salen por LRU.
+#
+# Bytecode: Jinja guarda las plantillas compiladas en JINJA_CACHE_DIR y los
+# workers nuevos las cargan de ahi en vez de compilarlas. Si una plantilla cambia,
+# su checksum cambia y se vuelve a compilar sola. Sin JINJA_CACHE_DIR se usa el
+# directorio por defecto de Jinja (privado del usuario, en el temporal del sistema).
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+from app.cache import MemoriaLRU
+from app.imagenes import foto_lista
+import os
+import threading
+
+# Plantillas de tarjeta disponibles: nombre corto -> archivo
+TARJETAS = {
+    "home": "_tarjeta_home.html",
+    "bento": "_tarjeta_bento.html",
+}
+
+
+def _renderizar(arquero, tarjeta, parametros):
+    plantilla = current_app.jinja_env.get_template(TARJETAS[tarjeta])
+    return Markup(plantilla.render(a=arquero, **parametros))
+
+
+class CacheFragmentos:
+    def __init__(self, max_entradas=5000):
+        self._entradas = MemoriaLRU(max_entradas) if max_entradas else None
+        self._lock = threading.Lock()
+        self.estadisticas = {"hits": 0, "misses": 0}
+
+    def init_app(self, app):
+        max_entradas = app.config.get("FRAGMENTOS_MAX_ENTRADAS", 5000)
+        self._entradas = MemoriaLRU(max_entradas) if max_entradas else None
+        app.add_template_global(self.tarjeta_arquero, "tarjeta_arquero")
+
+        directorio = app.config.get("JINJA_CACHE_DIR")
+        if directorio is None:
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+        elif directorio:
+            os.makedirs(directorio, mode=0o700, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directorio)
+
+    def tarjeta_arquero(self, arquero, tarjeta, **parametros):
+        """HTML de la tarjeta del arquero; `arquero.usuario` debe venir cargado."""
+        if self._entradas is None:
+            return _renderizar(arquero, tarjeta, parametros)
+
+        clave = (
+            tarjeta, arquero.id, arquero.version, arquero.usuario.version,
+            # total_partidos no es columna: crece al agendar sin cambiar la version
+            arquero.total_partidos, tuple(sorted(parametros.items())),
+        )
+        html = self._entradas.get(clave)
+        with self._lock:
+            self.estadisticas["hits" if html is not None else "misses"] += 1
+        if html is None:
+            html = _renderizar(arquero, tarjeta, parametros)
+            # Con las variantes a medio generar la tarjeta apunta a la foto original: no guardarla
+            if foto_lista(arquero.usuario.foto):
+                self._entradas.set(clave, html)
+        return html
+
+    def resumen(self):
+        total = self.estadisticas["hits"] + self.estadisticas["misses"]
+        return {**self.estadisticas, "tasa_aciertos": self.estadisticas["hits"] / total if total else 0.0}
+
+
+fragmentos = CacheFragmentos()
@@ -0,0 +1,138 @@
+# app/historial.py
+# Consultas del historial de partidos confirmados (usuario o arquero).
+# El filtro por estado y fechas, el total y la paginacion se hacen en la base de datos;
+# la exportacion recorre un cursor del lado del servidor para usar memoria constante.
+from datetime import date
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased, joinedload
+from app import db
+from app.models import Arquero, Partido, Usuario
+import csv
+import io
+import json
+
+POR_PAGINA = 20
+MAX_PAGINA = 10_000  # el OFFSET crece con la pagina; mas alla no hay historiales reales
+FILAS_POR_LOTE = 1000
+FILAS_POR_ENVIO = 100  # filas por bloque enviado al cliente
+
+
+def rango_desde_args(args):
+    """Lee ?desde=AAAA-MM-DD&hasta=AAAA-MM-DD, ignorando fechas invalidas."""
+    return args.get("desde", type=date.fromisoformat), args.get("hasta", type=date.fromisoformat)
+
+
+def pagina_desde_args(args):
+    """Lee ?pagina=, entre 1 y MAX_PAGINA (fuera de rango el OFFSET seria negativo o desbordaria)."""
+    return max(1, min(args.get("pagina", 1, type=int), MAX_PAGINA))
+
+
+def _condiciones(columna, valor, desde, hasta):
+    condiciones = [columna == valor, Partido.estado == "confirmado"]
+    if desde:
+        condiciones.append(Partido.fecha >= desde)
+    if hasta:
+        condiciones.append(Partido.fecha <= hasta)
+    return condiciones
+
+
+def _propietario(arquero_id, usuario_id):
+    if arquero_id is not None:
+        return Partido.id_arquero, arquero_id
+    return Partido.id_usuario, usuario_id
+
+
+def totales(desde=None, hasta=None, arquero_id=None, usuario_id=None):
+    """(cantidad, suma de pagos) de los partidos confirmados en el rango."""
+    columna, valor = _propietario(arquero_id, usuario_id)
+    cantidad, suma = db.session.execute(
+        select(func.count(Partido.id), func.coalesce(func.sum(Partido.pago), 0))
+        .where(*_condiciones(columna, valor, desde, hasta))
+    ).one()
+    return cantidad, suma
+
+
+def paginar(pagina=1, desde=None, hasta=None, arquero_id=None, usuario_id=None):
+    columna, valor = _propietario(arquero_id, usuario_id)
+    if arquero_id is not None:
+        cargar = joinedload(Partido.usuario)
+    else:
+        cargar = joinedload(Partido.arquero).joinedload(Arquero.usuario)
+
+    consulta = (
+        select(Partido)
+        .options(cargar)
+        .where(*_condiciones(columna, valor, desde, hasta))
+        .order_by(Partido.fecha.desc(), Partido.hora.desc(), Partido.id.desc())
+    )
+    # Se pide una fila de mas para saber si hay pagina siguiente (el total viene de totales())
+    pagina = max(1, min(pagina, MAX_PAGINA))
+    partidos = db.session.scalars(
+        consulta.limit(POR_PAGINA + 1).offset((pagina - 1) * POR_PAGINA)
+    ).all()
+    return partidos[:POR_PAGINA], len(partidos) > POR_PAGINA
+
+
+# ---------- Exportacion ----------
+
+COLUMNAS_EXPORTACION = ["fecha", "hora", "ubicacion", "nombre", "apellido", "pago"]
+
+
+def _filas(desde, hasta, arquero_id, usuario_id):
+    """Genera tuplas desde un cursor del servidor, en lotes de FILAS_POR_LOTE."""
+    columna, valor = _propietario(arquero_id, usuario_id)
+    if arquero_id is not None:
+        # El arquero ve quien agendo el partido
+        contraparte = Usuario
+        consulta = select(Partido.fecha, Partido.hora, Partido.ubicacion,
+                          contraparte.nombre, contraparte.apellido, Partido.pago)
+        consulta = consulta.join(contraparte, Partido.id_usuario == contraparte.id)
+    else:
+        # El usuario ve que arquero tuvo
+        contraparte = aliased(Usuario)
+        consulta = (
+            select(Partido.fecha, Partido.hora, Partido.ubicacion,
+                   contraparte.nombre, contraparte.apellido, Partido.pago)
+            .join(Arquero, Partido.id_arquero == Arquero.id)
+            .join(contraparte, Arquero.id_usuario == contraparte.id)
+        )
+    consulta = (
+        consulta.where(*_condiciones(columna, valor, desde, hasta))
+        .order_by(Partido.fecha, Partido.hora, Partido.id)
+        .execution_options(yield_per=FILAS_POR_LOTE)
+    )
+    for fila in db.session.execute(consulta):
+        yield fila
+
+
+def exportar_csv(desde=None, hasta=None, arquero_id=None, usuario_id=None):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    def vaciar():
+        datos = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return datos
+
+    escritor.writerow(COLUMNAS_EXPORTACION)
+    for i, fila in enumerate(_filas(desde, hasta, arquero_id, usuario_id), 1):
+        escritor.writerow([fila.fecha.isoformat(), str(fila.hora), fila.ubicacion,
+                           fila.nombre, fila.apellido, fila.pago])
+        if i % FILAS_POR_ENVIO == 0:
+            yield vaciar()
+    yield vaciar()
+
+
+def exportar_json(desde=None, hasta=None, arquero_id=None, usuario_id=None):
+    """Arreglo JSON emitido elemento por elemento."""
+    yield "["
+    separador = ""
+    for fila in _filas(desde, hasta, arquero_id, usuario_id):
+        registro = dict(zip(COLUMNAS_EXPORTACION, [
+            fila.fecha.isoformat(), str(fila.hora), fila.ubicacion,
+            fila.nombre, fila.apellido, fila.pago,
+        ]))
+        yield separador + json.dumps(registro, ensure_ascii=False)
+        separador = ","
+    yield "]"
@@ -0,0 +1,86 @@
+# app/identidad.py
+# Cache por proceso del usuario autenticado (y su perfil de arquero) para Flask-Login.
+#
+# Se guardan los valores de las columnas, no los objetos ORM: en cada peticion se
+# reconstruyen y se agregan a la sesion como si vinieran de la base de datos, sin
+# hacer SELECT. Las entradas viven IDENTIDAD_TTL segundos; editar_perfil invalida
+# la del usuario en este proceso, los demas workers la ven vieja como mucho TTL segundos.
+# Esa copia queda en el identity map de la sesion: las consultas que muestran datos
+# de arqueros a todos (query_arqueros) usan populate_existing para no servirla.
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from app import db
+from app.cache import MemoriaLRU
+from app.models import Arquero, Usuario
+import threading
+import time
+
+
+def _columnas(objeto):
+    return {c.key: getattr(objeto, c.key) for c in objeto.__table__.columns}
+
+
+def _reconstruir(modelo, datos):
+    objeto = modelo(**datos)
+    make_transient_to_detached(objeto)
+    return objeto
+
+
+class CacheIdentidad:
+    def __init__(self, ttl=60, max_entradas=10000):
+        self.ttl = ttl
+        self._entradas = MemoriaLRU(max_entradas)
+        self._lock = threading.Lock()
+        self.estadisticas = {"hits": 0, "misses": 0, "invalidaciones": 0, "edad_maxima_servida": 0.0}
+
+    def init_app(self, app):
+        self.ttl = app.config.get("IDENTIDAD_TTL", 60)
+        self._entradas = MemoriaLRU(app.config.get("IDENTIDAD_MAX_ENTRADAS", 10000))
+
+    def cargar(self, user_id):
+        entrada = self._entradas.get(user_id)
+        if entrada is None:
+            return self._cargar_de_bd(user_id)
+
+        datos_usuario, datos_arquero, cargado = entrada
+        edad = time.time() - cargado
+        with self._lock:
+            self.estadisticas["hits"] += 1
+            self.estadisticas["edad_maxima_servida"] = max(self.estadisticas["edad_maxima_servida"], edad)
+
+        usuario = _reconstruir(Usuario, datos_usuario)
+        arquero = _reconstruir(Arquero, datos_arquero) if datos_arquero else None
+        # Fijar la relacion sin marcar cambios (no debe generar UPDATE al hacer flush)
+        set_committed_value(usuario, "arquero", arquero)
+        if arquero is not None:
+            set_committed_value(arquero, "usuario", usuario)
+        db.session.add(usuario)
+        return usuario
+
+    def _cargar_de_bd(self, user_id):
+        with self._lock:
+            self.estadisticas["misses"] += 1
+        usuario = db.session.scalar(
+            select(Usuario).options(joinedload(Usuario.arquero)).where(Usuario.id == user_id)
+        )
+        if usuario is not None:
+            datos_arquero = _columnas(usuario.arquero) if usuario.arquero else None
+            self._entradas.set(user_id, (_columnas(usuario), datos_arquero, time.time()), self.ttl)
+        return usuario
+
+    def invalidar(self, user_id):
+        self._entradas.delete(user_id)
+        with self._lock:
+            self.estadisticas["invalidaciones"] += 1
+
+    def resumen(self):
+        total = self.estadisticas["hits"] + self.estadisticas["misses"]
+        return {
+            **self.estadisticas,
+            "tasa_aciertos": self.estadisticas["hits"] / total if total else 0.0,
+            "ttl": self.ttl,  # cota de cuan vieja puede estar una entrada
+        }
+
+
+identidad = CacheIdentidad()
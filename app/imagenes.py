@@ -0,0 +1,244 @@
+# app/imagenes.py
+# Procesamiento de fotos de perfil.
+# La foto original se guarda con el hash de su contenido como nombre (fotos repetidas
+# se guardan una sola vez y la URL nunca queda vieja en cache), re-codificada sin
+# metadatos (EXIF, GPS...), y despues se generan variantes en WebP y JPEG para cada
+# tamaño, tambien sin metadatos. Todo eso decodifica la imagen y corre en segundo
+# plano: la peticion solo lee la cabecera (formato y tamaño, ver MAX_PIXELES) y hasta
+# que esten las variantes se sirve FOTO_PENDIENTE.
+from concurrent.futures import ThreadPoolExecutor
+from flask import url_for
+import hashlib
+import io
+import os
+import re
+import threading
+
+UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "uploads")
+ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "webp"}
+
+# variante -> lado maximo en pixeles
+VARIANTES = {
+    "avatar": 96,
+    "card": 400,
+    "detail": 800,
+}
+FORMATOS = {"webp": "WEBP", "jpg": "JPEG"}
+FORMATOS_ORIGINAL = {"jpg": "JPEG", "jpeg": "JPEG", "png": "PNG", "webp": "WEBP"}
+CALIDAD = 82
+# Una foto de camara de 24 MP pasa; una cabecera que declara mas pixeles se rechaza
+# antes de decodificarla (una "bomba" de pocos KB puede ocupar gigas al abrirla)
+MAX_PIXELES = 25_000_000
+FOTO_PENDIENTE = "img/foto_pendiente.svg"
+
+# Nombres nuevos: <hash>.<ext>; los nombres viejos tienen timestamp y no coinciden
+_PATRON_HASH = re.compile(r"^([0-9a-f]{32})\.(jpg|jpeg|png|webp)$")
+
+_executor = None
+_executor_lock = threading.Lock()
+_listas = set()  # hashes con todas sus variantes ya generadas
+
+
+def _tras_fork():
+    # Los hilos del pool no se copian al hijo; se crea uno nuevo cuando haga falta
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_tras_fork)
+
+
+class FotoInvalida(ValueError):
+    """El archivo no es una imagen que se pueda procesar."""
+
+
+def allowed_file(filename):
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="imagenes")
+        return _executor
+
+
+def _ruta_variante(hash_foto, variante, formato):
+    return os.path.join(UPLOAD_FOLDER, f"{hash_foto}_{variante}.{formato}")
+
+
+def generar_variantes(hash_foto, ruta_original):
+    """Crea todas las variantes de una foto. Seguro de llamar varias veces."""
+    # Pillow se importa aqui: los workers que solo sirven paginas no lo cargan
+    from PIL import Image, ImageOps
+
+    with Image.open(ruta_original) as original:
+        imagen = ImageOps.exif_transpose(original).convert("RGB")
+
+    for variante, lado in VARIANTES.items():
+        copia = imagen.copy()
+        copia.thumbnail((lado, lado), Image.LANCZOS)
+        for formato, formato_pil in FORMATOS.items():
+            destino = _ruta_variante(hash_foto, variante, formato)
+            if os.path.exists(destino):
+                continue
+            # Se escribe a un temporal y se renombra para no servir archivos a medias
+            temporal = f"{destino}.{threading.get_ident()}.tmp"
+            copia.save(temporal, formato_pil, quality=CALIDAD, optimize=True)
+            os.replace(temporal, destino)
+    _listas.add(hash_foto)
+
+
+def _abrir(contenido):
+    """Abre la imagen leyendo solo la cabecera y revisa su tamaño. FotoInvalida si no sirve."""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        imagen = Image.open(io.BytesIO(contenido))
+    except Image.DecompressionBombError:
+        raise FotoInvalida("La imagen es demasiado grande")
+    except (UnidentifiedImageError, OSError):
+        raise FotoInvalida("El archivo no es una imagen válida")
+    ancho, alto = imagen.size
+    if ancho * alto > MAX_PIXELES:
+        imagen.close()
+        raise FotoInvalida(f"La imagen es demasiado grande (máximo {MAX_PIXELES // 1_000_000} megapíxeles)")
+    return imagen
+
+
+def validar_foto(file):
+    """Revisa la foto subida sin decodificarla. FotoInvalida con el motivo si no sirve."""
+    contenido = file.read()
+    file.seek(0)
+    _abrir(contenido).close()
+
+
+def _guardar_sin_metadatos(contenido, ruta, extension):
+    """Escribe la imagen en `ruta` re-codificada, sin EXIF/GPS ni otros metadatos.
+
+    Devuelve False si el contenido no es una imagen valida.
+    """
+    from PIL import Image, ImageOps
+
+    try:
+        with _abrir(contenido) as original:
+            imagen = ImageOps.exif_transpose(original)
+    except (FotoInvalida, OSError):
+        return False
+    formato_pil = FORMATOS_ORIGINAL[extension]
+    if formato_pil == "JPEG" and imagen.mode not in ("RGB", "L"):
+        imagen = imagen.convert("RGB")
+    # Pixeles en una imagen nueva: no arrastra nada de info (exif, xmp, textos PNG)
+    limpia = Image.new(imagen.mode, imagen.size)
+    limpia.paste(imagen)
+    if imagen.mode == "P":
+        limpia.putpalette(imagen.getpalette())
+    temporal = f"{ruta}.{threading.get_ident()}.tmp"
+    limpia.save(temporal, formato_pil, quality=CALIDAD)
+    os.replace(temporal, ruta)
+    return True
+
+
+def _procesar(hash_foto, contenido, ruta, extension):
+    """Tarea de fondo: el original sin metadatos y despues sus variantes."""
+    if not os.path.exists(ruta) and not _guardar_sin_metadatos(contenido, ruta, extension):
+        return
+    generar_variantes(hash_foto, ruta)
+
+
+def guardar_foto(file):
+    """Programa el guardado de la foto subida. Devuelve el nombre para Usuario.foto.
+
+    Devuelve None si no es una imagen aceptable (los formularios ya la revisan con
+    validar_foto y muestran el motivo).
+    """
+    if not file or not allowed_file(file.filename):
+        return None
+    contenido = file.read()
+    try:
+        _abrir(contenido).close()
+    except FotoInvalida:
+        return None
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+    hash_foto = hashlib.sha256(contenido).hexdigest()[:32]
+    extension = file.filename.rsplit(".", 1)[1].lower()
+    nombre = f"{hash_foto}.{extension}"
+    if not _variantes_listas(hash_foto):
+        _get_executor().submit(_procesar, hash_foto, contenido, os.path.join(UPLOAD_FOLDER, nombre), extension)
+    return nombre
+
+
+def convertir_foto_existente(nombre_viejo):
+    """Convierte una foto con nombre viejo (timestamp) al esquema por hash.
+
+    Devuelve el nuevo nombre, o None si el archivo no existe o no es una imagen.
+    """
+    ruta_vieja = os.path.join(UPLOAD_FOLDER, nombre_viejo)
+    if not os.path.exists(ruta_vieja):
+        return None
+    with open(ruta_vieja, "rb") as origen:
+        contenido = origen.read()
+    hash_foto = hashlib.sha256(contenido).hexdigest()[:32]
+    extension = nombre_viejo.rsplit(".", 1)[1].lower()
+    nombre = f"{hash_foto}.{extension}"
+    ruta = os.path.join(UPLOAD_FOLDER, nombre)
+    if not os.path.exists(ruta) and not _guardar_sin_metadatos(contenido, ruta, extension):
+        return None
+    os.remove(ruta_vieja)
+    generar_variantes(hash_foto, ruta)
+    return nombre
+
+
+def tiene_nombre_hash(foto):
+    return bool(_PATRON_HASH.match(foto or ""))
+
+
+def _variantes_listas(hash_foto):
+    if hash_foto in _listas:
+        return True
+    # La ultima variante que se escribe es la mas grande en JPEG
+    ultima = _ruta_variante(hash_foto, list(VARIANTES)[-1], list(FORMATOS)[-1])
+    if os.path.exists(ultima):
+        _listas.add(hash_foto)
+        return True
+    return False
+
+
+# ---------- Helpers para plantillas ----------
+
+def foto_url(foto, variante="card", formato="jpg"):
+    """URL de la variante pedida; FOTO_PENDIENTE si aun no esta lista, la original si es un nombre viejo."""
+    if not foto:
+        return ""
+    coincidencia = _PATRON_HASH.match(foto)
+    if coincidencia:
+        if not _variantes_listas(coincidencia.group(1)):
+            return url_for("static", filename=FOTO_PENDIENTE)
+        return url_for("static", filename=f"uploads/{coincidencia.group(1)}_{variante}.{formato}")
+    return url_for("static", filename="uploads/" + foto)
+
+
+def foto_lista(foto):
+    """False mientras las variantes de una foto nueva se estan generando (foto_url aun da FOTO_PENDIENTE)."""
+    coincidencia = _PATRON_HASH.match(foto or "")
+    return not coincidencia or _variantes_listas(coincidencia.group(1))
+
+
+def foto_srcset(foto, formato="webp"):
+    """srcset con todas las variantes ("url 96w, url 400w, ..."), vacio si no hay variantes."""
+    coincidencia = _PATRON_HASH.match(foto or "")
+    if not coincidencia or not _variantes_listas(coincidencia.group(1)):
+        return ""
+    hash_foto = coincidencia.group(1)
+    return ", ".join(
+        f"{url_for('static', filename=f'uploads/{hash_foto}_{variante}.{formato}')} {lado}w"
+        for variante, lado in VARIANTES.items()
+    )
+
+
+def register_template_helpers(app):
+    app.add_template_global(foto_url)
+    app.add_template_global(foto_srcset)
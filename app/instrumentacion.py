@@ -0,0 +1,182 @@
+# app/instrumentacion.py
+# Metricas por peticion: numero de consultas SQL, tiempo en la base de datos,
+# tiempo de render de plantillas y sentencias repetidas (patron N+1).
+#
+# Se activa con INSTRUMENTACION=1. Si una vista pasa de PRESUPUESTO_CONSULTAS se
+# registra un warning; con INSTRUMENTACION_ESTRICTA (activo por defecto en TESTING)
+# se lanza PresupuestoConsultasExcedido para que el test falle.
+# Los histogramas se publican en formato Prometheus en /metrics.
+from collections import Counter, defaultdict
+from flask import Response, current_app, g, has_request_context, request
+from flask import before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import threading
+import time
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class PresupuestoConsultasExcedido(AssertionError):
+    """La vista hizo mas consultas que PRESUPUESTO_CONSULTAS."""
+
+
+class Histograma:
+    def __init__(self, nombre, ayuda, buckets):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.buckets = buckets
+        self._series = defaultdict(lambda: [[0] * len(buckets), 0.0, 0])  # conteos, suma, total
+        self._lock = threading.Lock()
+
+    def observar(self, endpoint, valor):
+        with self._lock:
+            conteos, _, _ = serie = self._series[endpoint]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    conteos[i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with self._lock:
+            for endpoint, (conteos, suma, total) in sorted(self._series.items()):
+                for limite, conteo in zip(self.buckets, conteos):
+                    lineas.append(f'{self.nombre}_bucket{{endpoint="{endpoint}",le="{limite}"}} {conteo}')
+                lineas.append(f'{self.nombre}_bucket{{endpoint="{endpoint}",le="+Inf"}} {total}')
+                lineas.append(f'{self.nombre}_sum{{endpoint="{endpoint}"}} {suma}')
+                lineas.append(f'{self.nombre}_count{{endpoint="{endpoint}"}} {total}')
+        return lineas
+
+
+class Instrumentacion:
+    def __init__(self):
+        self.activa = False
+        self.presupuesto = 30
+        self.repeticiones_n1 = 5
+        self.duracion = Histograma("http_duracion_segundos", "Duracion de la peticion", BUCKETS_SEGUNDOS)
+        self.consultas = Histograma("sql_consultas_por_peticion", "Consultas SQL por peticion", BUCKETS_CONSULTAS)
+        self.tiempo_bd = Histograma("sql_tiempo_segundos", "Tiempo en la base de datos por peticion", BUCKETS_SEGUNDOS)
+        self.tiempo_render = Histograma("render_tiempo_segundos", "Tiempo de render de plantillas por peticion", BUCKETS_SEGUNDOS)
+        # endpoint -> Counter(sentencia -> veces que aparecio como N+1)
+        self.patrones = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.activa = app.config.get("INSTRUMENTACION", False)
+        if not self.activa:
+            return
+        self.presupuesto = app.config.get("PRESUPUESTO_CONSULTAS", 30)
+        self.repeticiones_n1 = app.config.get("REPETICIONES_N1", 5)
+
+        # Se escucha en la clase Engine para cubrir la principal, las replicas
+        # y los engines que se creen despues de un fork
+        if not event.contains(Engine, "before_cursor_execute", _antes_de_consulta):
+            event.listen(Engine, "before_cursor_execute", _antes_de_consulta)
+            event.listen(Engine, "after_cursor_execute", _despues_de_consulta)
+        before_render_template.connect(_antes_de_render, app)
+        template_rendered.connect(_despues_de_render, app)
+        app.before_request(_iniciar_peticion)
+        app.after_request(self._cerrar_peticion)
+        app.add_url_rule("/metrics", "metricas", self.vista_metricas)
+
+    def _cerrar_peticion(self, respuesta):
+        datos = g.pop("metricas", None)
+        if datos is None:
+            return respuesta
+        endpoint = request.endpoint or "desconocido"
+        duracion = time.perf_counter() - datos["inicio"]
+
+        self.duracion.observar(endpoint, duracion)
+        self.consultas.observar(endpoint, datos["consultas"])
+        self.tiempo_bd.observar(endpoint, datos["tiempo_bd"])
+        self.tiempo_render.observar(endpoint, datos["tiempo_render"])
+
+        repetidas = {s: n for s, n in datos["sentencias"].items() if n >= self.repeticiones_n1}
+        if repetidas:
+            with self._lock:
+                self.patrones[endpoint].update(repetidas.keys())
+            for sentencia, veces in repetidas.items():
+                current_app.logger.warning("Posible N+1 en %s: %d veces %s", endpoint, veces, sentencia[:200])
+
+        respuesta.headers["Server-Timing"] = (
+            f"db;dur={datos['tiempo_bd'] * 1000:.1f}, "
+            f"render;dur={datos['tiempo_render'] * 1000:.1f}, "
+            f"total;dur={duracion * 1000:.1f}"
+        )
+        respuesta.headers["X-Consultas-SQL"] = str(datos["consultas"])
+
+        if datos["consultas"] > self.presupuesto:
+            mensaje = f"{endpoint} hizo {datos['consultas']} consultas (presupuesto: {self.presupuesto})"
+            if _estricta():
+                raise PresupuestoConsultasExcedido(mensaje)
+            current_app.logger.warning(mensaje)
+        return respuesta
+
+    def vista_metricas(self):
+        lineas = []
+        for histograma in (self.duracion, self.consultas, self.tiempo_bd, self.tiempo_render):
+            lineas.extend(histograma.exportar())
+        lineas.append("# HELP sql_patron_n1_total Peticiones en que una sentencia se repitio REPETICIONES_N1 veces o mas")
+        lineas.append("# TYPE sql_patron_n1_total counter")
+        with self._lock:
+            for endpoint, contador in sorted(self.patrones.items()):
+                lineas.append(f'sql_patron_n1_total{{endpoint="{endpoint}"}} {sum(contador.values())}')
+        return Response("\n".join(lineas) + "\n", mimetype="text/plain; version=0.0.4")
+
+
+def _estricta():
+    # Se lee en cada peticion: las pruebas pueden activarlo despues de crear la app
+    estricta = current_app.config.get("INSTRUMENTACION_ESTRICTA")
+    return current_app.testing if estricta is None else estricta
+
+
+def _metricas():
+    if has_request_context():
+        return g.get("metricas")
+    return None
+
+
+def _iniciar_peticion():
+    g.metricas = {
+        "inicio": time.perf_counter(),
+        "consultas": 0,
+        "tiempo_bd": 0.0,
+        "tiempo_render": 0.0,
+        "sentencias": Counter(),
+        "renders": [],
+    }
+
+
+def _antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicio_consulta", []).append(time.perf_counter())
+
+
+def _despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    pila = conn.info.get("inicio_consulta")
+    datos = _metricas()
+    if not pila or datos is None:
+        if pila:
+            pila.pop()
+        return
+    inicio = pila.pop()
+    datos["consultas"] += 1
+    datos["tiempo_bd"] += time.perf_counter() - inicio
+    datos["sentencias"][statement] += 1
+
+
+def _antes_de_render(sender, template, context, **extra):
+    datos = _metricas()
+    if datos is not None:
+        datos["renders"].append(time.perf_counter())
+
+
+def _despues_de_render(sender, template, context, **extra):
+    datos = _metricas()
+    if datos is not None and datos["renders"]:
+        datos["tiempo_render"] += time.perf_counter() - datos["renders"].pop()
+
+
+instrumentacion = Instrumentacion()
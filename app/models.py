@@ -1,9 +1,28 @@
 # app/models.py
 from app import db
 from flask_login import UserMixin
+from sqlalchemy import literal_column
+from datetime import datetime, timezone
 
-class Usuario(UserMixin, db.Model):
+
+def _ahora():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Versionado:
+    """version sube en 1 con cada UPDATE (tambien en los UPDATE masivos) y actualizado
+    guarda la fecha UTC del ultimo cambio. Los usa la API para ETag y Last-Modified."""
+    version = db.Column(db.Integer, nullable=False, default=1, onupdate=literal_column("version") + 1)
+    actualizado = db.Column(db.DateTime, nullable=False, default=_ahora, onupdate=_ahora)
+
+
+class Usuario(UserMixin, Versionado, db.Model):
     __tablename__ = "usuarios"
+    # Buscador de arqueros por prefijo de nombre/apellido
+    __table_args__ = (
+        db.Index("ix_usuarios_nombre_apellido", "nombre", "apellido"),
+        db.Index("ix_usuarios_apellido", "apellido"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(50), nullable=False)
@@ -13,6 +32,9 @@ class Usuario(UserMixin, db.Model):
     contraseña = db.Column(db.String(200), nullable=False)  # encriptada
     fecha_nacimiento = db.Column(db.Date)
     direccion = db.Column(db.String(200))
+    # Coordenadas de la direccion (app/cercania.py); NULL si no se reconocio
+    latitud = db.Column(db.Float)
+    longitud = db.Column(db.Float)
     rol = db.Column(db.String(20), nullable=False)  # "normal" o "arquero"
     foto = db.Column(db.String(200))  # ruta de la foto de perfil
 
@@ -23,14 +45,31 @@ class Usuario(UserMixin, db.Model):
     partidos = db.relationship("Partido", back_populates="usuario")
 
 
-class Arquero(db.Model):
+class Arquero(Versionado, db.Model):
     __tablename__ = "arqueros"
+    # Indices para el listado paginado por cursor de /arqueros (orden, id)
+    __table_args__ = (
+        db.Index("ix_arqueros_calificacion_id", "calificacion", "id"),
+        db.Index("ix_arqueros_precio_id", "precio_por_hora", "id"),
+        db.Index("ix_arqueros_años_id", "años_tapando", "id"),
+        db.Index("ix_arqueros_puntaje_id", "puntaje_ranking", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     id_usuario = db.Column(db.Integer, db.ForeignKey("usuarios.id"), unique=True)
     años_tapando = db.Column(db.Integer, nullable=False)
     precio_por_hora = db.Column(db.Float, nullable=False)
-    calificacion = db.Column(db.Float, default=0.0)
+    # Promedio de calificaciones. Se recalcula en SQL a partir de
+    # suma_calificaciones / num_calificaciones cada vez que se califica.
+    calificacion = db.Column(db.Float, nullable=False, default=0.0)
+    suma_calificaciones = db.Column(db.Integer, nullable=False, default=0)
+    num_calificaciones = db.Column(db.Integer, nullable=False, default=0)
+    # Contador para el ranking y puntaje precalculado (ver app/ranking.py)
+    partidos_confirmados = db.Column(db.Integer, nullable=False, default=0)
+    puntaje_ranking = db.Column(db.Float, nullable=False, default=0.0)
+
+    # Conteo de partidos calculado en SQL (ver app/consultas.py)
+    total_partidos = db.query_expression()
 
     # Relación con usuario
     usuario = db.relationship("Usuario", back_populates="arquero")
@@ -39,8 +78,23 @@ class Arquero(db.Model):
     partidos = db.relationship("Partido", back_populates="arquero")
 
 
-class Partido(db.Model):
+def _ocupa_turno_por_defecto(contexto):
+    return None if contexto.get_current_parameters().get("estado") == "cancelado" else True
+
+
+class Partido(Versionado, db.Model):
     __tablename__ = "partidos"
+    # Historiales: partidos confirmados de un usuario/arquero ordenados por fecha
+    __table_args__ = (
+        db.Index("ix_partidos_usuario_estado_fecha", "id_usuario", "estado", "fecha"),
+        db.Index("ix_partidos_arquero_estado_fecha", "id_arquero", "estado", "fecha"),
+        # Disponibilidad: turnos de un arquero en un rango de fechas
+        db.Index("ix_partidos_agenda", "id_arquero", "fecha", "hora", "estado"),
+        # Un arquero no puede tener dos partidos activos en la misma fecha y hora.
+        # ocupa_turno es NULL en los cancelados y los NULL no chocan en un UNIQUE.
+        # hora siempre es un turno en punto (PartidoForm.validate_hora).
+        db.UniqueConstraint("id_arquero", "fecha", "hora", "ocupa_turno", name="uq_partidos_turno_arquero"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     id_usuario = db.Column(db.Integer, db.ForeignKey("usuarios.id"))
@@ -48,10 +102,32 @@ class Partido(db.Model):
     fecha = db.Column(db.Date, nullable=False)
     hora = db.Column(db.Time, nullable=False)
     ubicacion = db.Column(db.String(200), nullable=False)
+    latitud = db.Column(db.Float)
+    longitud = db.Column(db.Float)
     pago = db.Column(db.Float, nullable=False)
     estado = db.Column(db.String(20), default="pendiente")  # pendiente, confirmado, cancelado
     calificado = db.Column(db.Boolean, default=False)  # si el usuario ya califico al arquero
+    calificacion = db.Column(db.SmallInteger)  # puntaje (1-5) que dio el usuario
+    # True si no esta cancelado, NULL si lo esta. El ORM no inserta un None explicito en
+    # columnas con default (usa el default), por eso el default depende del estado
+    ocupa_turno = db.Column(db.Boolean, default=_ocupa_turno_por_defecto)
 
     # Relaciones
     usuario = db.relationship("Usuario", back_populates="partidos")
-    arquero = db.relationship("Arquero", back_populates="partidos")
\ No newline at end of file
+    arquero = db.relationship("Arquero", back_populates="partidos")
+
+class ResumenMensual(db.Model):
+    """Totales de partidos e ingresos por arquero y mes (ver app/estadisticas.py)."""
+    __tablename__ = "resumen_mensual_arquero"
+    __table_args__ = (
+        db.UniqueConstraint("id_arquero", "anio", "mes", name="uq_resumen_arquero_mes"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    id_arquero = db.Column(db.Integer, db.ForeignKey("arqueros.id"), nullable=False)
+    anio = db.Column(db.Integer, nullable=False)
+    mes = db.Column(db.Integer, nullable=False)
+    confirmados = db.Column(db.Integer, nullable=False, default=0)
+    cancelados = db.Column(db.Integer, nullable=False, default=0)
+    pendientes = db.Column(db.Integer, nullable=False, default=0)
+    ingresos = db.Column(db.Float, nullable=False, default=0.0)  # suma de pagos confirmados
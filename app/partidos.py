@@ -0,0 +1,96 @@
+# app/partidos.py
+# Cambio de estado de varios partidos de un arquero en una sola transaccion.
+#
+# Los contadores (resumen mensual y partidos_confirmados/puntaje_ranking) se ajustan
+# con deltas, asi que solo se cuentan las filas que este UPDATE paso de verdad del
+# estado leido al nuevo: el UPDATE lleva el estado anterior en el WHERE. Si otra
+# peticion (o un doble envio) cambio la fila antes, el UPDATE no la toca y no suma nada.
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.estadisticas import registrar_cambios_estado
+from app.models import Partido
+from app.ranking import ajustar_confirmados, delta_confirmados
+
+ESTADOS = ("pendiente", "confirmado", "cancelado")
+MAX_POR_LOTE = 200
+
+
+def _actualizar(arquero_id, ids, anterior, estado):
+    """Pasa de `anterior` a `estado` los partidos que siguen en `anterior`. Devuelve cuantos cambio."""
+    return db.session.execute(
+        update(Partido)
+        .where(Partido.id.in_(ids), Partido.id_arquero == arquero_id, Partido.estado == anterior)
+        .values(estado=estado, ocupa_turno=None if estado == "cancelado" else True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def _aplicar(arquero_id, grupo, anterior, estado):
+    """Aplica el cambio a un grupo de filas con el mismo estado anterior.
+
+    Devuelve (cambiadas, conflictos). Primero intenta un solo UPDATE; si choca con el
+    UNIQUE de turnos o cambia menos filas de las leidas, sigue fila por fila, cada una
+    en su savepoint, para saber exactamente cuales cambiaron.
+    """
+    if len(grupo) > 1:
+        try:
+            with db.session.begin_nested() as punto:
+                if _actualizar(arquero_id, [f.id for f in grupo], anterior, estado) == len(grupo):
+                    return grupo, []
+                punto.rollback()
+        except IntegrityError:
+            pass
+
+    cambiadas, conflictos = [], []
+    for fila in grupo:
+        try:
+            with db.session.begin_nested():
+                if _actualizar(arquero_id, [fila.id], anterior, estado):
+                    cambiadas.append(fila)
+        except IntegrityError:
+            # Reactivar un cancelado cuyo turno ya ocupa otro partido (o otro del mismo lote)
+            conflictos.append(fila)
+    return cambiadas, conflictos
+
+
+def cambiar_estados(arquero_id, ids, estado):
+    """Pasa los partidos `ids` del arquero a `estado`.
+
+    Devuelve {id: resultado} con resultado "actualizado", "sin_cambio" (ya estaba en
+    ese estado, o otra peticion lo cambio primero), "no_encontrado" (no existe o es
+    de otro arquero) o "conflicto" (al reactivar un cancelado, el turno ya lo ocupa
+    otro partido). No hace commit.
+    Mas de MAX_POR_LOTE ids distintos es ValueError (la vista responde 400).
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_POR_LOTE:
+        raise ValueError(f"Máximo {MAX_POR_LOTE} partidos por lote")
+    # Una consulta: trae solo los que son del arquero (verifica la propiedad). FOR UPDATE
+    # hace esperar a otra peticion sobre los mismos partidos hasta el commit
+    filas = db.session.execute(
+        select(Partido.id, Partido.estado, Partido.fecha, Partido.pago)
+        .where(Partido.id.in_(ids), Partido.id_arquero == arquero_id)
+        .with_for_update()
+    ).all()
+
+    resultados = {i: "no_encontrado" for i in ids}
+    por_anterior = {}
+    for fila in filas:
+        resultados[fila.id] = "sin_cambio"
+        if fila.estado != estado:
+            por_anterior.setdefault(fila.estado, []).append(fila)
+
+    cambiadas = []
+    for anterior, grupo in por_anterior.items():
+        aplicadas, conflictos = _aplicar(arquero_id, grupo, anterior, estado)
+        cambiadas += aplicadas
+        for fila in conflictos:
+            resultados[fila.id] = "conflicto"
+
+    if cambiadas:
+        registrar_cambios_estado(arquero_id, [(f.fecha, f.pago, f.estado, estado) for f in cambiadas])
+        ajustar_confirmados(arquero_id, sum(delta_confirmados(f.estado, estado) for f in cambiadas))
+        for fila in cambiadas:
+            resultados[fila.id] = "actualizado"
+    return resultados
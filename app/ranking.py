@@ -0,0 +1,83 @@
+# app/ranking.py
+# Puntaje de ranking de los arqueros (columna indexada arqueros.puntaje_ranking).
+#
+# El promedio crudo favorece a quien tiene una sola calificacion de 5. Se usa un
+# promedio bayesiano: se suman RANKING_PESO_PREVIO calificaciones "ficticias" de
+# RANKING_PROMEDIO_PREVIO, asi un arquero con pocas calificaciones queda cerca del
+# promedio previo y se acerca a su promedio real a medida que lo califican.
+# A eso se suma un bono por partidos confirmados que satura en RANKING_BONO_PARTIDOS:
+# con RANKING_PARTIDOS_MEDIO confirmados se obtiene la mitad del bono.
+#
+# El puntaje se actualiza en el mismo UPDATE que cambia sus datos (calificar,
+# confirmar o cancelar), asi el top de home y el orden "ranking" solo leen el indice.
+# Si se cambian los parametros hay que correr: flask --app run recalcular-ranking
+from flask import current_app
+from sqlalchemy import Float, cast, func, select, update
+from app import db
+from app.models import Arquero, Partido
+
+
+def _real(valor):
+    # Las columnas son enteras: sin el CAST algunos motores dividen en enteros
+    return valor if isinstance(valor, (int, float)) else cast(valor, Float)
+
+
+def puntaje(suma_calificaciones, num_calificaciones, partidos_confirmados):
+    """Puntaje a partir de los contadores. Sirve con numeros o con columnas (SQL)."""
+    suma_calificaciones = _real(suma_calificaciones)
+    num_calificaciones = _real(num_calificaciones)
+    partidos_confirmados = _real(partidos_confirmados)
+    config = current_app.config
+    peso = float(config["RANKING_PESO_PREVIO"])
+    previo = float(config["RANKING_PROMEDIO_PREVIO"])
+    bono = float(config["RANKING_BONO_PARTIDOS"])
+    medio = float(config["RANKING_PARTIDOS_MEDIO"])
+    return (
+        (peso * previo + suma_calificaciones) / (peso + num_calificaciones)
+        + bono * partidos_confirmados / (medio + partidos_confirmados)
+    )
+
+
+def ajustar_confirmados(id_arquero, delta):
+    """Suma delta a partidos_confirmados y recalcula el puntaje en un solo UPDATE.
+
+    El puntaje va primero: MySQL evalua el SET de izquierda a derecha y debe ver
+    el valor anterior de partidos_confirmados. El delta debe salir de un cambio de
+    estado que el UPDATE del partido aplico de verdad (ver app/partidos.py), no del
+    estado leido antes: si no, un doble envio lo suma dos veces. No hace commit.
+    """
+    if not delta:
+        return
+    db.session.execute(
+        update(Arquero)
+        .where(Arquero.id == id_arquero)
+        .ordered_values(
+            (Arquero.puntaje_ranking,
+             puntaje(Arquero.suma_calificaciones, Arquero.num_calificaciones, Arquero.partidos_confirmados + delta)),
+            (Arquero.partidos_confirmados, Arquero.partidos_confirmados + delta),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def delta_confirmados(estado_anterior, estado_nuevo):
+    return (estado_nuevo == "confirmado") - (estado_anterior == "confirmado")
+
+
+def recalcular():
+    """Recalcula partidos_confirmados desde los partidos y el puntaje de todos los arqueros."""
+    confirmados = (
+        select(func.count(Partido.id))
+        .where(Partido.id_arquero == Arquero.id, Partido.estado == "confirmado")
+        .correlate(Arquero)
+        .scalar_subquery()
+    )
+    db.session.execute(update(Arquero).values(partidos_confirmados=confirmados))
+    resultado = db.session.execute(
+        update(Arquero).values(
+            puntaje_ranking=puntaje(Arquero.suma_calificaciones, Arquero.num_calificaciones,
+                                    Arquero.partidos_confirmados)
+        )
+    )
+    db.session.commit()
+    return resultado.rowcount
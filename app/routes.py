@@ -1,36 +1,72 @@
 # app/routes.py
-from flask import Blueprint, render_template, flash, redirect, url_for, request
+from flask import Blueprint, render_template, flash, redirect, url_for, request, Response, stream_with_context, jsonify
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
 from app.forms import PartidoForm, EditProfileForm
-from app.models import Arquero, Partido
+from app.models import Arquero, Partido, ResumenMensual
+from app import historial
+from app.cache import cache
+from app.basedatos import solo_lectura
+from app.identidad import identidad
+from app.imagenes import guardar_foto
+from app.estadisticas import registrar_partido_nuevo
+from app.ranking import puntaje
+from app.cercania import geocodificador, indice_cercania
+from app.consultas import (
+    mejores_arqueros, obtener_arquero_or_404, filtros_desde_args,
+    paginar_arqueros, contar_arqueros, ORDENES, ORDEN_DEFECTO,
+    buscar_arqueros, etiqueta_arquero, numero_finito, LIMITE_BUSQUEDA,
+)
 from app import db
+from app.disponibilidad import MAX_ADELANTO, disponibilidad, fuera_de_ventana
+from app.partidos import ESTADOS, MAX_POR_LOTE, cambiar_estados
+from sqlalchemy import Float, cast, or_, update
+from sqlalchemy.exc import IntegrityError
+from datetime import date, timedelta
 from collections import Counter
 import calendar
-import os
 
 routes = Blueprint("routes", __name__)
 
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "uploads")
-ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "webp"}
-
-def allowed_file(filename):
-    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
-
 @routes.route("/")
+@solo_lectura
+@cache.cachear("arqueros")
 def home():
-    arqueros = Arquero.query.limit(6).all()
+    arqueros = mejores_arqueros(limite=6)
     return render_template("home.html", arqueros=arqueros)
 
 @routes.route("/arquero/<int:arquero_id>")
+@solo_lectura
+@cache.cachear("arqueros")
 def arquero_detail(arquero_id):
-    arquero = Arquero.query.get_or_404(arquero_id)
+    arquero = obtener_arquero_or_404(arquero_id)
     return render_template("arquero_detail.html", arquero=arquero)
 
 @routes.route("/arqueros")
+@solo_lectura
+@cache.cachear("arqueros")
 def arqueros():
-    arqueros = Arquero.query.all()
-    return render_template("arqueros.html", arqueros=arqueros)
+    filtros = filtros_desde_args(request.args)
+    orden = request.args.get("orden", ORDEN_DEFECTO)
+    if orden not in ORDENES:
+        orden = ORDEN_DEFECTO
+
+    arqueros, siguiente = paginar_arqueros(filtros, orden, request.args.get("cursor"))
+    total = contar_arqueros(filtros)
+
+    # Mantener filtros y orden en el enlace a la siguiente pagina
+    args = {k: v for k, v in filtros.items() if v is not None}
+    siguiente_url = url_for("routes.arqueros", orden=orden, cursor=siguiente, **args) if siguiente else None
+
+    return render_template(
+        "arqueros.html",
+        arqueros=arqueros,
+        total=total,
+        filtros=filtros,
+        orden=orden,
+        siguiente_url=siguiente_url,
+        es_primera_pagina=not request.args.get("cursor"),
+        ubicacion_desconocida=bool(filtros["cerca"]) and geocodificador.geocodificar(filtros["cerca"]) is None,
+    )
 
 @routes.route("/panel")
 @login_required
@@ -49,18 +85,17 @@ def agendar():
         return redirect(url_for("routes.panel"))
 
     form = PartidoForm()
-    choices = []
-    for a in Arquero.query.all():
-        nombre = a.usuario.nombre
-        if a.calificacion > 0:
-            nombre += f" (★ {a.calificacion:.1f})"
-        else:
-            nombre += " (Sin Calificacion)"
-        choices.append((a.id, nombre))
-    form.id_arquero.choices = choices
+
+    # Desde el perfil de un arquero se llega con ?arquero=<id> para preseleccionarlo
+    if request.method == "GET" and request.args.get("arquero", type=int):
+        arquero = db.session.get(Arquero, request.args.get("arquero", type=int))
+        if arquero:
+            form.id_arquero.data = arquero.id
+            nombre = f"{arquero.usuario.nombre} {arquero.usuario.apellido}"
+            form.buscar_arquero.data = etiqueta_arquero(nombre, arquero.calificacion)
 
     if form.validate_on_submit():
-        arquero = Arquero.query.get(form.id_arquero.data)
+        arquero = form.arquero
 
         nuevo_partido = Partido(
             id_usuario=current_user.id,
@@ -69,16 +104,69 @@ def agendar():
             hora=form.hora.data,
             ubicacion=form.ubicacion.data,
             pago=arquero.precio_por_hora,   # se asigna automáticamente
-            estado="pendiente"
+            estado="pendiente",
+            ocupa_turno=True
         )
+        nuevo_partido.latitud, nuevo_partido.longitud = geocodificador.coordenadas(form.ubicacion.data)
         db.session.add(nuevo_partido)
+        try:
+            # La restriccion uq_partidos_turno_arquero rechaza el turno si ya esta tomado,
+            # incluso si dos personas agendan al mismo tiempo
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            flash("El arquero ya tiene un partido en esa fecha y hora. Elige otro turno.", "danger")
+            return render_template("agendar.html", form=form)
+        registrar_partido_nuevo(nuevo_partido)
         db.session.commit()
+        cache.invalidar("arqueros")  # cambia el numero de partidos en las tarjetas
         flash("Partido agendado correctamente.", "success")
         return redirect(url_for("routes.panel"))
 
     return render_template("agendar.html", form=form)
 
 
+@routes.route("/api/arqueros/buscar")
+@solo_lectura
+@login_required
+def api_buscar_arqueros():
+    limite = max(1, min(request.args.get("limite", LIMITE_BUSQUEDA, type=int), 50))
+    # ?cerca=<ubicacion de la cancha>: solo arqueros a menos de ?radio= km, del mas cercano al mas lejano
+    cercanos = None
+    if request.args.get("cerca"):
+        cercanos = indice_cercania.cercanos_a(request.args["cerca"], request.args.get("radio", type=numero_finito))
+    resultados = buscar_arqueros(request.args.get("q", ""), limite, cercanos)
+    if not resultados and cercanos is not None:
+        # Nadie con ese nombre cerca de la cancha: buscar en todos
+        resultados = buscar_arqueros(request.args.get("q", ""), limite)
+    respuesta = []
+    for r in resultados:
+        distancia = cercanos.distancia(r.id) if cercanos is not None else None
+        respuesta.append({
+            "id": r.id,
+            "nombre": r.nombre,
+            "apellido": r.apellido,
+            "calificacion": r.calificacion,
+            "precio_por_hora": r.precio_por_hora,
+            "distancia_km": round(distancia, 1) if distancia is not None else None,
+            "etiqueta": etiqueta_arquero(f"{r.nombre} {r.apellido}", r.calificacion, distancia),
+        })
+    return jsonify(respuesta)
+
+
+@routes.route("/api/arqueros/<int:arquero_id>/disponibilidad")
+@solo_lectura
+def api_disponibilidad(arquero_id):
+    hoy = date.today()
+    desde = request.args.get("desde", type=date.fromisoformat) or hoy
+    if fuera_de_ventana(desde, hoy):
+        return jsonify(error=f"'desde' debe estar entre hoy y dentro de {MAX_ADELANTO} días"), 400
+    hasta = request.args.get("hasta", type=date.fromisoformat) or desde + timedelta(days=6)
+    if hasta < desde:
+        return jsonify(error="'hasta' debe ser posterior a 'desde'"), 400
+    return jsonify(arquero=arquero_id, dias=disponibilidad(arquero_id, desde, hasta))
+
+
 @routes.route("/mis_partidos")
 @login_required
 def mis_partidos():
@@ -117,20 +205,13 @@ def editar_perfil():
         current_user.apellido = form.apellido.data
         current_user.telefono = form.telefono.data
         current_user.direccion = form.direccion.data
+        current_user.latitud, current_user.longitud = geocodificador.coordenadas(form.direccion.data)
 
-        # Manejar la foto de perfil
+        # Manejar la foto de perfil (las variantes se generan en segundo plano)
         if form.foto.data:
-            if not os.path.exists(UPLOAD_FOLDER):
-                os.makedirs(UPLOAD_FOLDER)
-            
-            file = form.foto.data
-            if allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                from datetime import datetime
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                filename = f"{timestamp}_{filename}"
-                file.save(os.path.join(UPLOAD_FOLDER, filename))
-                current_user.foto = filename
+            foto_filename = guardar_foto(form.foto.data)
+            if foto_filename:
+                current_user.foto = foto_filename
 
         # Si es arquero, actualizar datos específicos
         if current_user.rol == "arquero" and current_user.arquero:
@@ -140,6 +221,10 @@ def editar_perfil():
                 current_user.arquero.precio_por_hora = form.precio_por_hora.data
 
         db.session.commit()
+        identidad.invalidar(current_user.id)
+        if current_user.rol == "arquero":
+            cache.invalidar("arqueros")
+            indice_cercania.invalidar()
         flash("Perfil actualizado correctamente.", "success")
         return redirect(url_for("routes.panel"))
 
@@ -167,73 +252,183 @@ def actualizar_estado(partido_id, nuevo_estado):
         flash("No tienes permiso para modificar este partido.", "danger")
         return redirect(url_for("routes.partidos_asignados"))
 
-    # Actualizar estado
-    if nuevo_estado in ["pendiente", "confirmado", "cancelado"]:
-        partido.estado = nuevo_estado
-        db.session.commit()
-        flash(f"Estado del partido actualizado a {nuevo_estado}.", "success")
-    else:
+    if nuevo_estado not in ESTADOS:
         flash("Estado inválido.", "danger")
+        return redirect(url_for("routes.partidos_asignados"))
 
+    # Mismo camino que el lote: el UPDATE lleva el estado anterior, asi un doble envio
+    # o una peticion concurrente no cuenta dos veces el cambio en el resumen y el ranking
+    resultado = cambiar_estados(partido.id_arquero, [partido.id], nuevo_estado)[partido.id]
+    db.session.commit()
+    if resultado == "conflicto":
+        flash("Ya tienes otro partido activo en esa fecha y hora.", "danger")
+        return redirect(url_for("routes.partidos_asignados"))
+    if resultado == "actualizado":
+        cache.invalidar("arqueros")
+    flash(f"Estado del partido actualizado a {nuevo_estado}.", "success")
+    return redirect(url_for("routes.partidos_asignados"))
+
+@routes.route("/actualizar_estados", methods=["POST"])
+@login_required
+def actualizar_estados():
+    """Cambia el estado de varios partidos a la vez.
+
+    Acepta JSON ({"ids": [...], "estado": "confirmado"}) y responde JSON con el
+    resultado de cada id, o el formulario de partidos_asignados (flash + redirect).
+    """
+    es_json = request.is_json
+    if es_json:
+        datos = request.get_json(silent=True)
+        if not isinstance(datos, dict):
+            datos = {}
+        ids, nuevo_estado = datos.get("ids"), datos.get("estado")
+        # En JSON los ids deben ser enteros de verdad: ni "12" ni true
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            ids = None
+    else:
+        ids, nuevo_estado = request.form.getlist("ids"), request.form.get("estado")
+
+    if current_user.rol != "arquero":
+        if es_json:
+            return jsonify(error="Solo los arqueros pueden actualizar estados de partidos."), 403
+        flash("Solo los arqueros pueden actualizar estados de partidos.", "danger")
+        return redirect(url_for("routes.panel"))
+
+    try:
+        ids = [int(i) for i in ids]
+    except (TypeError, ValueError):
+        ids = None
+    if not ids or nuevo_estado not in ESTADOS:
+        if es_json:
+            return jsonify(error="Envía una lista de ids y un estado válido."), 400
+        flash("Selecciona al menos un partido y un estado válido.", "danger")
+        return redirect(url_for("routes.partidos_asignados"))
+    if len(set(ids)) > MAX_POR_LOTE:
+        if es_json:
+            return jsonify(error=f"Máximo {MAX_POR_LOTE} partidos por lote."), 400
+        flash(f"Selecciona como máximo {MAX_POR_LOTE} partidos a la vez.", "danger")
+        return redirect(url_for("routes.partidos_asignados"))
+
+    resultados = cambiar_estados(current_user.arquero.id, ids, nuevo_estado)
+    db.session.commit()
+    if "actualizado" in resultados.values():
+        # Puede haber cambiado partidos_confirmados y con eso el ranking
+        cache.invalidar("arqueros")
+
+    if es_json:
+        return jsonify(estado=nuevo_estado, resultados={str(i): r for i, r in resultados.items()})
+
+    actualizados = sum(1 for r in resultados.values() if r == "actualizado")
+    conflictos = sum(1 for r in resultados.values() if r == "conflicto")
+    flash(f"{actualizados} partidos actualizados a {nuevo_estado}.", "success")
+    if conflictos:
+        flash(f"{conflictos} partidos no se pudieron reactivar: ya tienes otro partido en ese turno.", "warning")
     return redirect(url_for("routes.partidos_asignados"))
 
+
 @routes.route("/historial_usuario")
+@solo_lectura
 @login_required
 def historial_usuario():
     if current_user.rol != "normal":
         flash("Solo los usuarios normales pueden ver su historial.", "danger")
         return redirect(url_for("routes.panel"))
 
-    partidos = [p for p in current_user.partidos if p.estado == "confirmado"]
-    total_gastado = sum(p.pago for p in partidos)
+    desde, hasta = historial.rango_desde_args(request.args)
+    pagina = historial.pagina_desde_args(request.args)
+    cantidad, total_gastado = historial.totales(desde, hasta, usuario_id=current_user.id)
+    partidos, hay_siguiente = historial.paginar(pagina, desde, hasta, usuario_id=current_user.id)
 
-    return render_template("historial_usuario.html", partidos=partidos, total=total_gastado)
+    return render_template(
+        "historial_usuario.html",
+        partidos=partidos,
+        total=total_gastado,
+        cantidad=cantidad,
+        pagina=pagina,
+        hay_siguiente=hay_siguiente,
+        desde=desde,
+        hasta=hasta,
+    )
 
 @routes.route("/historial_arquero")
+@solo_lectura
 @login_required
 def historial_arquero():
     if current_user.rol != "arquero":
         flash("Solo los arqueros pueden ver su historial.", "danger")
         return redirect(url_for("routes.panel"))
 
-    partidos = [p for p in current_user.arquero.partidos if p.estado == "confirmado"]
-    total_ganado = sum(p.pago for p in partidos)
+    desde, hasta = historial.rango_desde_args(request.args)
+    pagina = historial.pagina_desde_args(request.args)
+    arquero_id = current_user.arquero.id
+    cantidad, total_ganado = historial.totales(desde, hasta, arquero_id=arquero_id)
+    partidos, hay_siguiente = historial.paginar(pagina, desde, hasta, arquero_id=arquero_id)
+
+    return render_template(
+        "historial_arquero.html",
+        partidos=partidos,
+        total=total_ganado,
+        cantidad=cantidad,
+        pagina=pagina,
+        hay_siguiente=hay_siguiente,
+        desde=desde,
+        hasta=hasta,
+    )
+
+
+@routes.route("/historial/exportar.<string:formato>")
+@solo_lectura
+@login_required
+def exportar_historial(formato):
+    if formato not in ("csv", "json"):
+        flash("Formato de exportación inválido.", "danger")
+        return redirect(url_for("routes.panel"))
+
+    desde, hasta = historial.rango_desde_args(request.args)
+    if current_user.rol == "arquero":
+        filtro = {"arquero_id": current_user.arquero.id}
+    else:
+        filtro = {"usuario_id": current_user.id}
+
+    if formato == "csv":
+        filas = historial.exportar_csv(desde, hasta, **filtro)
+        mimetype = "text/csv"
+    else:
+        filas = historial.exportar_json(desde, hasta, **filtro)
+        mimetype = "application/json"
 
-    return render_template("historial_arquero.html", partidos=partidos, total=total_ganado)
+    return Response(
+        stream_with_context(filas),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=historial.{formato}"},
+    )
 
 
 @routes.route("/estadisticas_arquero")
+@solo_lectura
 @login_required
 def estadisticas_arquero():
     if current_user.rol != "arquero":
         flash("Solo los arqueros pueden ver estadísticas.", "danger")
         return redirect(url_for("routes.panel"))
 
-    arquero = current_user.arquero
-    partidos = arquero.partidos
-
-    # Total partidos jugados (confirmados)
-    partidos_jugados = [p for p in partidos if p.estado == "confirmado"]
-    total_jugados = len(partidos_jugados)
-    
-    # Total partidos cancelados
-    total_cancelados = len([p for p in partidos if p.estado == "cancelado"])
-    
-    # Total partidos pendientes
-    total_pendientes = len([p for p in partidos if p.estado == "pendiente"])
-    
-    # Ingresos por mes (solo confirmados)
-    ingresos_por_mes = {}
-    for p in partidos_jugados:
-        mes = f"{p.fecha.year}-{p.fecha.month:02d}"
-        ingresos_por_mes[mes] = ingresos_por_mes.get(mes, 0) + p.pago
+    # Una fila por mes, mantenida por app/estadisticas.py
+    resumen = (
+        ResumenMensual.query
+        .filter_by(id_arquero=current_user.arquero.id)
+        .order_by(ResumenMensual.anio, ResumenMensual.mes)
+        .all()
+    )
 
-    # Ordenar por mes
-    meses_ordenados = sorted(ingresos_por_mes.keys())
-    labels = [m.split('-')[1] + '/' + m.split('-')[0][2:] for m in meses_ordenados]
-    data = [ingresos_por_mes[m] for m in meses_ordenados]
+    total_jugados = sum(r.confirmados for r in resumen)
+    total_cancelados = sum(r.cancelados for r in resumen)
+    total_pendientes = sum(r.pendientes for r in resumen)
+    total_ingresos = sum(r.ingresos for r in resumen)
 
-    total_ingresos = sum(p.pago for p in partidos_jugados)
+    # Ingresos por mes (solo meses con partidos confirmados)
+    meses = [r for r in resumen if r.confirmados > 0]
+    labels = [f"{r.mes:02d}/{str(r.anio)[2:]}" for r in meses]
+    data = [r.ingresos for r in meses]
 
     return render_template(
         "estadisticas_arquero.html", 
@@ -272,18 +467,36 @@ def calificar_arquero(partido_id):
         flash("La calificacion debe estar entre 1 y 5.", "danger")
         return redirect(url_for("routes.mis_partidos"))
 
-    arquero = partido.arquero
-
-    if arquero.calificacion == 0:
-        arquero.calificacion = float(calificacion)
-    else:
-        num_partidos = Partido.query.filter_by(id_arquero=arquero.id, estado="confirmado").count()
-        if num_partidos > 0:
-            nueva_calif = ((arquero.calificacion * num_partidos) + calificacion) / (num_partidos + 1)
-            arquero.calificacion = round(nueva_calif, 1)
+    # Marcar el partido como calificado solo si nadie lo hizo antes (evita dobles envios)
+    marcado = db.session.execute(
+        update(Partido)
+        .where(Partido.id == partido.id, or_(Partido.calificado.is_(False), Partido.calificado.is_(None)))
+        .values(calificado=True, calificacion=calificacion)
+        .execution_options(synchronize_session=False)
+    )
+    if marcado.rowcount == 0:
+        db.session.rollback()
+        flash("Ya has calificado este partido.", "warning")
+        return redirect(url_for("routes.mis_partidos"))
 
-    partido.calificado = True
+    # Incremento atomico: el promedio y el puntaje se calculan con los valores anteriores
+    # de la fila (van primero porque MySQL evalua el SET de izquierda a derecha)
+    db.session.execute(
+        update(Arquero)
+        .where(Arquero.id == partido.id_arquero)
+        .ordered_values(
+            (Arquero.calificacion,
+             cast(Arquero.suma_calificaciones + calificacion, Float) / (Arquero.num_calificaciones + 1)),
+            (Arquero.puntaje_ranking,
+             puntaje(Arquero.suma_calificaciones + calificacion, Arquero.num_calificaciones + 1,
+                     Arquero.partidos_confirmados)),
+            (Arquero.suma_calificaciones, Arquero.suma_calificaciones + calificacion),
+            (Arquero.num_calificaciones, Arquero.num_calificaciones + 1),
+        )
+        .execution_options(synchronize_session=False)
+    )
     db.session.commit()
+    cache.invalidar("arqueros")
 
     flash("Gracias por calificar al arquero!", "success")
     return redirect(url_for("routes.mis_partidos"))
\ No newline at end of file
@@ -0,0 +1,125 @@
+# app/seguridad.py
+# Hash de contraseñas fuera del hilo de la peticion y limite de intentos de login.
+#
+# El KDF (scrypt/pbkdf2) es lo mas caro de login y register. Se ejecuta en un pool
+# acotado: si ya hay HASH_WORKERS hashes corriendo y HASH_COLA_MAX esperando, la
+# peticion se rechaza de inmediato (ServicioSaturado) en vez de acumular CPU.
+# Antes de hashear, login consulta dos cubetas de tokens (por IP y por cuenta).
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from werkzeug.security import check_password_hash, generate_password_hash
+import os
+import threading
+import time
+
+# Metodo completo tal como queda guardado en el hash (ver generate_password_hash)
+METODO_DEFECTO = "scrypt:32768:8:1"
+
+
+class ServicioSaturado(Exception):
+    """No hay capacidad para calcular otro hash en este momento."""
+
+
+class PoolHash:
+    def __init__(self, metodo=METODO_DEFECTO, workers=None, cola_max=16, timeout=10):
+        self.configurar(metodo, workers, cola_max, timeout)
+
+    def configurar(self, metodo=METODO_DEFECTO, workers=None, cola_max=16, timeout=10):
+        self.metodo = metodo
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.cola_max = cola_max
+        self._cupos = threading.BoundedSemaphore(self.workers + cola_max)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.configurar(
+            metodo=app.config.get("PASSWORD_HASH_METHOD", METODO_DEFECTO),
+            workers=app.config.get("HASH_WORKERS"),
+            cola_max=app.config.get("HASH_COLA_MAX", 16),
+            timeout=app.config.get("HASH_TIMEOUT", 10),
+        )
+
+    def tras_fork(self):
+        """En el worker hijo: los hilos del padre no existen, se arma un pool nuevo."""
+        self.configurar(self.metodo, self.workers, self.cola_max, self.timeout)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hash")
+            return self._executor
+
+    def _ejecutar(self, funcion, *args):
+        if not self._cupos.acquire(blocking=False):
+            raise ServicioSaturado()
+        try:
+            futuro = self._get_executor().submit(funcion, *args)
+            return futuro.result(timeout=self.timeout)
+        except TimeoutError:
+            raise ServicioSaturado()
+        finally:
+            self._cupos.release()
+
+    def hashear(self, contraseña):
+        return self._ejecutar(generate_password_hash, contraseña, self.metodo)
+
+    def verificar(self, hash_guardado, contraseña):
+        return self._ejecutar(check_password_hash, hash_guardado, contraseña)
+
+    def necesita_rehash(self, hash_guardado):
+        """True si el hash se genero con otro metodo o factor de trabajo."""
+        return hash_guardado.split("$", 1)[0] != self.metodo
+
+
+class CubetaTokens:
+    """Token bucket por clave: `capacidad` intentos seguidos y uno nuevo cada `intervalo` s."""
+
+    def __init__(self, capacidad, intervalo, max_claves=100000):
+        self.capacidad = capacidad
+        self.intervalo = intervalo
+        self.max_claves = max_claves
+        self._cubetas = {}
+        self._lock = threading.Lock()
+
+    def permitir(self, clave):
+        ahora = time.monotonic()
+        with self._lock:
+            tokens, ultimo = self._cubetas.get(clave, (self.capacidad, ahora))
+            tokens = min(self.capacidad, tokens + (ahora - ultimo) / self.intervalo)
+            permitido = tokens >= 1
+            if permitido:
+                tokens -= 1
+            if len(self._cubetas) >= self.max_claves and clave not in self._cubetas:
+                # Las cubetas llenas no aportan informacion: se pueden descartar
+                self._cubetas.clear()
+            self._cubetas[clave] = (tokens, ahora)
+            return permitido
+
+
+class LimitadorLogin:
+    def __init__(self):
+        self.por_ip = CubetaTokens(capacidad=20, intervalo=3)
+        self.por_cuenta = CubetaTokens(capacidad=5, intervalo=60)
+
+    def init_app(self, app):
+        self.por_ip = CubetaTokens(
+            capacidad=app.config.get("LOGIN_IP_RAFAGA", 20),
+            intervalo=app.config.get("LOGIN_IP_INTERVALO", 3),
+        )
+        self.por_cuenta = CubetaTokens(
+            capacidad=app.config.get("LOGIN_CUENTA_RAFAGA", 5),
+            intervalo=app.config.get("LOGIN_CUENTA_INTERVALO", 60),
+        )
+
+    def permitir(self, ip, correo):
+        # Se consultan las dos para que ambas descuenten el intento
+        ip_ok = self.por_ip.permitir(ip)
+        cuenta_ok = self.por_cuenta.permitir((correo or "").strip().lower())
+        return ip_ok and cuenta_ok
+
+
+pool_hash = PoolHash()
+limitador_login = LimitadorLogin()
+
+os.register_at_fork(after_in_child=pool_hash.tras_fork)
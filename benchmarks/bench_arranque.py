@@ -0,0 +1,176 @@
+# benchmarks/bench_arranque.py
+# Mide el arranque de la app: tiempo desde el import hasta la primera respuesta
+# y memoria por worker. Usa un SQLite temporal, asi corre sin red (CI).
+#
+#   python benchmarks/bench_arranque.py --repeticiones 10
+#   python benchmarks/bench_arranque.py --gunicorn --workers 4   # sin y con --preload
+#
+# En modo gunicorn se reporta RSS y PSS (RSS repartiendo las paginas compartidas
+# entre los procesos que las usan) de cada worker; PSS necesita Linux (/proc).
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def memoria_kb(pid="self"):
+    """(RSS, PSS) en kB de un proceso; PSS es None si el sistema no lo expone."""
+    rss = pss = None
+    try:
+        with open(f"/proc/{pid}/status") as archivo:
+            for linea in archivo:
+                if linea.startswith("VmRSS:"):
+                    rss = int(linea.split()[1])
+        with open(f"/proc/{pid}/smaps_rollup") as archivo:
+            for linea in archivo:
+                if linea.startswith("Pss:"):
+                    pss = int(linea.split()[1])
+    except OSError:
+        if pid == "self":
+            import resource
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss, pss
+
+
+def hijo():
+    """Corre en un proceso nuevo: una medicion de arranque en frio."""
+    inicio = time.perf_counter()
+    import app as paquete
+    importado = time.perf_counter()
+    flask_app = paquete.create_app()
+    creado = time.perf_counter()
+
+    with flask_app.app_context():
+        paquete.db.create_all()
+    antes = time.perf_counter()
+    respuesta = flask_app.test_client().get("/")
+    respondido = time.perf_counter()
+    if respuesta.status_code != 200:
+        raise SystemExit(f"/ respondio {respuesta.status_code}")
+
+    print(json.dumps({
+        "import": importado - inicio,
+        "create_app": creado - importado,
+        "primera": respondido - antes,
+        "total": (creado - inicio) + (respondido - antes),
+        "rss_kb": memoria_kb()[0],
+    }))
+
+
+def entorno(base):
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{base}")
+    env.setdefault("SECRET_KEY", "benchmark")
+    env["PYTHONPATH"] = RAIZ
+    return env
+
+
+def en_proceso(args, base):
+    mediciones = []
+    for _ in range(args.repeticiones):
+        salida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--hijo"],
+            env=entorno(base), cwd=RAIZ, capture_output=True, text=True, check=True,
+        )
+        mediciones.append(json.loads(salida.stdout.strip().splitlines()[-1]))
+
+    print(f"{'etapa':<14}{'mediana ms':>12}{'max ms':>10}")
+    for etapa in ("import", "create_app", "primera", "total"):
+        valores = [m[etapa] * 1000 for m in mediciones]
+        print(f"{etapa:<14}{statistics.median(valores):>12.1f}{max(valores):>10.1f}")
+    print(f"RSS tras la primera respuesta: {statistics.median(m['rss_kb'] for m in mediciones) / 1024:.1f} MB")
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def workers_de(pid):
+    hijos = []
+    try:
+        for tarea in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tarea}/children") as archivo:
+                hijos.extend(int(p) for p in archivo.read().split())
+    except OSError:
+        pass
+    return hijos
+
+
+def con_gunicorn(args, base, preload):
+    # Las tablas se crean antes para que ningun worker las cree al arrancar
+    subprocess.run([sys.executable, "create_db.py"], env=entorno(base), cwd=RAIZ,
+                   check=True, capture_output=True)
+    puerto = puerto_libre()
+    env = entorno(base)
+    env.update(GUNICORN_BIND=f"127.0.0.1:{puerto}", GUNICORN_WORKERS=str(args.workers),
+               GUNICORN_PRELOAD="1" if preload else "0")
+
+    inicio = time.perf_counter()
+    maestro = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+                               env=env, cwd=RAIZ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if maestro.poll() is not None:
+                raise SystemExit("gunicorn termino antes de responder")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/", timeout=5) as respuesta:
+                    respuesta.read()
+                break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        primera = time.perf_counter() - inicio
+
+        # Dejar que arranquen todos los workers y que cada uno atienda algo
+        time.sleep(args.espera)
+        for _ in range(args.workers * 4):
+            with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/", timeout=5) as respuesta:
+                respuesta.read()
+
+        memorias = [memoria_kb(pid) for pid in workers_de(maestro.pid)]
+    finally:
+        maestro.terminate()
+        maestro.wait()
+
+    rss = [m[0] for m in memorias if m[0]]
+    pss = [m[1] for m in memorias if m[1]]
+    etiqueta = "--preload" if preload else "sin preload"
+    print(f"{etiqueta:<12}{primera * 1000:>14.0f}{len(memorias):>9}"
+          f"{statistics.mean(rss) / 1024 if rss else float('nan'):>11.1f}"
+          f"{statistics.mean(pss) / 1024 if pss else float('nan'):>11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque y memoria por worker")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--gunicorn", action="store_true", help="levantar gunicorn sin y con --preload")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--espera", type=float, default=2, help="segundos antes de medir memoria")
+    parser.add_argument("--hijo", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        return hijo()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        base = os.path.join(carpeta, "arranque.db")
+        if args.gunicorn:
+            print(f"{'modo':<12}{'1a resp. ms':>14}{'workers':>9}{'RSS MB':>11}{'PSS MB':>11}")
+            con_gunicorn(args, base, preload=False)
+            con_gunicorn(args, base, preload=True)
+        else:
+            en_proceso(args, base)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# benchmarks/bench_cercania.py
+# Mide la consulta "arqueros a menos de N km" del indice en memoria (app/cercania.py)
+# sobre arqueros sinteticos repartidos por los barrios de seed_db.py:
+#
+#   python benchmarks/bench_cercania.py --arqueros 10000 --radios 2,5,10,25
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas de cercania en memoria")
+    parser.add_argument("--arqueros", type=int, default=10000)
+    parser.add_argument("--radios", default="2,5,10,25")
+    parser.add_argument("--repeticiones", type=int, default=2000)
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp()
+    # La configuracion se lee al importar app.config
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(carpeta, 'cercania.db')}")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    from app import create_app, db
+    from app.cercania import geocodificador, indice_cercania
+    from seed_db import BARRIOS, sembrar
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        sembrar(db, usuarios=1, arqueros=args.arqueros, partidos=0)
+
+        inicio = time.perf_counter()
+        indice_cercania.cercanos(0, 0, 1)  # construye el indice
+        print(f"Indice de {args.arqueros} arqueros construido en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+        azar = random.Random(1)
+        centros = [geocodificador.geocodificar(barrio) for barrio in BARRIOS]
+        print(f"{'radio km':>9}{'resultados':>12}{'p50 us':>10}{'p99 us':>10}")
+        for radio in (float(r) for r in args.radios.split(",")):
+            tiempos, resultados = [], []
+            for _ in range(args.repeticiones):
+                lat, lon = azar.choice(centros)
+                lat, lon = lat + azar.uniform(-0.02, 0.02), lon + azar.uniform(-0.02, 0.02)
+                inicio = time.perf_counter()
+                cercanos = indice_cercania.cercanos(lat, lon, radio)
+                tiempos.append(time.perf_counter() - inicio)
+                resultados.append(len(cercanos))
+            tiempos.sort()
+            print(f"{radio:>9.0f}{statistics.mean(resultados):>12.0f}"
+                  f"{tiempos[len(tiempos) // 2] * 1e6:>10.0f}{tiempos[int(len(tiempos) * 0.99)] * 1e6:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
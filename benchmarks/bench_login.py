@@ -0,0 +1,57 @@
+# benchmarks/bench_login.py
+# Mide cuantas verificaciones de contraseña (el costo de un login) por segundo
+# se logran con el pool de app/seguridad.py, en total y por nucleo.
+#
+#   python benchmarks/bench_login.py [--metodo scrypt:32768:8:1] [--segundos 5]
+import argparse
+import os
+import sys
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Importar el paquete ya no construye la app: no hace falta base de datos
+from app import seguridad
+
+
+def medir(metodo, workers, segundos):
+    pool = seguridad.PoolHash(metodo=metodo, workers=workers, cola_max=workers)
+    hash_guardado = pool.hashear("contraseña-de-prueba")
+    completados = 0
+    lock = threading.Lock()
+    fin = time.perf_counter() + segundos
+
+    def cliente():
+        nonlocal completados
+        while time.perf_counter() < fin:
+            assert pool.verificar(hash_guardado, "contraseña-de-prueba")
+            with lock:
+                completados += 1
+
+    # Un cliente por worker: el pool siempre tiene trabajo y nunca se satura
+    hilos = [threading.Thread(target=cliente) for _ in range(workers)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return completados / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metodo", default=seguridad.METODO_DEFECTO)
+    parser.add_argument("--segundos", type=float, default=5)
+    args = parser.parse_args()
+
+    nucleos = os.cpu_count() or 1
+    print(f"Metodo: {args.metodo} | nucleos: {nucleos}")
+    for workers in sorted({1, nucleos}):
+        por_segundo = medir(args.metodo, workers, args.segundos)
+        print(f"workers={workers:>3}  logins/s={por_segundo:8.1f}  logins/s/nucleo={por_segundo / min(workers, nucleos):8.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
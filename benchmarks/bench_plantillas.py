@@ -0,0 +1,96 @@
+# benchmarks/bench_plantillas.py
+# Mide el render de una pagina con muchas tarjetas de arquero y la carga de las
+# plantillas en un worker nuevo, con y sin cache (app/fragmentos.py):
+#
+#   python benchmarks/bench_plantillas.py --tarjetas 1000
+#
+# Tarjetas: "sin cache" incluye la plantilla de la tarjeta en el loop, como antes;
+# "cache fria" es el primer render (llena el LRU) y "cache caliente" los siguientes.
+# Plantillas: compilar todas desde el codigo fuente contra cargarlas del bytecode en disco.
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+def cronometrar(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def reportar(nombre, tiempos):
+    print(f"{nombre:<32}{statistics.median(tiempos) * 1000:>12.2f}{max(tiempos) * 1000:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render de tarjetas y carga de plantillas")
+    parser.add_argument("--tarjetas", type=int, default=1000)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp()
+    # La configuracion se lee al importar app.config
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(carpeta, 'plantillas.db')}")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ["CACHE_RESPUESTAS"] = ""
+    os.environ["JINJA_CACHE_DIR"] = ""
+
+    from jinja2 import Environment, FileSystemBytecodeCache
+    from app import create_app, db
+    from app.consultas import query_arqueros
+    from app.fragmentos import CacheFragmentos
+    from seed_db import sembrar
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        sembrar(db, usuarios=1, arqueros=args.tarjetas, partidos=0)
+
+    print(f"{'':<32}{'mediana ms':>12}{'max ms':>10}")
+    with app.test_request_context("/arqueros"):
+        arqueros = query_arqueros().limit(args.tarjetas).all()
+        entorno = app.jinja_env
+
+        sin_cache = entorno.from_string(
+            '{% for a in arqueros %}{% include "_tarjeta_bento.html" %}{% endfor %}')
+        reportar(f"{len(arqueros)} tarjetas sin cache",
+                 cronometrar(lambda: sin_cache.render(arqueros=arqueros), args.repeticiones))
+
+        con_cache = entorno.from_string(
+            '{% for a in arqueros %}{{ tarjeta(a, "bento", destacado=False) }}{% endfor %}')
+        tiempos_frios = []
+        for _ in range(args.repeticiones):
+            fragmentos = CacheFragmentos(max_entradas=len(arqueros) * 2)
+            tiempos_frios += cronometrar(
+                lambda: con_cache.render(arqueros=arqueros, tarjeta=fragmentos.tarjeta_arquero), 1)
+        reportar(f"{len(arqueros)} tarjetas cache fria", tiempos_frios)
+        reportar(f"{len(arqueros)} tarjetas cache caliente", cronometrar(
+            lambda: con_cache.render(arqueros=arqueros, tarjeta=fragmentos.tarjeta_arquero), args.repeticiones))
+
+    nombres = [n for n in app.jinja_loader.list_templates() if n.endswith(".html")]
+
+    def cargar_todas(bytecode_cache=None):
+        # Un entorno nuevo por vuelta: es lo que ve un worker recien creado
+        nuevo = Environment(loader=app.jinja_loader, autoescape=True, bytecode_cache=bytecode_cache)
+        for nombre in nombres:
+            nuevo.get_template(nombre)
+
+    reportar(f"{len(nombres)} plantillas compiladas", cronometrar(cargar_todas, args.repeticiones))
+    bytecode = FileSystemBytecodeCache(os.path.join(carpeta, "jinja"))
+    os.makedirs(bytecode.directory, exist_ok=True)
+    cargar_todas(bytecode)  # llena el cache en disco
+    reportar(f"{len(nombres)} plantillas desde bytecode",
+             cronometrar(lambda: cargar_todas(bytecode), args.repeticiones))
+
+
+if __name__ == "__main__":
+    main()
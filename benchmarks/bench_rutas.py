@@ -0,0 +1,155 @@
+# benchmarks/bench_rutas.py
+# Recorre las rutas de los blueprints y reporta latencia p50/p99 y consultas SQL
+# por peticion. Por defecto usa el test client de Flask sobre un SQLite local,
+# asi corre sin red (CI):
+#
+#   python benchmarks/bench_rutas.py --sembrar --arqueros 2000 --partidos 200000
+#   python benchmarks/bench_rutas.py --url http://127.0.0.1:8000   # gunicorn local
+#
+# Con --url solo se miden las rutas publicas (no hay sesion) y las consultas
+# salen del header X-Consultas-SQL si el servidor tiene INSTRUMENTACION=1.
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def reportar(resultados):
+    print(f"{'ruta':<45}{'n':>6}{'p50 ms':>10}{'p99 ms':>10}{'consultas':>11}")
+    for ruta, (tiempos, consultas) in resultados.items():
+        promedio = statistics.mean(consultas) if consultas else float("nan")
+        print(f"{ruta:<45}{len(tiempos):>6}{percentil(tiempos, 50) * 1000:>10.1f}"
+              f"{percentil(tiempos, 99) * 1000:>10.1f}{promedio:>11.1f}")
+
+
+def medir(pedir, rutas, repeticiones):
+    resultados = {}
+    for nombre, url in rutas:
+        tiempos, consultas = [], []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            estado, cabeceras = pedir(url)
+            tiempos.append(time.perf_counter() - inicio)
+            if estado >= 400:
+                raise SystemExit(f"{url} respondio {estado}")
+            if cabeceras.get("X-Consultas-SQL"):
+                consultas.append(int(cabeceras["X-Consultas-SQL"]))
+        resultados[nombre] = (tiempos, consultas)
+    return resultados
+
+
+def rutas_publicas(ids_arqueros):
+    rutas = [("home", "/"), ("arqueros", "/arqueros"),
+             ("arqueros filtrado", "/arqueros?precio_max=60000&orden=precio"),
+             ("arqueros por experiencia", "/arqueros?años_min=5&orden=experiencia")]
+    for arquero_id in ids_arqueros[:3]:
+        rutas.append((f"arquero_detail {arquero_id}", f"/arquero/{arquero_id}"))
+        rutas.append((f"disponibilidad {arquero_id}", f"/api/arqueros/{arquero_id}/disponibilidad"))
+    return rutas
+
+
+def con_test_client(args):
+    # La configuracion se lee al importar app.config
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.abspath(args.base)}")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ["INSTRUMENTACION"] = "1"
+    os.environ["PRESUPUESTO_CONSULTAS"] = "100000"  # solo medir, no fallar
+    if not args.con_cache:
+        os.environ["CACHE_RESPUESTAS"] = ""
+
+    from app import create_app, db
+    from app.models import Arquero, Usuario
+    from seed_db import sembrar
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        if args.sembrar:
+            print("Sembrando:", sembrar(db, args.usuarios, args.arqueros, args.partidos))
+        azar = random.Random(1)
+        ids_arqueros = [a for (a,) in db.session.query(Arquero.id).limit(1000)]
+        if not ids_arqueros:
+            raise SystemExit("La base esta vacia: usa --sembrar")
+        azar.shuffle(ids_arqueros)
+        usuario_normal = db.session.query(Usuario.id).filter_by(rol="normal").first()[0]
+        usuario_arquero = db.session.query(Usuario.id).filter_by(rol="arquero").first()[0]
+
+    cliente = app.test_client()
+
+    def pedir(url):
+        respuesta = cliente.get(url)
+        respuesta.close()
+        return respuesta.status_code, respuesta.headers
+
+    def iniciar_sesion(user_id):
+        # Se escribe la sesion de Flask-Login directamente para no medir el hash de contraseñas
+        with cliente.session_transaction() as sesion:
+            sesion["_user_id"] = str(user_id)
+            sesion["_fresh"] = True
+
+    resultados = medir(pedir, rutas_publicas(ids_arqueros), args.repeticiones)
+
+    iniciar_sesion(usuario_normal)
+    resultados.update(medir(pedir, [
+        ("panel (usuario)", "/panel"),
+        ("agendar", "/agendar"),
+        ("buscar arqueros", "/api/arqueros/buscar?q=Ca"),
+        ("mis_partidos", "/mis_partidos"),
+        ("historial_usuario", "/historial_usuario"),
+    ], args.repeticiones))
+
+    iniciar_sesion(usuario_arquero)
+    resultados.update(medir(pedir, [
+        ("panel (arquero)", "/panel"),
+        ("partidos_asignados", "/partidos_asignados"),
+        ("historial_arquero", "/historial_arquero"),
+        ("estadisticas_arquero", "/estadisticas_arquero"),
+    ], args.repeticiones))
+    return resultados
+
+
+def con_servidor(args):
+    def pedir(url):
+        try:
+            with urllib.request.urlopen(args.url.rstrip("/") + urllib.parse.quote(url, safe="/?=&")) as respuesta:
+                respuesta.read()
+                return respuesta.status, respuesta.headers
+        except urllib.error.HTTPError as error:
+            return error.code, error.headers
+
+    ids = [int(i) for i in args.arqueros_ids.split(",")] if args.arqueros_ids else [1, 2, 3]
+    return medir(pedir, rutas_publicas(ids), args.repeticiones)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de rutas de Arma tu equipo")
+    parser.add_argument("--base", default=os.path.join(RAIZ, "benchmarks", "bench.db"), help="archivo SQLite")
+    parser.add_argument("--sembrar", action="store_true", help="llenar la base con seed_db antes de medir")
+    parser.add_argument("--usuarios", type=int, default=2000)
+    parser.add_argument("--arqueros", type=int, default=500)
+    parser.add_argument("--partidos", type=int, default=50000)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--con-cache", action="store_true", help="dejar activo el cache de respuestas")
+    parser.add_argument("--url", help="medir un servidor ya levantado (p. ej. gunicorn) en vez del test client")
+    parser.add_argument("--arqueros-ids", help="ids de arqueros para --url, separados por coma")
+    args = parser.parse_args()
+
+    resultados = con_servidor(args) if args.url else con_test_client(args)
+    reportar(resultados)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,18 @@
 # create_db.py
-from app import app, db
+# Crea las tablas que faltan. Para actualizar una base que ya existe (columnas e
+# indices nuevos) usar: flask --app run actualizar-esquema (ver README.MD)
+from app import create_app, db
 from app import models
 
+app = create_app()
+
 with app.app_context():
     db.create_all()
-    print("✅ Tablas creadas correctamente en la base de datos.")
\ No newline at end of file
+    print("✅ Tablas creadas correctamente en la base de datos.")
+
+    # En produccion las replicas copian la principal; en local (p. ej. dos archivos
+    # SQLite) hay que crearles las tablas tambien
+    for clave, engine in db.engines.items():
+        if clave and clave.startswith("replica_"):
+            db.metadata.create_all(engine)
+            print(f"✅ Tablas creadas en {clave}.")
@@ -0,0 +1,17 @@
+# gunicorn.conf.py
+# La app se construye una vez en el maestro (preload) y los workers la heredan
+# con fork: arrancan sin reimportar nada y comparten esas paginas de memoria.
+# Cada worker abre sus propias conexiones (ver app/basedatos.py).
+import os
+
+bind = os.getenv("GUNICORN_BIND", "127.0.0.1:8000")
+# Escuchando solo en loopback hay un proxy delante: la app debe leer la IP del cliente
+# de X-Forwarded-For (PROXY_SALTOS en app/config.py). Se fija antes de cargar la app.
+if bind.startswith(("127.", "localhost", "unix:")):
+    os.environ.setdefault("PROXY_SALTOS", "1")
+workers = int(os.getenv("GUNICORN_WORKERS", (os.cpu_count() or 1) * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 1))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+# Reciclar workers de a poco para que el RSS no crezca sin limite
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = max_requests // 10
@@ -1,4 +1,5 @@
-from app import app
+from app import create_app
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app = create_app()
+    app.run(debug=True)
@@ -0,0 +1,207 @@
+# seed_db.py
+# Llena la base de datos con datos sinteticos para pruebas de carga.
+#
+#   python seed_db.py --usuarios 50000 --arqueros 10000 --partidos 1000000
+#
+# Inserta en lotes (executemany) y calcula en Python los agregados de cada arquero
+# (calificaciones y ranking) para no tener que recorrer la tabla de partidos despues.
+from datetime import date, time, timedelta
+from sqlalchemy import func, insert, select, text, update
+from werkzeug.security import generate_password_hash
+import argparse
+import itertools
+import random
+
+NOMBRES = ["Juan", "Carlos", "Andrés", "Santiago", "Camilo", "Felipe", "Diego", "Mateo", "Sebastián",
+           "Daniel", "Laura", "Valentina", "Camila", "Sofía", "Mariana", "Natalia", "Paula", "Ana"]
+APELLIDOS = ["Gómez", "Rodríguez", "Martínez", "López", "García", "Pérez", "Ramírez", "Sánchez",
+             "Torres", "Vargas", "Castro", "Rojas", "Moreno", "Ortiz", "Herrera", "Vanegas"]
+BARRIOS = ["Chapinero", "Usaquén", "Suba", "Kennedy", "Engativá", "Teusaquillo", "Laureles",
+           "El Poblado", "Belén", "Envigado", "Granada", "San Fernando", "Bocagrande"]
+CANCHAS = ["Cancha Los Pinos", "Complejo La 80", "Sintética El Golazo", "Fútbol 5 La Bombonera",
+           "Cancha El Campín", "Club Santa Fe", "Polideportivo Sur"]
+HORAS = list(range(6, 22))
+DIAS_HISTORIA = 730
+DIAS_FUTURO = 30
+
+
+def _lotes(filas, tamaño):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamaño:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _insertar(db, modelo, filas, tamaño):
+    total = 0
+    for lote in _lotes(filas, tamaño):
+        # Insert de Core sobre la tabla: el bulk del ORM omite los None de columnas con
+        # default de Python (ocupa_turno) y los cancelados chocarian en el UNIQUE
+        db.session.execute(insert(modelo.__table__), lote)
+        db.session.commit()
+        total += len(lote)
+    return total
+
+
+def sembrar(db, usuarios=1000, arqueros=200, partidos=20000, lote=5000, semilla=42):
+    """Inserta usuarios normales, arqueros (con su usuario) y partidos. Devuelve los conteos."""
+    from app.models import Arquero, Partido, Usuario
+    from app.estadisticas import reconstruir_resumen
+    from app.ranking import puntaje
+    from app.cercania import geocodificador
+
+    azar = random.Random(semilla)
+    if db.engine.dialect.name == "sqlite":
+        db.session.execute(text("PRAGMA journal_mode=WAL"))
+        db.session.execute(text("PRAGMA synchronous=OFF"))
+
+    # Una sola contraseña hasheada para todos ("secreto123"): el KDF es lento a proposito
+    contraseña = generate_password_hash("secreto123")
+    primer_usuario = (db.session.scalar(select(func.max(Usuario.id))) or 0) + 1
+    primer_arquero = (db.session.scalar(select(func.max(Arquero.id))) or 0) + 1
+    primer_partido = (db.session.scalar(select(func.max(Partido.id))) or 0) + 1
+
+    centros = {barrio: geocodificador.coordenadas(barrio) for barrio in BARRIOS}
+
+    def ubicar(barrio):
+        # Centro del barrio mas ~1 km al azar, para que no caigan todos en el mismo punto
+        latitud, longitud = centros[barrio]
+        if latitud is None:
+            return None, None
+        return latitud + azar.uniform(-0.01, 0.01), longitud + azar.uniform(-0.01, 0.01)
+
+    def usuario(i, rol):
+        barrio = azar.choice(BARRIOS)
+        latitud, longitud = ubicar(barrio)
+        return {
+            "id": primer_usuario + i,
+            "nombre": azar.choice(NOMBRES),
+            "apellido": azar.choice(APELLIDOS),
+            "correo": f"{rol}{primer_usuario + i}@ejemplo.com",
+            "telefono": f"3{azar.randint(100000000, 199999999)}",
+            "contraseña": contraseña,
+            "fecha_nacimiento": date(azar.randint(1970, 2006), azar.randint(1, 12), azar.randint(1, 28)),
+            "direccion": f"{barrio}, Calle {azar.randint(1, 150)} # {azar.randint(1, 99)}-{azar.randint(1, 99)}",
+            "latitud": latitud,
+            "longitud": longitud,
+            "rol": rol,
+            "foto": None,
+        }
+
+    total_usuarios = _insertar(db, Usuario, (usuario(i, "normal") for i in range(usuarios)), lote)
+    _insertar(db, Usuario, (usuario(usuarios + i, "arquero") for i in range(arqueros)), lote)
+
+    # Experiencia y precio correlacionados; popularidad con cola larga (pocos arqueros muy pedidos)
+    perfiles = []
+    for i in range(arqueros):
+        años = min(int(azar.expovariate(1 / 5)), 30)
+        perfiles.append({
+            "id": primer_arquero + i,
+            "id_usuario": primer_usuario + usuarios + i,
+            "años_tapando": años,
+            "precio_por_hora": round(azar.gauss(40000 + años * 3000, 8000), -3) or 20000,
+            "calificacion": 0.0,
+            "suma_calificaciones": 0,
+            "num_calificaciones": 0,
+        })
+    _insertar(db, Arquero, perfiles, lote)
+
+    capacidad = arqueros * (DIAS_HISTORIA + DIAS_FUTURO + 1) * len(HORAS)
+    if partidos > capacidad // 2:
+        raise ValueError(f"Demasiados partidos para {arqueros} arqueros (maximo {capacidad // 2})")
+
+    # Pesos acumulados: random.choices con cum_weights elige en O(log n)
+    pesos_acumulados = list(itertools.accumulate(min(azar.paretovariate(1.2), 50) for _ in range(arqueros)))
+    hoy = date.today()
+    ocupados = set()  # turnos tomados (arquero, dia, hora) codificados en un int: respeta uq_partidos_turno_arquero
+    coordenadas_canchas = {}  # solo hay unas decenas de combinaciones cancha/barrio
+    acumulado = {p["id"]: [0, 0, 0] for p in perfiles}  # suma y numero de calificaciones, confirmados
+
+    def generar_partidos():
+        generados = 0
+        while generados < partidos:
+            indice = azar.choices(range(arqueros), cum_weights=pesos_acumulados)[0]
+            dia = azar.randint(-DIAS_HISTORIA, DIAS_FUTURO)
+            hora = azar.choice(HORAS)
+            turno = (indice * (DIAS_HISTORIA + DIAS_FUTURO + 1) + dia + DIAS_HISTORIA) * 24 + hora
+            if turno in ocupados:
+                continue
+            perfil = perfiles[indice]
+            fecha = hoy + timedelta(days=dia)
+
+            if dia < 0:
+                estado = azar.choices(["confirmado", "cancelado", "pendiente"], weights=[75, 15, 10])[0]
+            else:
+                estado = azar.choices(["pendiente", "confirmado", "cancelado"], weights=[60, 30, 10])[0]
+            if estado != "cancelado":
+                ocupados.add(turno)
+
+            if estado == "confirmado":
+                acumulado[perfil["id"]][2] += 1
+            calificacion = None
+            if estado == "confirmado" and dia < 0 and azar.random() < 0.6:
+                calificacion = min(5, max(1, round(azar.gauss(4.1, 0.9))))
+                acumulado[perfil["id"]][0] += calificacion
+                acumulado[perfil["id"]][1] += 1
+
+            ubicacion = f"{azar.choice(CANCHAS)}, {azar.choice(BARRIOS)}"
+            if ubicacion not in coordenadas_canchas:
+                coordenadas_canchas[ubicacion] = geocodificador.coordenadas(ubicacion)
+            yield {
+                "id": primer_partido + generados,
+                "id_usuario": primer_usuario + azar.randrange(max(usuarios, 1)),
+                "id_arquero": perfil["id"],
+                "fecha": fecha,
+                "hora": time(hora),
+                "ubicacion": ubicacion,
+                "latitud": coordenadas_canchas[ubicacion][0],
+                "longitud": coordenadas_canchas[ubicacion][1],
+                "pago": perfil["precio_por_hora"],
+                "estado": estado,
+                "calificado": calificacion is not None,
+                "calificacion": calificacion,
+                "ocupa_turno": None if estado == "cancelado" else True,
+            }
+            generados += 1
+
+    total_partidos = _insertar(db, Partido, generar_partidos(), lote)
+
+    contadores = [
+        {"id": arquero_id, "suma_calificaciones": suma, "num_calificaciones": n,
+         "calificacion": suma / n if n else 0.0, "partidos_confirmados": confirmados,
+         "puntaje_ranking": puntaje(suma, n, confirmados)}
+        for arquero_id, (suma, n, confirmados) in acumulado.items()
+    ]
+    for bloque in _lotes(contadores, lote):
+        db.session.execute(update(Arquero), bloque)
+    db.session.commit()
+    reconstruir_resumen()
+
+    return {"usuarios": total_usuarios, "arqueros": arqueros, "partidos": total_partidos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Datos sinteticos para Arma tu equipo")
+    parser.add_argument("--usuarios", type=int, default=1000)
+    parser.add_argument("--arqueros", type=int, default=200)
+    parser.add_argument("--partidos", type=int, default=20000)
+    parser.add_argument("--lote", type=int, default=5000, help="filas por INSERT")
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    from app import create_app, db
+    import time as reloj
+
+    with create_app().app_context():
+        db.create_all()
+        inicio = reloj.perf_counter()
+        conteos = sembrar(db, args.usuarios, args.arqueros, args.partidos, args.lote, args.semilla)
+        print(f"✅ {conteos} en {reloj.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
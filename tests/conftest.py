@@ -0,0 +1,93 @@
+# tests/conftest.py
+# App de prueba sobre SQLite en memoria: python -m pytest
+import os
+
+# La configuracion se lee al importar app.config
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("SECRET_KEY", "pruebas")
+
+from datetime import date, time
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.orm import MANYTOONE
+from app import create_app, db
+from app.models import Arquero, Partido, Usuario
+
+
+@pytest.fixture
+def config_extra():
+    """Los modulos de pruebas lo redefinen para cambiar la configuracion."""
+    return {}
+
+
+@pytest.fixture
+def app(config_extra):
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_BINDS": {},
+        "CACHE_RESPUESTAS": "",
+        "JINJA_CACHE_DIR": "",
+        **config_extra,
+    })
+    # Cada peticion del cliente de prueba abre su propio contexto (y su propio g):
+    # el contexto de app solo se usa para preparar y revisar la base
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+def guardar(*objetos):
+    """Commit, recarga y saca los objetos de la sesion: los commits siguientes no los
+    expiran y se pueden leer fuera del contexto de app."""
+    db.session.add_all(objetos)
+    db.session.commit()
+    for objeto in objetos:
+        db.session.refresh(objeto)
+    for objeto in objetos:
+        # Las relaciones que ya estan en el identity map quedan cargadas
+        for relacion in inspect(objeto).mapper.relationships:
+            if relacion.direction is MANYTOONE:
+                getattr(objeto, relacion.key)
+    for objeto in objetos:
+        db.session.expunge(objeto)
+
+
+def crear_usuario(rol="normal", **datos):
+    usuario = Usuario(
+        nombre=datos.pop("nombre", "Ana"), apellido=datos.pop("apellido", "Gómez"),
+        correo=datos.pop("correo", f"{rol}{Usuario.query.count()}@ejemplo.com"),
+        contraseña="x", rol=rol, **datos,
+    )
+    guardar(usuario)
+    return usuario
+
+
+def crear_arquero(precio=50000.0, **datos):
+    usuario = crear_usuario("arquero", **datos)
+    arquero = Arquero(id_usuario=usuario.id, años_tapando=3, precio_por_hora=precio)
+    guardar(arquero, usuario)
+    return arquero
+
+
+def crear_partido(usuario, arquero, fecha=date(2030, 1, 10), hora=time(10), estado="pendiente"):
+    partido = Partido(
+        id_usuario=usuario.id, id_arquero=arquero.id, fecha=fecha, hora=hora, ubicacion="Chapinero",
+        pago=arquero.precio_por_hora, estado=estado, ocupa_turno=None if estado == "cancelado" else True,
+    )
+    guardar(partido)
+    return partido
+
+
+def iniciar_sesion(cliente, usuario):
+    # Se escribe la sesion de Flask-Login directamente para no pasar por el hash de contraseñas
+    with cliente.session_transaction() as sesion:
+        sesion["_user_id"] = str(usuario.id)
+        sesion["_fresh"] = True
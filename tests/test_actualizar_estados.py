@@ -0,0 +1,109 @@
+# tests/test_actualizar_estados.py
+from datetime import time
+import pytest
+from sqlalchemy import update
+from app import db, partidos
+from app.models import Arquero, Partido, ResumenMensual
+from app.partidos import MAX_POR_LOTE
+from app.ranking import puntaje
+from conftest import crear_arquero, crear_partido, crear_usuario, iniciar_sesion
+
+
+@pytest.fixture
+def arquero(app, cliente):
+    with app.app_context():
+        arquero = crear_arquero()
+    iniciar_sesion(cliente, arquero.usuario)
+    return arquero
+
+
+@pytest.mark.parametrize("cuerpo", [
+    [1, 2],
+    {"ids": "12", "estado": "confirmado"},
+    {"ids": [1, "2"], "estado": "confirmado"},
+    {"ids": [True], "estado": "confirmado"},
+    {"ids": [1], "estado": "jugado"},
+])
+def test_rechaza_cuerpos_invalidos(cliente, arquero, cuerpo):
+    respuesta = cliente.post("/actualizar_estados", json=cuerpo)
+    assert respuesta.status_code == 400
+    assert "error" in respuesta.json
+
+
+def test_rechaza_lotes_demasiado_grandes(app, cliente, arquero):
+    with app.app_context():
+        partido = crear_partido(crear_usuario(), arquero)
+    ids = list(range(partido.id, partido.id + MAX_POR_LOTE + 1))
+
+    respuesta = cliente.post("/actualizar_estados", json={"ids": ids, "estado": "confirmado"})
+
+    assert respuesta.status_code == 400
+    with app.app_context():
+        assert db.session.get(Partido, partido.id).estado == "pendiente"
+
+
+def test_conflicto_solo_en_el_cancelado_que_choca(app, cliente, arquero):
+    with app.app_context():
+        usuario = crear_usuario()
+        crear_partido(usuario, arquero, hora=time(10))
+        choca = crear_partido(usuario, arquero, hora=time(10), estado="cancelado")
+        libre = crear_partido(usuario, arquero, hora=time(11), estado="cancelado")
+        pendiente = crear_partido(usuario, arquero, hora=time(12))
+
+    respuesta = cliente.post("/actualizar_estados", json={
+        "ids": [choca.id, libre.id, pendiente.id], "estado": "confirmado",
+    })
+
+    assert respuesta.status_code == 200
+    assert respuesta.json["resultados"] == {
+        str(choca.id): "conflicto", str(libre.id): "actualizado", str(pendiente.id): "actualizado",
+    }
+    with app.app_context():
+        estados = dict(Partido.query.with_entities(Partido.id, Partido.estado))
+    assert estados[choca.id] == "cancelado"
+    assert estados[libre.id] == estados[pendiente.id] == "confirmado"
+
+
+def test_no_cuenta_dos_veces_un_partido_que_otra_peticion_ya_cambio(app, arquero, monkeypatch):
+    with app.app_context():
+        usuario = crear_usuario()
+        primero = crear_partido(usuario, arquero, hora=time(10))
+        segundo = crear_partido(usuario, arquero, hora=time(11))
+
+    aplicar = partidos._aplicar
+
+    def otra_peticion_primero(*args):
+        # Entre la lectura y el UPDATE, otra peticion confirma el primer partido
+        db.session.execute(update(Partido).where(Partido.id == primero.id).values(estado="confirmado"))
+        return aplicar(*args)
+
+    monkeypatch.setattr(partidos, "_aplicar", otra_peticion_primero)
+    with app.app_context():
+        resultados = partidos.cambiar_estados(arquero.id, [primero.id, segundo.id], "confirmado")
+        db.session.commit()
+
+        assert resultados == {primero.id: "sin_cambio", segundo.id: "actualizado"}
+        assert db.session.get(Arquero, arquero.id).partidos_confirmados == 1
+        # Los partidos de prueba no pasan por el resumen: solo queda el delta de este lote
+        resumen = ResumenMensual.query.filter_by(id_arquero=arquero.id).one()
+        assert (resumen.confirmados, resumen.pendientes) == (1, -1)
+
+
+def test_el_ranking_cuenta_una_vez_una_confirmacion_concurrente(app, cliente, arquero, monkeypatch):
+    with app.app_context():
+        partido = crear_partido(crear_usuario(), arquero)
+
+    def otra_peticion_confirma(*args):
+        # La otra peticion hace el cambio completo entre la lectura y el UPDATE de esta
+        monkeypatch.undo()
+        partidos.cambiar_estados(arquero.id, [partido.id], "confirmado")
+        return partidos._aplicar(*args)
+
+    monkeypatch.setattr(partidos, "_aplicar", otra_peticion_confirma)
+    respuesta = cliente.post(f"/actualizar_estado/{partido.id}/confirmado")
+
+    assert respuesta.status_code == 302
+    with app.app_context():
+        actual = db.session.get(Arquero, arquero.id)
+        assert actual.partidos_confirmados == 1
+        assert actual.puntaje_ranking == pytest.approx(puntaje(0, 0, 1))
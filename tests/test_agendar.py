@@ -0,0 +1,112 @@
+# tests/test_agendar.py
+from datetime import date, time
+import pytest
+from sqlalchemy import update
+from app import db, partidos
+from app.disponibilidad import MAX_DIAS
+from app.models import Partido, ResumenMensual
+from conftest import crear_arquero, crear_partido, crear_usuario, iniciar_sesion
+
+
+def agendar(cliente, arquero, fecha="2030-03-15", hora="10:00"):
+    return cliente.post("/agendar", data={
+        "fecha": fecha, "hora": hora, "ubicacion": "Cancha Los Pinos, Chapinero", "id_arquero": arquero.id,
+    })
+
+
+def test_agendar_en_un_mes_sin_resumen(app, cliente):
+    with app.app_context():
+        usuario = crear_usuario()
+        arquero = crear_arquero()
+    iniciar_sesion(cliente, usuario)
+
+    respuesta = agendar(cliente, arquero)
+
+    assert respuesta.status_code == 302
+    with app.app_context():
+        assert Partido.query.count() == 1
+        resumen = ResumenMensual.query.filter_by(id_arquero=arquero.id, anio=2030, mes=3).one()
+        assert (resumen.pendientes, resumen.confirmados, resumen.cancelados) == (1, 0, 0)
+
+
+def test_confirmar_partido_de_un_mes_sin_resumen(app, cliente):
+    # Partidos creados antes de que existiera el resumen (sin reconstruir-estadisticas)
+    with app.app_context():
+        arquero = crear_arquero()
+        partido = crear_partido(crear_usuario(), arquero, fecha=date(2030, 4, 1), hora=time(9))
+    iniciar_sesion(cliente, arquero.usuario)
+
+    respuesta = cliente.post(f"/actualizar_estado/{partido.id}/confirmado")
+
+    assert respuesta.status_code == 302
+    with app.app_context():
+        resumen = ResumenMensual.query.filter_by(id_arquero=arquero.id, anio=2030, mes=4).one()
+        assert (resumen.confirmados, resumen.ingresos) == (1, arquero.precio_por_hora)
+
+
+def test_confirmar_un_partido_que_otra_peticion_ya_confirmo(app, cliente, monkeypatch):
+    with app.app_context():
+        arquero = crear_arquero()
+        partido = crear_partido(crear_usuario(), arquero, fecha=date(2030, 4, 1), hora=time(9))
+    iniciar_sesion(cliente, arquero.usuario)
+    aplicar = partidos._aplicar
+
+    def doble_envio(*args):
+        # El otro envio confirma el partido despues de que esta peticion lo leyo
+        db.session.execute(update(Partido).where(Partido.id == partido.id).values(estado="confirmado"))
+        return aplicar(*args)
+
+    monkeypatch.setattr(partidos, "_aplicar", doble_envio)
+    respuesta = cliente.post(f"/actualizar_estado/{partido.id}/confirmado")
+
+    assert respuesta.status_code == 302
+    with app.app_context():
+        # El cambio lo conto el otro envio: este no suma nada al resumen
+        assert ResumenMensual.query.filter_by(id_arquero=arquero.id).count() == 0
+
+
+def test_agendar_rechaza_hora_que_no_es_en_punto(app, cliente):
+    with app.app_context():
+        usuario = crear_usuario()
+        arquero = crear_arquero()
+    iniciar_sesion(cliente, usuario)
+
+    assert agendar(cliente, arquero, hora="10:00").status_code == 302
+    respuesta = agendar(cliente, arquero, hora="10:30")
+    assert respuesta.status_code == 200
+    assert "hora en punto" in respuesta.get_data(as_text=True)
+    with app.app_context():
+        assert Partido.query.count() == 1
+
+
+def test_un_cancelado_no_ocupa_el_turno(app, cliente):
+    with app.app_context():
+        usuario = crear_usuario()
+        arquero = crear_arquero()
+        crear_partido(usuario, arquero, fecha=date(2030, 3, 15), hora=time(10), estado="cancelado")
+    iniciar_sesion(cliente, usuario)
+
+    assert agendar(cliente, arquero, hora="10:00").status_code == 302
+    with app.app_context():
+        assert Partido.query.count() == 2
+
+
+@pytest.mark.parametrize("desde", ["9999-12-30", "2000-01-01"])
+def test_disponibilidad_rechaza_desde_fuera_de_la_ventana(app, cliente, desde):
+    with app.app_context():
+        arquero = crear_arquero()
+
+    respuesta = cliente.get(f"/api/arqueros/{arquero.id}/disponibilidad", query_string={"desde": desde})
+
+    assert respuesta.status_code == 400
+    assert "error" in respuesta.json
+
+
+def test_disponibilidad_con_hasta_muy_lejano_se_recorta(app, cliente):
+    with app.app_context():
+        arquero = crear_arquero()
+
+    respuesta = cliente.get(f"/api/arqueros/{arquero.id}/disponibilidad", query_string={"hasta": "9999-12-31"})
+
+    assert respuesta.status_code == 200
+    assert len(respuesta.json["dias"]) == MAX_DIAS
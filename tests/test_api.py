@@ -0,0 +1,118 @@
+# tests/test_api.py
+import base64
+import json
+import pytest
+from sqlalchemy import update
+from app import db
+from app.consultas import codificar_cursor, decodificar_cursor
+from app.models import Arquero
+from conftest import crear_arquero, crear_partido, crear_usuario, iniciar_sesion
+
+
+def cambiar_precio(app, arquero_id, precio):
+    with app.app_context():
+        db.session.execute(update(Arquero).where(Arquero.id == arquero_id).values(precio_por_hora=precio))
+        db.session.commit()
+
+
+def test_arqueros_revalidacion_con_etag(app, cliente):
+    with app.app_context():
+        arquero = crear_arquero()
+    primera = cliente.get("/api/v1/arqueros")
+    assert primera.status_code == 200
+    assert primera.json["datos"][0]["id"] == arquero.id
+
+    segunda = cliente.get("/api/v1/arqueros", headers={"If-None-Match": primera.headers["ETag"]})
+    assert segunda.status_code == 304
+    assert segunda.headers["ETag"] == primera.headers["ETag"]
+
+    cambiar_precio(app, arquero.id, 70000.0)
+    tercera = cliente.get("/api/v1/arqueros", headers={"If-None-Match": primera.headers["ETag"]})
+    assert tercera.status_code == 200
+    assert tercera.json["datos"][0]["precio_por_hora"] == 70000.0
+
+
+def test_arquero_revalidacion_con_last_modified(app, cliente):
+    with app.app_context():
+        arquero = crear_arquero()
+    primera = cliente.get(f"/api/v1/arqueros/{arquero.id}")
+    assert primera.status_code == 200
+
+    segunda = cliente.get(f"/api/v1/arqueros/{arquero.id}",
+                          headers={"If-Modified-Since": primera.headers["Last-Modified"]})
+    assert segunda.status_code == 304
+
+
+def test_mis_partidos_revalidacion(app, cliente):
+    with app.app_context():
+        usuario = crear_usuario()
+        crear_partido(usuario, crear_arquero())
+    iniciar_sesion(cliente, usuario)
+
+    primera = cliente.get("/api/v1/mis_partidos")
+    assert primera.status_code == 200
+    assert len(primera.json["datos"]) == 1
+    segunda = cliente.get("/api/v1/mis_partidos", headers={"If-None-Match": primera.headers["ETag"]})
+    assert segunda.status_code == 304
+
+
+@pytest.mark.parametrize("años_min", [2 ** 63, 10 ** 30, -(2 ** 64)])
+def test_años_min_fuera_de_rango_se_ignora(app, cliente, años_min):
+    with app.app_context():
+        arquero = crear_arquero()
+
+    respuesta = cliente.get("/api/v1/arqueros", query_string={"años_min": años_min})
+
+    assert respuesta.status_code == 200
+    assert [a["id"] for a in respuesta.json["datos"]] == [arquero.id]
+
+
+def test_coleccion_no_responde_304_por_if_modified_since(app, cliente):
+    with app.app_context():
+        primero, segundo = crear_arquero(), crear_arquero()
+    cambiar_precio(app, primero.id, 50000.0)
+    cambiar_precio(app, segundo.id, 55000.0)
+    primera = cliente.get("/api/v1/arqueros", query_string={"precio_max": 60000})
+    assert {a["id"] for a in primera.json["datos"]} == {primero.id, segundo.id}
+    assert "Last-Modified" not in primera.headers
+
+    # El primero sale de la pagina: la fecha mas reciente de los que quedan no cambia
+    cambiar_precio(app, primero.id, 90000.0)
+    segunda = cliente.get("/api/v1/arqueros", query_string={"precio_max": 60000},
+                          headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+
+    assert segunda.status_code == 200
+    assert [a["id"] for a in segunda.json["datos"]] == [segundo.id]
+
+
+@pytest.mark.parametrize("antes", [2 ** 63, -(2 ** 63) - 1, 10 ** 30])
+def test_antes_fuera_de_rango_se_ignora(app, cliente, antes):
+    with app.app_context():
+        usuario = crear_usuario()
+        crear_partido(usuario, crear_arquero())
+    iniciar_sesion(cliente, usuario)
+
+    respuesta = cliente.get("/api/v1/mis_partidos", query_string={"antes": antes})
+
+    assert respuesta.status_code == 200
+    assert len(respuesta.json["datos"]) == 1
+
+
+@pytest.mark.parametrize("posicion", [
+    ["x", 1], [5.0, "1"], [True, 1], [5.0, 1.5], [None, 1], "x", [5.0], [5.0, 2 ** 63], [2 ** 64, 1],
+])
+def test_cursor_manipulado_vuelve_a_la_primera_pagina(app, cliente, posicion):
+    with app.app_context():
+        arquero = crear_arquero()
+    cursor = base64.urlsafe_b64encode(json.dumps(posicion).encode()).decode().rstrip("=")
+
+    respuesta = cliente.get("/api/v1/arqueros", query_string={"cursor": cursor})
+
+    assert respuesta.status_code == 200
+    assert [a["id"] for a in respuesta.json["datos"]] == [arquero.id]
+    assert decodificar_cursor(cursor) is None
+
+
+def test_cursor_valido():
+    assert decodificar_cursor(codificar_cursor(4.5, 7)) == (4.5, 7)
+    assert decodificar_cursor(codificar_cursor(3, 7)) == (3, 7)
@@ -0,0 +1,17 @@
+# tests/test_buscar.py
+import pytest
+from conftest import crear_arquero, crear_usuario, iniciar_sesion
+
+
+@pytest.mark.parametrize("limite,esperados", [(-1, 1), (0, 1), (2, 2), (10 ** 6, 3)])
+def test_limite_de_la_busqueda_queda_entre_1_y_50(app, cliente, limite, esperados):
+    with app.app_context():
+        for _ in range(3):
+            crear_arquero()
+        usuario = crear_usuario()
+    iniciar_sesion(cliente, usuario)
+
+    respuesta = cliente.get("/api/arqueros/buscar", query_string={"q": "Ana", "limite": limite})
+
+    assert respuesta.status_code == 200
+    assert len(respuesta.json) == esperados
@@ -0,0 +1,61 @@
+# tests/test_cache.py
+import os
+import pytest
+from app.cache import ArchivoLocal, directorio_privado
+
+
+@pytest.fixture
+def archivo(tmp_path):
+    return ArchivoLocal(str(tmp_path / "cache"), max_entradas=8)
+
+
+def entradas(backend):
+    return [n for n in os.listdir(backend.directorio) if not n.endswith(".lock")]
+
+
+def test_guarda_respuestas_y_contadores_sin_pickle(archivo):
+    archivo.set("resp:a", (b"<html>\n</html>", "text/html"), ttl=60)
+    assert archivo.incr("version:arqueros") == 1
+    assert archivo.incr("version:arqueros") == 2
+
+    assert archivo.get("resp:a") == (b"<html>\n</html>", "text/html")
+    assert archivo.get("version:arqueros") == 2
+    with open(archivo._ruta("resp:a"), "rb") as guardado:
+        assert guardado.read().startswith(b"{")
+
+
+def test_el_directorio_es_privado(archivo):
+    assert os.stat(archivo.directorio).st_mode & 0o777 == 0o700
+
+
+def test_rechaza_un_directorio_que_no_es_propio(tmp_path):
+    destino = tmp_path / "otro"
+    destino.mkdir()
+    os.symlink(destino, tmp_path / "enlace")
+    with pytest.raises(RuntimeError):
+        directorio_privado(str(tmp_path / "enlace"))
+
+
+def test_archivo_ilegible_es_un_miss(archivo):
+    with open(archivo._ruta("resp:a"), "wb") as guardado:
+        guardado.write(b"\x80\x04basura")
+    assert archivo.get("resp:a") is None
+
+
+def test_borra_vencidas_y_acota_las_entradas(archivo, monkeypatch):
+    archivo.incr("version:arqueros")
+    archivo.set("resp:vieja", (b"x", "text/html"), ttl=60)
+    reloj = [os.path.getmtime(archivo._ruta("resp:vieja"))]
+    monkeypatch.setattr("app.cache.time.time", lambda: reloj[0])
+
+    assert archivo.get("resp:vieja") == (b"x", "text/html")
+    reloj[0] += 120
+    assert archivo.get("resp:vieja") is None
+    assert not os.path.exists(archivo._ruta("resp:vieja"))
+
+    for i in range(50):
+        archivo.set(f"resp:{i}", (b"x", "text/html"), ttl=60)
+    # Contador + max_entradas + lo escrito desde la ultima poda
+    assert len(entradas(archivo)) <= 1 + archivo.max_entradas + archivo.intervalo
+    assert archivo.get("version:arqueros") == 1
+    assert archivo.get("resp:49") is not None
@@ -0,0 +1,50 @@
+# tests/test_cercania.py
+import pytest
+from sqlalchemy import update
+from app import db
+from app.cercania import indice_cercania
+from app.models import Arquero
+from conftest import crear_arquero, crear_usuario, iniciar_sesion
+
+
+@pytest.mark.parametrize("radio", ["nan", "inf", "-inf", "abc"])
+@pytest.mark.parametrize("ruta", ["/arqueros", "/api/v1/arqueros", "/api/arqueros/buscar"])
+def test_radio_invalido_usa_el_radio_por_defecto(app, cliente, ruta, radio):
+    with app.app_context():
+        cerca = crear_arquero(direccion="Chapinero, Calle 50", latitud=4.6486, longitud=-74.0628)
+        crear_arquero(direccion="Medellín", latitud=6.2442, longitud=-75.5812)
+        usuario = crear_usuario()
+    iniciar_sesion(cliente, usuario)
+
+    respuesta = cliente.get(ruta, query_string={"cerca": "Chapinero", "radio": radio})
+
+    assert respuesta.status_code == 200
+    if ruta == "/api/v1/arqueros":
+        assert [a["id"] for a in respuesta.json["datos"]] == [cerca.id]
+
+
+def test_buscador_aplica_el_limite_despues_de_ordenar_por_distancia(app, cliente):
+    with app.app_context():
+        lejos = crear_arquero(direccion="Usaquén", latitud=4.70, longitud=-74.03)
+        cerca = crear_arquero(direccion="Chapinero, Calle 50", latitud=4.6486, longitud=-74.0628)
+        db.session.execute(update(Arquero).where(Arquero.id == lejos.id).values(calificacion=5.0))
+        db.session.commit()
+        usuario = crear_usuario()
+    iniciar_sesion(cliente, usuario)
+
+    respuesta = cliente.get("/api/arqueros/buscar", query_string={
+        "q": "Ana", "cerca": "4.6486,-74.0628", "radio": 20, "limite": 1,
+    })
+
+    assert [r["id"] for r in respuesta.json] == [cerca.id]
+    assert respuesta.json[0]["distancia_km"] == 0.0
+
+
+def test_con_mas_arqueros_que_el_limite_se_quedan_los_mas_cercanos(app):
+    with app.app_context():
+        ids = [crear_arquero(latitud=4.6 + i * 0.001, longitud=-74.06).id for i in range(10)]
+        cercanos = indice_cercania.cercanos(4.6, -74.06, 5, limite=3)
+
+        assert sorted(cercanos.ids) == ids[:3]
+        assert cercanos.distancia(ids[1]) == pytest.approx(0.111, abs=0.001)
+        assert cercanos.distancia(ids[5]) is None
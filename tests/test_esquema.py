@@ -0,0 +1,72 @@
+# tests/test_esquema.py
+# Una base creada antes de las columnas nuevas se actualiza con actualizar-esquema
+# y despues los comandos de backfill corren sobre ella.
+from sqlalchemy import inspect
+from app import db
+from app.models import Arquero, Partido, ResumenMensual
+
+ESQUEMA_ANTERIOR = """
+CREATE TABLE usuarios (id INTEGER PRIMARY KEY, nombre VARCHAR(50) NOT NULL, apellido VARCHAR(50) NOT NULL,
+    correo VARCHAR(120) NOT NULL UNIQUE, telefono VARCHAR(20), "contraseña" VARCHAR(200) NOT NULL,
+    fecha_nacimiento DATE, direccion VARCHAR(200), rol VARCHAR(20) NOT NULL, foto VARCHAR(200));
+CREATE TABLE arqueros (id INTEGER PRIMARY KEY, id_usuario INTEGER UNIQUE REFERENCES usuarios (id),
+    "años_tapando" INTEGER NOT NULL, precio_por_hora FLOAT NOT NULL, calificacion FLOAT);
+CREATE TABLE partidos (id INTEGER PRIMARY KEY, id_usuario INTEGER REFERENCES usuarios (id),
+    id_arquero INTEGER REFERENCES arqueros (id), fecha DATE NOT NULL, hora TIME NOT NULL,
+    ubicacion VARCHAR(200) NOT NULL, pago FLOAT NOT NULL, estado VARCHAR(20), calificado BOOLEAN);
+INSERT INTO usuarios VALUES (1, 'Ana', 'Gómez', 'ana@ejemplo.com', NULL, 'x', NULL, 'Chapinero', 'normal', NULL);
+INSERT INTO usuarios VALUES (2, 'Luis', 'Paz', 'luis@ejemplo.com', NULL, 'x', NULL, 'Chapinero', 'arquero', NULL);
+INSERT INTO arqueros VALUES (1, 2, 3, 50000, 4.0);
+INSERT INTO partidos VALUES (1, 1, 1, '2030-01-10', '10:00:00.000000', 'Chapinero', 50000, 'confirmado', 1);
+INSERT INTO partidos VALUES (2, 1, 1, '2030-01-10', '10:00:00.000000', 'Chapinero', 50000, 'cancelado', 0);
+"""
+
+
+def base_anterior(app):
+    with app.app_context():
+        db.drop_all()
+        with db.engine.begin() as conexion:
+            for sentencia in ESQUEMA_ANTERIOR.split(";"):
+                if sentencia.strip():
+                    conexion.exec_driver_sql(sentencia)
+
+
+def invocar(app, comando):
+    # `flask` empuja el contexto de app; el runner de pruebas no
+    with app.app_context():
+        return app.test_cli_runner().invoke(args=[comando])
+
+
+def test_actualizar_esquema_y_backfill(app):
+    base_anterior(app)
+    resultado = invocar(app, "actualizar-esquema")
+    assert resultado.exit_code == 0, resultado.output
+    with app.app_context():
+        inspector = inspect(db.engine)
+        for tabla in db.metadata.sorted_tables:
+            assert {c.name for c in tabla.columns} <= {c["name"] for c in inspector.get_columns(tabla.name)}
+            assert {i.name for i in tabla.indexes} <= {i["name"] for i in inspector.get_indexes(tabla.name)}
+    # Correrlo otra vez no cambia nada
+    assert "0 cambios" in invocar(app, "actualizar-esquema").output
+
+    for comando in ("backfill-calificaciones", "backfill-turnos", "recalcular-ranking", "reconstruir-estadisticas"):
+        resultado = invocar(app, comando)
+        assert resultado.exit_code == 0, resultado.output
+
+    with app.app_context():
+        arquero = db.session.get(Arquero, 1)
+        assert (arquero.num_calificaciones, arquero.partidos_confirmados) == (1, 1)
+        assert [p.ocupa_turno for p in Partido.query.order_by(Partido.id)] == [True, None]
+        assert ResumenMensual.query.one().confirmados == 1
+
+
+def test_backfill_turnos_avisa_turnos_repetidos(app):
+    base_anterior(app)
+    with app.app_context(), db.engine.begin() as conexion:
+        conexion.exec_driver_sql("UPDATE partidos SET estado = 'pendiente' WHERE id = 2")
+    invocar(app, "actualizar-esquema")
+
+    resultado = invocar(app, "backfill-turnos")
+
+    assert resultado.exit_code != 0
+    assert "Arquero 1: 2 partidos activos el 2030-01-10 a las 10:00" in resultado.output
@@ -0,0 +1,16 @@
+# tests/test_fragmentos.py
+import os
+import pytest
+
+
+@pytest.fixture
+def config_extra():
+    # Como en produccion sin JINJA_CACHE_DIR
+    return {"JINJA_CACHE_DIR": None}
+
+
+def test_bytecode_en_directorio_privado_por_defecto(app):
+    directorio = app.jinja_env.bytecode_cache.directory
+    info = os.stat(directorio)
+    assert info.st_uid == os.getuid()
+    assert info.st_mode & 0o077 == 0
@@ -0,0 +1,25 @@
+# tests/test_historial.py
+import pytest
+from werkzeug.datastructures import MultiDict
+from app import historial
+from conftest import crear_arquero, crear_partido, crear_usuario, iniciar_sesion
+
+
+@pytest.mark.parametrize("pagina,esperada", [("-5", 1), ("0", 1), ("3", 3), (str(10 ** 30), historial.MAX_PAGINA)])
+def test_pagina_queda_entre_1_y_max_pagina(pagina, esperada):
+    assert historial.pagina_desde_args(MultiDict({"pagina": pagina})) == esperada
+
+
+@pytest.mark.parametrize("ruta", ["/historial_usuario", "/historial_arquero"])
+@pytest.mark.parametrize("pagina", [-5, 0, 2 ** 63, 10 ** 30])
+def test_historial_con_pagina_fuera_de_rango(app, cliente, ruta, pagina):
+    with app.app_context():
+        usuario = crear_usuario()
+        arquero = crear_arquero()
+        crear_partido(usuario, arquero, estado="confirmado")
+    iniciar_sesion(cliente, usuario if ruta == "/historial_usuario" else arquero.usuario)
+
+    respuesta = cliente.get(ruta, query_string={"pagina": pagina})
+
+    assert respuesta.status_code == 200
+    assert ("Chapinero" in respuesta.get_data(as_text=True)) == (pagina < 1)
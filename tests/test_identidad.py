@@ -0,0 +1,31 @@
+# tests/test_identidad.py
+# El usuario autenticado se reconstruye desde el cache de identidad; las paginas
+# publicas de arqueros deben mostrar los datos de la base, no esa copia.
+from sqlalchemy import update
+from app import db
+from app.models import Arquero
+from conftest import crear_arquero, iniciar_sesion
+import pytest
+
+
+@pytest.fixture
+def config_extra():
+    # Con el cache de respuestas activo el usuario se carga antes que la vista
+    return {"CACHE_RESPUESTAS": "memoria"}
+
+
+def test_arquero_autenticado_ve_su_precio_actual(app, cliente):
+    with app.app_context():
+        arquero = crear_arquero(precio=50000.0)
+    iniciar_sesion(cliente, arquero.usuario)
+    assert cliente.get("/panel").status_code == 200  # llena el cache de identidad
+
+    # UPDATE directo, como otro worker: este proceso no invalida su cache de identidad
+    with app.app_context():
+        db.session.execute(update(Arquero).where(Arquero.id == arquero.id).values(precio_por_hora=80000.0))
+        db.session.commit()
+
+    detalle = cliente.get(f"/arquero/{arquero.id}").get_data(as_text=True)
+    assert "$80,000" in detalle and "$50,000" not in detalle
+    listado = cliente.get("/arqueros").get_data(as_text=True)
+    assert "$80,000" in listado and "$50,000" not in listado
@@ -0,0 +1,110 @@
+# tests/test_imagenes.py
+import io
+import struct
+import zlib
+from PIL import Image
+import pytest
+from werkzeug.datastructures import FileStorage
+from app import imagenes
+from app.models import Usuario
+
+
+class EjecutorEnLinea:
+    def submit(self, funcion, *args):
+        funcion(*args)
+
+
+class EjecutorGuardado:
+    tareas = []
+
+    @classmethod
+    def submit(cls, funcion, *args):
+        cls.tareas.append((funcion, args))
+
+
+@pytest.fixture
+def carpeta(tmp_path, monkeypatch):
+    monkeypatch.setattr(imagenes, "UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setattr(imagenes, "_get_executor", EjecutorEnLinea)
+    return tmp_path
+
+
+def foto_con_gps(formato="JPEG"):
+    imagen = Image.new("RGB", (120, 80), "green")
+    exif = Image.Exif()
+    exif[0x010F] = "Camara"  # Make
+    exif[0x8825] = {1: "N", 2: (4.0, 39.0, 0.0)}  # GPSInfo
+    contenido = io.BytesIO()
+    imagen.save(contenido, formato, exif=exif.tobytes())
+    return contenido.getvalue()
+
+
+def png_que_declara(ancho, alto):
+    """PNG valido de 1x1 con la cabecera (IHDR) cambiada: pesa pocos bytes y declara ancho x alto."""
+    contenido = io.BytesIO()
+    Image.new("1", (1, 1)).save(contenido, "PNG")
+    datos = bytearray(contenido.getvalue())
+    # firma (8) + largo (4) + "IHDR" (4): ancho y alto son los dos primeros enteros
+    datos[16:24] = struct.pack(">II", ancho, alto)
+    datos[29:33] = struct.pack(">I", zlib.crc32(bytes(datos[12:29])))
+    return bytes(datos)
+
+
+@pytest.mark.parametrize("extension,formato", [("jpg", "JPEG"), ("png", "PNG"), ("webp", "WEBP")])
+def test_guardar_foto_quita_metadatos_del_original(carpeta, extension, formato):
+    nombre = imagenes.guardar_foto(FileStorage(io.BytesIO(foto_con_gps(formato)), f"yo.{extension}"))
+
+    with Image.open(carpeta / nombre) as guardada:
+        assert guardada.size == (120, 80)
+        assert not guardada.getexif()
+        assert "exif" not in guardada.info
+
+
+def test_guardar_foto_rechaza_archivos_que_no_son_imagen(carpeta):
+    assert imagenes.guardar_foto(FileStorage(io.BytesIO(b"<script>"), "yo.jpg")) is None
+    assert list(carpeta.iterdir()) == []
+
+
+def test_convertir_foto_existente_quita_metadatos(carpeta):
+    (carpeta / "1700000000_yo.jpg").write_bytes(foto_con_gps())
+
+    nombre = imagenes.convertir_foto_existente("1700000000_yo.jpg")
+
+    assert not (carpeta / "1700000000_yo.jpg").exists()
+    with Image.open(carpeta / nombre) as guardada:
+        assert not guardada.getexif()
+
+
+@pytest.mark.parametrize("lado", [6000, 20000])
+def test_guardar_foto_rechaza_imagenes_enormes_sin_decodificarlas(carpeta, lado):
+    assert imagenes.guardar_foto(FileStorage(io.BytesIO(png_que_declara(lado, lado)), "yo.png")) is None
+    assert list(carpeta.iterdir()) == []
+
+
+def test_registro_con_foto_enorme_muestra_el_error(app, cliente, carpeta):
+    respuesta = cliente.post("/register", data={
+        "nombre": "Ana", "apellido": "Gomez", "correo": "ana@ejemplo.com",
+        "contraseña": "secreta1", "contraseña_confirmacion": "secreta1", "rol": "normal",
+        "foto": (io.BytesIO(png_que_declara(20000, 20000)), "yo.png"),
+    })
+
+    assert respuesta.status_code == 200
+    assert "demasiado grande" in respuesta.get_data(as_text=True)
+    with app.app_context():
+        assert Usuario.query.count() == 0
+
+
+def test_foto_url_da_la_provisional_hasta_que_esten_las_variantes(app, carpeta, monkeypatch):
+    monkeypatch.setattr(imagenes, "_get_executor", lambda: EjecutorGuardado)
+    monkeypatch.setattr(imagenes, "_listas", set())
+    EjecutorGuardado.tareas.clear()
+
+    nombre = imagenes.guardar_foto(FileStorage(io.BytesIO(foto_con_gps()), "yo.jpg"))
+
+    with app.test_request_context():
+        # La peticion no escribe nada: el original y las variantes son de la tarea de fondo
+        assert list(carpeta.iterdir()) == []
+        assert imagenes.foto_url(nombre) == "/static/" + imagenes.FOTO_PENDIENTE
+        for funcion, args in EjecutorGuardado.tareas:
+            funcion(*args)
+        assert imagenes.foto_url(nombre) == f"/static/uploads/{nombre[:32]}_card.jpg"
@@ -0,0 +1,20 @@
+# tests/test_instrumentacion.py
+import pytest
+from app.instrumentacion import PresupuestoConsultasExcedido
+
+
+@pytest.fixture
+def config_extra():
+    return {"INSTRUMENTACION": True, "PRESUPUESTO_CONSULTAS": 0}
+
+
+def test_presupuesto_excedido_falla_en_testing(cliente):
+    with pytest.raises(PresupuestoConsultasExcedido):
+        cliente.get("/arqueros")
+
+
+def test_modo_estricto_se_puede_desactivar(app, cliente):
+    app.config["INSTRUMENTACION_ESTRICTA"] = False
+    respuesta = cliente.get("/arqueros")
+    assert respuesta.status_code == 200
+    assert int(respuesta.headers["X-Consultas-SQL"]) > 0
@@ -0,0 +1,29 @@
+# tests/test_login.py
+import pytest
+from conftest import crear_usuario, iniciar_sesion
+
+
+@pytest.fixture
+def config_extra():
+    return {"PROXY_SALTOS": 1, "LOGIN_IP_RAFAGA": 2, "LOGIN_CUENTA_RAFAGA": 100}
+
+
+def intentar(cliente, ip):
+    return cliente.post("/login", data={"correo": "normal0@ejemplo.com", "contraseña": "mala"},
+                        headers={"X-Forwarded-For": ip}).status_code
+
+
+def test_limite_por_ip_usa_la_ip_del_cliente_detras_del_proxy(app, cliente):
+    with app.app_context():
+        crear_usuario()
+    assert [intentar(cliente, "203.0.113.7") for _ in range(3)] == [200, 200, 429]
+    # Otro cliente detras del mismo proxy tiene su propia cubeta
+    assert intentar(cliente, "198.51.100.2") == 200
+
+
+def test_la_sesion_no_se_arrastra_entre_peticiones(app, cliente):
+    with app.app_context():
+        usuario = crear_usuario()
+    assert cliente.get("/").status_code == 200  # anonimo
+    iniciar_sesion(cliente, usuario)
+    assert cliente.get("/panel").status_code == 200
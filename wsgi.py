@@ -0,0 +1,7 @@
+# wsgi.py
+# Punto de entrada para servidores WSGI:
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+from app import create_app
+
+app = create_app()